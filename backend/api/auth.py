@@ -2,17 +2,24 @@
 认证相关API
 """ 
 # backend/api/auth.py
+import math
 from datetime import timedelta, datetime, timezone
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Request, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm # 用于登录表单
+from beanie import PydanticObjectId
 from beanie.exceptions import RevisionIdWasChanged # 用于处理可能的并发写入
 from pydantic import BaseModel
 from pydantic import EmailStr # 确保 EmailStr 已导入
 
-from backend.models.user import User, UserCreate, UserRead # User是Beanie模型, UserCreate/Read是Pydantic模型
-from backend.core.security import get_password_hash, verify_password, create_access_token, get_current_active_user
+from backend.models.user import User, UserCreate, UserRead, UserListView # User是Beanie模型, UserCreate/Read是Pydantic模型
+from backend.core.security import hash_password, verify_and_update_password, create_access_token, get_current_active_user, password_hash_executor
+from backend.core.login_throttle import login_throttle
+from backend.models.user_purge_job import UserPurgeJob, UserPurgeJobRead
+from backend.services.user_purge import CANCELLED_USER_EXISTS, cancel_purge_job, create_purge_job, user_purge_worker
+from backend.core.user_cache import invalidate_cached_user
 from backend.config import settings
 
 router = APIRouter()
@@ -25,6 +32,33 @@ class UserReactivationRequest(BaseModel):
     email: EmailStr
     password: str
 
+
+def _admit_login_attempt(account: str, request: Request) -> None:
+    """校验密码前的准入检查：账户/IP 超过登录限流时返回 429，哈希线程池排队过长时返回 503"""
+    if password_hash_executor.queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy. Please try again later.",
+            headers={"Retry-After": "1"},
+        )
+    client_ip = request.client.host if request.client else None
+    retry_after = login_throttle.admit(account, client_ip)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+async def _verify_user_password(user: User, password: str) -> bool:
+    """验证密码；已有哈希的成本与当前 BCRYPT_ROUNDS 不同时，把按新成本计算的哈希写回数据库"""
+    verified, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if verified and new_hash:
+        await user.set({User.hashed_password: new_hash})
+    return verified
+
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def register_user(user_in: UserCreate):
     """
@@ -40,7 +74,7 @@ async def register_user(user_in: UserCreate):
             detail="User with this email already exists.",
         )
     
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await hash_password(user_in.password)
     
     new_user_data = user_in.model_dump(exclude={"password"}) # Pydantic V2
     # new_user_data = user_in.dict(exclude={"password"}) # Pydantic V1
@@ -64,13 +98,16 @@ async def register_user(user_in: UserCreate):
 
 
 @router.post("/login/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     """
     用户登录获取访问令牌.
     需要以表单形式提交 `username` (即邮箱) 和 `password`.
+    同一账户连续失败或同一 IP 尝试过多时返回 429.
     """
+    _admit_login_attempt(form_data.username, request)
     user = await User.find_one(User.email == form_data.username) # form_data.username 对应登录时的邮箱
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await _verify_user_password(user, form_data.password):
+        login_throttle.record_failure(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -81,6 +118,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user",
         )
+    login_throttle.record_success(form_data.username)
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -102,11 +140,48 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
     # return UserRead.from_orm(current_user) # Pydantic V1
 
 
+async def _user_page(after: Optional[PydanticObjectId], limit: int) -> List[UserListView]:
+    """按 _id 顺序读取 after 之后的 limit 个用户 (投影，不加载 hashed_password)"""
+    query = User.find(User.id > after) if after is not None else User.find()
+    return await query.sort(+User.id).limit(limit).project(UserListView).to_list()
+
+
 @router.get("/users", response_model=List[UserRead])
-async def list_all_users(current_user: User = Depends(get_current_active_user)):
-    """列出所有用户，仅供管理使用"""
-    docs = await User.find_all().to_list()
-    return [UserRead.model_validate(u) for u in docs]
+async def list_all_users(
+    response: Response,
+    limit: int = Query(settings.USER_LIST_DEFAULT_LIMIT, ge=1, le=settings.USER_LIST_MAX_LIMIT),
+    after: Optional[PydanticObjectId] = Query(None, description="Cursor: return users after this user ID."),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    按注册顺序 (_id) 分页列出用户，仅供管理使用。
+    还有下一页时，下一页的游标通过 X-Next-Cursor 响应头返回。
+    """
+    # 多取一条用于判断是否还有下一页
+    user_views = await _user_page(after, limit + 1)
+    if len(user_views) > limit:
+        user_views = user_views[:limit]
+        response.headers["X-Next-Cursor"] = str(user_views[-1].id)
+    return [UserRead.model_validate(user_view) for user_view in user_views]
+
+
+@router.get("/users/export")
+async def export_all_users(current_user: User = Depends(get_current_active_user)):
+    """
+    以 NDJSON (application/x-ndjson) 流式导出全部用户，每行一个用户，仅供管理使用。
+    按 _id 分批读取 (每批 USER_EXPORT_BATCH_SIZE 个)，内存占用与用户总数无关。
+    """
+    async def ndjson_lines():
+        after = None
+        while True:
+            user_views = await _user_page(after, settings.USER_EXPORT_BATCH_SIZE)
+            for user_view in user_views:
+                yield UserRead.model_validate(user_view).model_dump_json() + "\n"
+            if len(user_views) < settings.USER_EXPORT_BATCH_SIZE:
+                break
+            after = user_views[-1].id
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.post("/users/me/deactivate", response_model=UserRead, status_code=status.HTTP_200_OK)
@@ -121,16 +196,10 @@ async def deactivate_current_user(current_user: User = Depends(get_current_activ
             detail="Account already inactive."
         )
 
-    current_user.is_active = False
-    current_user.updated_at = datetime.now(timezone.utc) # 手动更新 updated_at
-    
-    try:
-        await current_user.save() # 保存更改到数据库
-    except RevisionIdWasChanged:
-         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Could not deactivate account due to a conflict. Please try again.",
-        )
+    # current_user 可能是缓存中的副本：只更新这两个字段，不用 save() 把整个 (可能已过期的) 文档写回，
+    # 否则会覆盖缓存之后的修改 (例如登录时按新成本重新计算的 hashed_password)
+    await current_user.set({User.is_active: False, User.updated_at: datetime.now(timezone.utc)})
+    await invalidate_cached_user(current_user.id) # 所有 worker 的缓存立即失效，停用后 token 不再可用
     
     # 返回更新后的用户信息 (现在 is_active 会是 false)
     return UserRead.model_validate(current_user)
@@ -138,41 +207,79 @@ async def deactivate_current_user(current_user: User = Depends(get_current_activ
 
 # 如果您确实需要硬删除功能 (永久删除用户及其数据 - 请谨慎使用)
 # 可以考虑添加一个不同的端点，例如 DELETE /users/me
-@router.delete("/users/me/delete", status_code=status.HTTP_204_NO_CONTENT)
+def _purge_job_read(job: UserPurgeJob) -> UserPurgeJobRead:
+    job_id_str = str(job.id)
+    return UserPurgeJobRead(
+        job_id=job_id_str,
+        status=job.status,
+        status_url=f"{settings.API_V1_STR}/auth/purge-jobs/{job.status_token}",
+        resumes_total=job.resumes_total,
+        resumes_deleted=job.resumes_deleted,
+        blobs_deleted=job.blobs_deleted,
+        error=job.error,
+        attempts=job.attempts,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        completed_at=job.completed_at,
+    )
+
+
+@router.delete("/users/me/delete", response_model=UserPurgeJobRead, status_code=status.HTTP_202_ACCEPTED)
 async def delete_current_user_permanently(current_user: User = Depends(get_current_active_user)):
     """
     永久删除当前已登录用户的账户及其关联数据 (硬删除).
     警告：此操作不可逆！
-    您还需要在这里处理与该用户关联的其他数据，例如删除他们的简历等。
+    账户立即删除；简历、原始文件和缩略图由后台清理任务分批删除，
+    返回 202 和任务信息，可通过 status_url 查询清理进度。
     """
     user_id_to_delete = current_user.id
-    await current_user.delete() # Beanie 的 delete 方法
+    # 先创建清理任务再删除账户：进程在两步之间中断时，任务会在重启后继续执行
+    # (清理前 worker 会确认账户已被删除，账户仍然存在时任务被取消)
+    purge_job = await create_purge_job(user_id_to_delete)
+    try:
+        await current_user.delete() # Beanie 的 delete 方法
+    except Exception:
+        await cancel_purge_job(purge_job.id, CANCELLED_USER_EXISTS)
+        raise
+    await invalidate_cached_user(user_id_to_delete)
+    await user_purge_worker.submit(purge_job.id)
 
-    # 此处添加删除用户关联数据（如简历）的逻辑
-    # from backend.models.resume import Resume
-    # await Resume.find(Resume.user_id == user_id_to_delete).delete()
+    return _purge_job_read(purge_job)
 
-    # 对于 DELETE 操作，通常返回 204 No Content，不需要响应体
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/purge-jobs/{status_token}", response_model=UserPurgeJobRead)
+async def get_purge_job_progress(status_token: str):
+    """
+    查询账户删除后的数据清理进度.
+    账户已被删除，因此不需要认证；任务按删除账户时返回的随机令牌 (status_url) 查询，
+    响应只包含计数，不包含用户信息。
+    """
+    purge_job = await UserPurgeJob.find_one(UserPurgeJob.status_token == status_token)
+    if purge_job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purge job not found.")
+    return _purge_job_read(purge_job)
 
 
 
 @router.post("/reactivate", response_model=Token) # 成功激活后返回新的token
-async def reactivate_user_account(reactivation_data: UserReactivationRequest):
+async def reactivate_user_account(reactivation_data: UserReactivationRequest, request: Request):
     """
     重新激活一个之前被停用的用户账户.
     需要提供用户的邮箱和密码.
     成功后会返回一个新的访问令牌 (access token).
     """
+    _admit_login_attempt(reactivation_data.email, request)
     user = await User.find_one(User.email == reactivation_data.email)
 
     if not user:
+        login_throttle.record_failure(reactivation_data.email)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, # 或 400 Bad Request，避免泄露用户是否存在
             detail="User with this email not found or incorrect password.", # 通用错误信息
         )
 
-    if not verify_password(reactivation_data.password, user.hashed_password):
+    if not await _verify_user_password(user, reactivation_data.password):
+        login_throttle.record_failure(reactivation_data.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, # 使用 400 而不是 401，因为这不是标准的 token 认证失败
             detail="User with this email not found or incorrect password.", # 通用错误信息
@@ -195,6 +302,8 @@ async def reactivate_user_account(reactivation_data: UserReactivationRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not reactivate account due to a conflict. Please try again.",
         )
+    await invalidate_cached_user(user.id) # 清除缓存中停用状态的用户
+    login_throttle.record_success(reactivation_data.email)
 
     # 重新激活成功，生成新的访问令牌让用户直接登录
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -2,12 +2,20 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from beanie import PydanticObjectId
+from beanie.operators import In
 
 from backend.models.user import User
-from backend.models.resume import Resume, ResumeRead # ResumeRead 用于返回简历基本信息
+from backend.models.resume import Resume, ResumeRead, ResumeMatchView # ResumeRead 用于返回简历基本信息
 from backend.core.security import get_current_active_user
 from backend.services.keyword_extractor import extract_keywords_from_jd
-from backend.services.matching_service import calculate_match_score
+from backend.services.matching_service import (
+    calculate_match_details, ensure_resume_embeddings, encode_texts_batched, normalize_jd_keywords
+)
+from backend.services.jd_embedding_cache import get_jd_keyword_embeddings
+from backend.services.inference_executor import run_inference
+from backend.services.jd_service import get_or_create_processed_jd, get_or_create_processed_jds
+from backend.config import settings
+import torch
 from backend.services.gemini_service import generate_suggestions_from_gemini # 导入 Gemini 服务
 from datetime import timedelta, timezone # 导入 timedelta 和 timezone
 from backend.models.processed_jd import ProcessedJD
@@ -28,6 +36,10 @@ class JDKeywordResponse(BaseModel): # 新的响应模型
 class JDInput(BaseModel):
     jd_text: str = Field(..., min_length=50, description="The full text of the Job Description.")
 
+class JDBatchInput(BaseModel):
+    jd_texts: List[str] = Field(..., min_length=1, description="The full texts of the Job Descriptions.")
+    batch_size: Optional[int] = Field(None, ge=1, le=256, description="nlp.pipe batch size (defaults to JD_BATCH_SIZE).")
+
 class MatchRequest(BaseModel):
     jd_text: Optional[str] = Field(None, min_length=50, description="The full text of the Job Description (if jd_id is not provided).")
     jd_id: Optional[PydanticObjectId] = Field(None, description="The ID of a previously processed Job Description.")
@@ -50,11 +62,18 @@ class MatchRequest(BaseModel):
             raise ValueError("Provide either jd_text or jd_id, not both")
         return self
 
+class KeywordMatch(BaseModel):
+    keyword: str
+    direct_match: bool
+    semantic_match: bool
+    similarity: Optional[float] = None # 仅在进行了语义匹配时有值
+
 class ResumeMatchResult(BaseModel):
     resume_id: str # PydanticObjectId 会被 FastAPI 序列化为 str
     resume_title: str
     original_file_name: Optional[str] = None
     match_score: float
+    keyword_matches: List[KeywordMatch] = [] # 每个JD关键词的直接/语义命中情况
     # 可以在这里添加更多从 ResumeRead 获取的字段
 
 class MatchResponse(BaseModel):
@@ -88,19 +107,31 @@ async def api_extract_jd_keywords(jd_input: JDInput):
     if not jd_input.jd_text.strip():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Job description text cannot be empty.")
 
-    keywords = extract_keywords_from_jd(jd_input.jd_text)
+    # 按规范化文本哈希去重：相同的 JD 直接返回已有的 jd_id 和关键词，并延长过期时间
+    processed_jd_doc = await get_or_create_processed_jd(jd_input.jd_text)
+    
+    return JDKeywordResponse(jd_id=str(processed_jd_doc.id), keywords=processed_jd_doc.keywords)
 
-    # 设置过期时间为从现在起24小时后
-    expiration_time = datetime.now(timezone.utc) + timedelta(hours=1) # 使用带时区的UTC时间
 
-    processed_jd_doc = ProcessedJD(
-        jd_text=jd_input.jd_text, 
-        keywords=keywords,
-        expire_at=expiration_time # <--- 设置过期时间
-    )
-    await processed_jd_doc.insert()
-    
-    return JDKeywordResponse(jd_id=str(processed_jd_doc.id), keywords=keywords)
+@router.post("/extract-jd-keywords/batch", response_model=List[JDKeywordResponse])
+async def api_extract_jd_keywords_batch(batch_input: JDBatchInput):
+    """一次提交多个 JD (例如抓取到的职位列表)，所有未处理过的 JD 通过一次 nlp.pipe 提取"""
+    if len(batch_input.jd_texts) > settings.JD_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.JD_BATCH_MAX_ITEMS} job descriptions can be submitted per request."
+        )
+    for index, jd_text in enumerate(batch_input.jd_texts):
+        if len(jd_text.strip()) < 50:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Job description #{index} must contain at least 50 characters."
+            )
+
+    batch_size = batch_input.batch_size or settings.JD_BATCH_SIZE
+    processed_jd_docs = await get_or_create_processed_jds(batch_input.jd_texts, batch_size)
+
+    return [JDKeywordResponse(jd_id=str(doc.id), keywords=doc.keywords) for doc in processed_jd_docs]
 
 
 @router.post("/match-resumes", response_model=MatchResponse)
@@ -114,6 +145,7 @@ async def api_match_resumes_with_jd(
     """
     final_jd_text = ""
     jd_keywords: List[str] = []
+    processed_jd_doc: Optional[ProcessedJD] = None
 
     if request_data.jd_id:
         processed_jd_doc = await ProcessedJD.get(request_data.jd_id)
@@ -125,7 +157,7 @@ async def api_match_resumes_with_jd(
         final_jd_text = request_data.jd_text
         if not final_jd_text.strip(): # 确保不为空
              raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Job description text cannot be empty.")
-        jd_keywords = extract_keywords_from_jd(final_jd_text)
+        jd_keywords = await run_inference(extract_keywords_from_jd, final_jd_text)
     else:
         # 这个情况应该被 Pydantic model_validator 捕获
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No JD input provided.")
@@ -137,19 +169,27 @@ async def api_match_resumes_with_jd(
         # 返回空的关键词列表和空的匹配结果，或者一个特定的提示
         return MatchResponse(job_description_keywords=[], match_results=[])
 
+    # JD 关键词嵌入对所有简历只计算一次：有 jd_id 时走缓存，否则本次请求内编码一次
+    if processed_jd_doc is not None:
+        keyword_embeddings = await get_jd_keyword_embeddings(processed_jd_doc)
+    else:
+        encoded_keywords = await encode_texts_batched(normalize_jd_keywords(jd_keywords))
+        keyword_embeddings = torch.from_numpy(encoded_keywords) if encoded_keywords is not None else None
+
     match_results: List[ResumeMatchResult] = []
 
-    for resume_id in request_data.resume_ids:
-        resume_doc = await Resume.get(resume_id)
+    # 一次 $in 查询取回当前用户的全部目标简历，投影掉原始文件和缩略图等二进制字段
+    resume_docs = await Resume.find(
+        In(Resume.id, request_data.resume_ids),
+        Resume.user_id == current_user.id
+    ).project(ResumeMatchView).to_list()
+    resume_docs_by_id = {resume_doc.id: resume_doc for resume_doc in resume_docs}
+
+    for resume_id in request_data.resume_ids: # 按请求中的顺序返回结果
+        resume_doc = resume_docs_by_id.get(resume_id)
         if not resume_doc:
-            # 如果某个简历ID无效，可以选择跳过，或抛出错误，或在结果中标记
-            # 这里我们选择跳过，并在结果中不包含它
-            print(f"Warning: Resume with ID {resume_id} not found.")
-            continue 
-        
-        if resume_doc.user_id != current_user.id:
-            # 如果简历不属于当前用户，也跳过
-            print(f"Warning: Resume {resume_id} does not belong to user {current_user.id}.")
+            # 简历不存在或不属于当前用户，跳过，并在结果中不包含它
+            print(f"Warning: Resume with ID {resume_id} not found for user {current_user.id}.")
             continue
 
         if not resume_doc.raw_text_content:
@@ -164,13 +204,20 @@ async def api_match_resumes_with_jd(
             continue
 
         # 2. 计算匹配度
-        score = calculate_match_score(resume_doc.raw_text_content, jd_keywords)
+        # 使用上传时预计算的句子嵌入；缺失或模型版本过期时惰性重算
+        resume_embeddings = await ensure_resume_embeddings(resume_doc)
+        score, keyword_details = await run_inference(
+            calculate_match_details,
+            resume_doc.raw_text_content, jd_keywords,
+            resume_embeddings=resume_embeddings, keyword_embeddings=keyword_embeddings
+        )
         
         match_results.append(ResumeMatchResult(
             resume_id=str(resume_doc.id),
             resume_title=resume_doc.title,
             original_file_name=resume_doc.original_file_name,
-            match_score=score
+            match_score=score,
+            keyword_matches=[KeywordMatch(**detail) for detail in keyword_details]
         ))
         
     return MatchResponse(job_description_keywords=jd_keywords, match_results=match_results)
@@ -213,7 +260,7 @@ async def get_resume_improvement_suggestions(
         final_jd_text = request_data.jd_text
         if not final_jd_text.strip():
              raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Job description text cannot be empty.")
-        retrieved_jd_keywords = extract_keywords_from_jd(final_jd_text) # 动态提取
+        retrieved_jd_keywords = await run_inference(extract_keywords_from_jd, final_jd_text) # 动态提取
     else:
         # 此情况应被 Pydantic model_validator 捕获
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No JD input (jd_id or jd_text) provided.")
@@ -2,29 +2,60 @@
 简历管理API
 """ 
 # backend/api/resume.py
-from typing import List, Optional
+import hashlib
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response, Query, Header
 from beanie import PydanticObjectId
+from pydantic import BaseModel
 
 from backend.models.user import User
-from backend.models.resume import Resume, ResumeCreate, ResumeRead # 确保 ResumeCreate 和 ResumeRead 已定义
+from backend.models.resume import Resume, ResumeCreate, ResumeRead, ResumeStatusView, ResumeThumbnailView, ThumbnailRef, RESUME_HEAVY_FIELDS, resume_view_model # 确保 ResumeCreate 和 ResumeRead 已定义
 from backend.core.security import get_current_active_user
-from backend.services.resume_parser import parse_resume_file, generate_pdf_thumbnail
+from backend.services.resume_parser import SUPPORTED_MIME_TYPES, THUMBNAIL_SIZES, DEFAULT_THUMBNAIL_SIZE
 from backend.config import settings # 导入 settings 用于构建 URL
 import io # 确保导入了 io
-from backend.services.resume_parser import parse_resume_file, generate_pdf_thumbnail, segment_text_into_sections # <--- 导入 segment_text_into_sections
+from backend.services.matching_service import embed_resume_text
+from backend.services.blob_store import blob_store
+from backend.services.upload_spool import SpooledUpload, UploadTooLargeError, spool_upload
+from backend.services.resume_import import entry_content_type, import_resume_archive, list_archive_entries
+from backend.services.resume_ingestion import (
+    resume_ingestion_pool, store_thumbnails, find_reusable_resume, reused_resume_fields, insert_reused_resume, delete_resume_blobs,
+    PROCESSING_PENDING
+)
 
 
 
 router = APIRouter()
 
-MAX_RESUMES_PER_USER = 5 # 定义最大简历数量常量
+MAX_RESUMES_PER_USER = settings.MAX_RESUMES_PER_USER # 最大简历数量 (可通过环境变量配置)
 
-@router.post("/upload", response_model=ResumeRead, status_code=status.HTTP_201_CREATED)
+class ResumeIngestionJob(BaseModel):
+    """异步上传模式的 202 响应；job_id 即简历 ID"""
+    job_id: str
+    resume_id: str
+    status: str
+    status_url: str
+
+class ResumeStatusResponse(BaseModel):
+    resume_id: str
+    status: str
+    error: Optional[str] = None
+    updated_at: datetime
+
+
+@router.post(
+    "/upload",
+    response_model=ResumeRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": ResumeIngestionJob}}
+)
 async def upload_resume(
     resume_file: UploadFile = File(..., description="The resume file (PDF or DOCX)"),
     title: Optional[str] = Form(None, description="Optional title for the resume. If not provided, filename will be used."),
+    processing_mode: Optional[str] = Query(None, pattern="^(sync|async)$", description="sync: parse before responding (201); async: store the file and parse in the background (202). Defaults to RESUME_INGESTION_MODE."),
     current_user: User = Depends(get_current_active_user)
 ):
     # ==> 新增：检查用户现有简历数量 <==
@@ -38,54 +69,125 @@ async def upload_resume(
 
     if not resume_file.filename:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No filename provided.")
+    if resume_file.content_type not in SUPPORTED_MIME_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {resume_file.content_type}. Supported types are PDF and DOCX."
+        )
 
-    file_content_bytes = await resume_file.read()
-    await resume_file.seek(0)
+    # 按块读取并暂存上传文件 (大文件写入临时文件)，超过上限时立即拒绝
+    try:
+        spooled = await spool_upload(resume_file, settings.MAX_UPLOAD_SIZE_BYTES, settings.UPLOAD_SPOOL_THRESHOLD_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
 
+    resume_title = title if title else resume_file.filename
+    with spooled:
+        return await _ingest_spooled_upload(spooled, resume_file, resume_title, processing_mode, current_user)
+
+
+async def _ingest_spooled_upload(
+    spooled: SpooledUpload,
+    resume_file: UploadFile,
+    resume_title: str,
+    processing_mode: Optional[str],
+    current_user: User
+):
+    async_mode = (processing_mode or settings.RESUME_INGESTION_MODE) == "async"
+
+    # 同一用户已上传过相同内容的文件：复用解析结果、缩略图、嵌入和文件 blob，只保存新的标题和文件名
+    reusable_resume = await find_reusable_resume(current_user.id, spooled.sha256)
+    if reusable_resume is not None:
+        new_resume = Resume(
+            title=resume_title,
+            original_file_name=resume_file.filename,
+            user_id=current_user.id,
+            content_hash=spooled.sha256,
+            **reused_resume_fields(reusable_resume)
+        )
+        if await insert_reused_resume(new_resume, reusable_resume):
+            print(f"[Resume API] Upload matches resume {reusable_resume.id}; reused its parsed content and blobs.")
+            return _upload_response(new_resume, async_mode)
+        print(f"[Resume API] Resume {reusable_resume.id} was deleted during the upload; processing the file from scratch.")
+
+    if async_mode:
+        # 只保存文件，解析、区段化、缩略图和嵌入由后台 worker 完成
+        with spooled.open() as file_stream:
+            file_blob_id = await blob_store.put(file_stream, resume_file.filename, resume_file.content_type)
+        new_resume = Resume(
+            title=resume_title,
+            original_file_name=resume_file.filename,
+            user_id=current_user.id,
+            file_blob_id=file_blob_id,
+            file_size=spooled.size,
+            file_media_type=resume_file.content_type,
+            content_hash=spooled.sha256,
+            processing_status=PROCESSING_PENDING,
+        )
+        try:
+            await new_resume.insert()
+        except Exception:
+            await blob_store.delete(file_blob_id)
+            raise
+        await resume_ingestion_pool.submit(new_resume.id)
+        return _upload_response(new_resume, async_mode)
+
+    # 文本提取、区段化和缩略图在解析线程池中完成，不阻塞事件循环
     try:
-        raw_text = await parse_resume_file(resume_file)
+        processed, parsed_sections_data = await resume_ingestion_pool.run_extraction(
+            spooled.source, resume_file.content_type, resume_file.filename
+        )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    
-    # ==> 新增：对原始文本进行区段化解析 <==
-    parsed_sections_data: Dict[str, str] = {} # 默认为空字典
-    if raw_text and raw_text.strip(): # 仅当有原始文本时才尝试区段化
-        try:
-            parsed_sections_data = segment_text_into_sections(raw_text)
-            # 您可以在这里打印日志，看看区段化的效果
-            print(f"[Upload Service] Resume segmented. Found sections: {list(parsed_sections_data.keys())}")
-        except Exception as e_segment:
-            # 即使区段化失败，我们仍然保存原始文本，不中断上传流程
-            print(f"Warning: Error segmenting resume text for {resume_file.filename}: {e_segment}")
-            # parsed_sections_data 将保持为空字典
+    raw_text = processed.raw_text
 
-    resume_title = title if title else resume_file.filename
-    
-    thumbnail_data = None
-    thumbnail_media_type = None
-    if resume_file.content_type == "application/pdf":
-        thumbnail_result = await generate_pdf_thumbnail(file_content_bytes)
-        if thumbnail_result:
-            thumbnail_data, thumbnail_media_type = thumbnail_result
+    # 预计算句子嵌入，匹配时直接加载，避免每次 /match-resumes 重新分句和编码
+    sentence_embeddings = await embed_resume_text(raw_text)
+
+    # 二进制内容写入 blob store，简历文档只保存引用
+    with spooled.open() as file_stream:
+        file_blob_id = await blob_store.put(file_stream, resume_file.filename, resume_file.content_type)
+    thumbnails = await store_thumbnails(processed, resume_file.filename)
 
     resume_doc_data = {
         "title": resume_title,
         "original_file_name": resume_file.filename,
         "user_id": current_user.id,
         "raw_text_content": raw_text,
+        "layout_text_content": processed.layout_text,
         "parsed_sections": parsed_sections_data,  # <--- 存储区段化后的内容
-        "file_content": file_content_bytes,
+        "file_blob_id": file_blob_id,
+        "file_size": spooled.size,
         "file_media_type": resume_file.content_type,
-        "thumbnail_content": thumbnail_data,
-        "thumbnail_media_type": thumbnail_media_type,
+        "content_hash": spooled.sha256,
+        "thumbnails": thumbnails,
+        "sentence_embeddings": sentence_embeddings,
     }
     
     new_resume = Resume(**resume_doc_data)
-    await new_resume.insert()
-    
+    try:
+        await new_resume.insert()
+    except Exception:
+        # 文档写入失败时清理已上传的 blob，避免产生孤立文件
+        for blob_id in [file_blob_id] + [ref.blob_id for ref in thumbnails.values()]:
+            await blob_store.delete(blob_id)
+        raise
+    return _upload_response(new_resume, async_mode)
+
+
+def _upload_response(new_resume: Resume, async_mode: bool):
+    """异步模式返回 202 和任务信息 (复用已有解析结果时状态直接为 completed)，同步模式返回 201 和简历内容"""
     resume_id_str = str(new_resume.id)
-    file_download_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/file" if new_resume.file_content else None
-    thumbnail_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/thumbnail" if new_resume.thumbnail_content else None
+    if async_mode:
+        job = ResumeIngestionJob(
+            job_id=resume_id_str,
+            resume_id=resume_id_str,
+            status=new_resume.processing_status,
+            status_url=f"{settings.API_V1_STR}/resumes/{resume_id_str}/status"
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job.model_dump())
+
+    file_download_url, thumbnail_url, thumbnail_urls = _resume_urls(resume_id_str, new_resume.file_blob_id, new_resume.thumbnails)
 
     resume_data_for_read_model = {
         "id": resume_id_str,
@@ -93,15 +195,79 @@ async def upload_resume(
         "title": new_resume.title,
         "original_file_name": new_resume.original_file_name,
         "raw_text_content": new_resume.raw_text_content,
+        "layout_text_content": new_resume.layout_text_content,
         "parsed_sections": new_resume.parsed_sections,
         "uploaded_at": new_resume.uploaded_at,
         "updated_at": new_resume.updated_at,
         "file_download_url": file_download_url,
-        "thumbnail_url": thumbnail_url
+        "thumbnail_url": thumbnail_url,
+        "thumbnail_urls": thumbnail_urls
     }
     return ResumeRead.model_validate(resume_data_for_read_model)
 
 
+@router.post("/import")
+async def import_resumes(
+    archive: UploadFile = File(..., description="A ZIP archive of PDF/DOCX resumes"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    从 ZIP 压缩包批量导入简历，以 NDJSON (application/x-ndjson) 流式返回结果：
+    每个条目处理完成后返回一行 {"type": "result", ...}，最后一行为 {"type": "summary", ...}。
+    简历数量限制由 RESUME_IMPORT_QUOTA_MODE 决定 (enforce / reject / off)。
+    """
+    try:
+        spooled = await spool_upload(archive, settings.RESUME_IMPORT_MAX_ARCHIVE_BYTES, settings.UPLOAD_SPOOL_THRESHOLD_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    archive_stream = spooled.open()
+    try:
+        zip_file = zipfile.ZipFile(archive_stream)
+    except zipfile.BadZipFile:
+        archive_stream.close()
+        spooled.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The uploaded file is not a valid ZIP archive.")
+
+    def close_archive() -> None:
+        zip_file.close()
+        archive_stream.close()
+        spooled.close()
+
+    try:
+        entries = list_archive_entries(zip_file)
+        if not entries:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The archive contains no files.")
+        if len(entries) > settings.RESUME_IMPORT_MAX_ENTRIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many files in archive. Maximum allowed is {settings.RESUME_IMPORT_MAX_ENTRIES}."
+            )
+
+        quota_remaining = None
+        if settings.RESUME_IMPORT_QUOTA_MODE != "off":
+            existing_resumes_count = await Resume.find(Resume.user_id == current_user.id).count()
+            quota_remaining = max(MAX_RESUMES_PER_USER - existing_resumes_count, 0)
+            importable_count = sum(1 for info in entries if entry_content_type(info.filename))
+            if settings.RESUME_IMPORT_QUOTA_MODE == "reject" and importable_count > quota_remaining:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"Upload limit reached. The archive contains {importable_count} resumes but only {quota_remaining} more can be uploaded (maximum {MAX_RESUMES_PER_USER})."
+                )
+    except Exception:
+        close_archive()
+        raise
+
+    async def ndjson_lines():
+        try:
+            async for item in import_resume_archive(zip_file, entries, current_user.id, quota_remaining):
+                yield item.model_dump_json() + "\n"
+        finally:
+            close_archive()
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 # ... (list_user_resumes, get_resume, delete_resume 端点) ...
 # 您可能也需要在 get_resume 和 list_user_resumes 中进行类似的显式转换
 # 例如，在 list_user_resumes 中:
@@ -116,36 +282,79 @@ async def upload_resume(
 # return validated_resumes
 
 
-@router.get("/", response_model=List[ResumeRead])
-async def list_user_resumes(current_user: User = Depends(get_current_active_user)):
-    resumes_from_db = await Resume.find(Resume.user_id == current_user.id).to_list()
+def _parse_fields_param(fields: Optional[str]) -> frozenset:
+    """解析 fields= 参数 (逗号分隔)，只允许可选的大字段"""
+    if not fields:
+        return frozenset()
+    requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = requested - set(RESUME_HEAVY_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(RESUME_HEAVY_FIELDS))}."
+        )
+    return requested
 
-    response_resumes = []
-    for resume_doc in resumes_from_db:
-        resume_id_str = str(resume_doc.id)
-        file_download_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/file" if resume_doc.file_content else None
-        thumbnail_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/thumbnail" if resume_doc.thumbnail_content else None # <--- 构建缩略图URL
 
+def _resume_urls(resume_id_str: str, file_blob_id: Optional[str], thumbnails: Dict[str, ThumbnailRef]):
+    """返回 (文件下载 URL, 默认尺寸缩略图 URL, 各尺寸缩略图 URL)"""
+    file_download_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/file" if file_blob_id else None
+    thumbnail_base_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/thumbnail"
+    thumbnail_urls = {size_name: f"{thumbnail_base_url}?size={size_name}" for size_name in thumbnails}
+    thumbnail_url = thumbnail_base_url if DEFAULT_THUMBNAIL_SIZE in thumbnails else None
+    return file_download_url, thumbnail_url, thumbnail_urls
 
-        data_for_read = {
-            "id": resume_id_str,
-            "user_id": str(resume_doc.user_id),
-            "title": resume_doc.title,
-            "original_file_name": resume_doc.original_file_name,
-            "raw_text_content": resume_doc.raw_text_content,
-            "parsed_sections": resume_doc.parsed_sections,
-            "uploaded_at": resume_doc.uploaded_at,
-            "updated_at": resume_doc.updated_at,
-            "file_download_url": file_download_url, # 添加下载链接
-            "thumbnail_url": thumbnail_url # <--- 添加缩略图 URL
 
-        }
-        response_resumes.append(ResumeRead.model_validate(data_for_read))
-    return response_resumes
+def _build_resume_read(resume_view) -> ResumeRead:
+    """把 (投影后的) 简历转换为 API 响应；未选择的大字段为 None"""
+    resume_id_str = str(resume_view.id)
+    file_download_url, thumbnail_url, thumbnail_urls = _resume_urls(resume_id_str, resume_view.file_blob_id, resume_view.thumbnails)
+
+    data_for_read = {
+        "id": resume_id_str,
+        "user_id": str(resume_view.user_id),
+        "title": resume_view.title,
+        "original_file_name": resume_view.original_file_name,
+        "raw_text_content": getattr(resume_view, "raw_text_content", None),
+        "layout_text_content": getattr(resume_view, "layout_text_content", None),
+        "parsed_sections": getattr(resume_view, "parsed_sections", None),
+        "uploaded_at": resume_view.uploaded_at,
+        "updated_at": resume_view.updated_at,
+        "file_download_url": file_download_url, # 添加下载链接
+        "thumbnail_url": thumbnail_url, # <--- 添加缩略图 URL
+        "thumbnail_urls": thumbnail_urls,
+        "processing_status": resume_view.processing_status,
+    }
+    return ResumeRead.model_validate(data_for_read)
 
 
-from fastapi.responses import StreamingResponse # 用于返回文件流
-import io # 用于将 bytes 转换为类文件对象
+@router.get("/", response_model=List[ResumeRead])
+async def list_user_resumes(
+    response: Response,
+    limit: int = Query(settings.RESUME_LIST_DEFAULT_LIMIT, ge=1, le=settings.RESUME_LIST_MAX_LIMIT),
+    after: Optional[PydanticObjectId] = Query(None, description="Cursor: return resumes after this resume ID."),
+    fields: Optional[str] = Query(None, description="Comma-separated heavy fields to include: raw_text_content,layout_text_content,parsed_sections"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    按上传顺序 (_id) 分页返回当前用户的简历，默认只包含摘要字段。
+    还有下一页时，下一页的游标通过 X-Next-Cursor 响应头返回。
+    """
+    view_model = resume_view_model(_parse_fields_param(fields))
+    query = Resume.find(Resume.user_id == current_user.id)
+    if after is not None:
+        query = query.find(Resume.id > after)
+    # 多取一条用于判断是否还有下一页
+    resume_views = await query.sort(+Resume.id).limit(limit + 1).project(view_model).to_list()
+
+    if len(resume_views) > limit:
+        resume_views = resume_views[:limit]
+        response.headers["X-Next-Cursor"] = str(resume_views[-1].id)
+
+    return [_build_resume_read(resume_view) for resume_view in resume_views]
+
+
+from fastapi.responses import StreamingResponse, JSONResponse # 用于返回文件流
 
 # ... (upload_resume, list_user_resumes 等) ...
 
@@ -165,56 +374,63 @@ async def download_resume_file(
     if resume.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this file.")
 
-    if not resume.file_content or not resume.file_media_type:
+    file_stream = await blob_store.open_stream(resume.file_blob_id) if resume.file_blob_id else None
+    if file_stream is None or not resume.file_media_type:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File content not available for this resume.")
 
-    # 使用 StreamingResponse 返回文件内容
-    file_like_object = io.BytesIO(resume.file_content) # 将 bytes 转换为类文件对象
-    
     # 设置 Content-Disposition header 建议浏览器下载并使用原始文件名
     headers = {
-        'Content-Disposition': f'attachment; filename="{resume.original_file_name}"'
+        'Content-Disposition': f'attachment; filename="{resume.original_file_name}"',
+        'Content-Length': str(file_stream.length),
     }
     # 如果希望浏览器内联显示（如PDF），可以使用 'inline' 而不是 'attachment'
     # headers = {
     #     'Content-Disposition': f'inline; filename="{resume.original_file_name}"'
     # }
     
-    return StreamingResponse(file_like_object, media_type=resume.file_media_type, headers=headers)
+    # 逐块从 GridFS 读取并发送，不在内存中拼出整个文件
+    return StreamingResponse(file_stream, media_type=resume.file_media_type, headers=headers)
 
 # 确保这个新的端点注册在 GET /{resume_id} 之前，如果路径可能冲突的话。
 # 或者，更清晰的路径是像这样 GET /resumes/{resume_id}/download
 # 我上面的 upload_resume 返回的链接是 /file，所以这里也用 /file
 
+@router.get("/{resume_id}/status", response_model=ResumeStatusResponse)
+async def get_resume_processing_status(
+    resume_id: PydanticObjectId,
+    current_user: User = Depends(get_current_active_user)
+):
+    """查询简历的后台解析状态 (pending / processing / completed / failed)"""
+    status_view = await Resume.find_one(Resume.id == resume_id).project(ResumeStatusView)
+    if not status_view:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
+    if status_view.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this resume.")
+
+    return ResumeStatusResponse(
+        resume_id=str(status_view.id),
+        status=status_view.processing_status,
+        error=status_view.processing_error,
+        updated_at=status_view.updated_at
+    )
+
+
 @router.get("/{resume_id}", response_model=ResumeRead)
 async def get_resume(
     resume_id: PydanticObjectId,
+    fields: Optional[str] = Query(None, description="Comma-separated heavy fields to include (default: all)."),
     current_user: User = Depends(get_current_active_user)
 ):
-    resume_doc = await Resume.get(resume_id)
-    if not resume_doc:
+    # 详情接口默认仍返回全部大字段；传入 fields= (可以为空) 时只加载所选字段
+    heavy_fields = frozenset(RESUME_HEAVY_FIELDS) if fields is None else _parse_fields_param(fields)
+    resume_view = await Resume.find_one(Resume.id == resume_id).project(resume_view_model(heavy_fields))
+    if not resume_view:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found.")
 
-    if resume_doc.user_id != current_user.id:
+    if resume_view.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this resume.")
 
-    resume_id_str = str(resume_doc.id)
-    file_download_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/file" if resume_doc.file_content else None
-    thumbnail_url = f"{settings.API_V1_STR}/resumes/{resume_id_str}/thumbnail" if resume_doc.thumbnail_content else None # <--- 构建缩略图URL
-    
-    data_for_read = {
-        "id": resume_id_str,
-        "user_id": str(resume_doc.user_id),
-        "title": resume_doc.title,
-        "original_file_name": resume_doc.original_file_name,
-        "raw_text_content": resume_doc.raw_text_content,
-        "parsed_sections": resume_doc.parsed_sections,
-        "uploaded_at": resume_doc.uploaded_at,
-        "updated_at": resume_doc.updated_at,
-        "file_download_url": file_download_url, # 添加下载链接
-        "thumbnail_url": thumbnail_url # <--- 添加缩略图 URL
-    }
-    return ResumeRead.model_validate(data_for_read)
+    return _build_resume_read(resume_view)
 
 
 
@@ -237,25 +453,61 @@ async def delete_resume(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this resume.")
 
     await resume.delete()
+    await delete_resume_blobs(resume)
     return Response(status_code=status.HTTP_204_NO_CONTENT) # 返回一个没有内容的204响应
 
 
+def _thumbnail_etag(thumbnail: ThumbnailRef, updated_at: datetime) -> str:
+    """强 ETag：由缩略图内容哈希和简历的 updated_at 共同决定"""
+    digest = hashlib.sha256(f"{thumbnail.content_hash}:{updated_at.isoformat()}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
 @router.get("/{resume_id}/thumbnail")
 async def get_resume_thumbnail(
     resume_id: PydanticObjectId,
+    size: str = Query(DEFAULT_THUMBNAIL_SIZE, description=f"Thumbnail size: {', '.join(THUMBNAIL_SIZES)}"),
+    if_none_match: Optional[str] = Header(None),
     # current_user: User = Depends(get_current_active_user) # 可选：如果缩略图也需要认证
 ):
     """
     获取指定ID简历的缩略图.
     这里我们暂时不加用户认证，因为缩略图URL可能是公开的。
     如果需要保护，取消 current_user 的注释并添加用户ID校验。
+    响应带有 ETag 和 Cache-Control；If-None-Match 命中时只查询一次小投影即返回 304，不读取图片。
     """
-    resume = await Resume.get(resume_id)
-    if not resume or not resume.thumbnail_content or not resume.thumbnail_media_type:
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown thumbnail size: {size}. Allowed: {', '.join(THUMBNAIL_SIZES)}."
+        )
+
+    resume_view = await Resume.find_one(Resume.id == resume_id).project(ResumeThumbnailView)
+    thumbnail = resume_view.thumbnails.get(size) if resume_view else None
+    if thumbnail is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thumbnail not found for this resume.")
 
-    # (可选) 用户权限校验，如果缩略图需要保护
-    # if resume.user_id != current_user.id:
-    #     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this thumbnail.")
+    etag = _thumbnail_etag(thumbnail, resume_view.updated_at)
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.THUMBNAIL_CACHE_MAX_AGE_SECONDS}",
+    }
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    thumbnail_stream = await blob_store.open_stream(thumbnail.blob_id)
+    if thumbnail_stream is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thumbnail not found for this resume.")
 
-    return StreamingResponse(io.BytesIO(resume.thumbnail_content), media_type=resume.thumbnail_media_type)
\ No newline at end of file
+    return StreamingResponse(
+        thumbnail_stream,
+        media_type=thumbnail.media_type,
+        headers={**cache_headers, "Content-Length": str(thumbnail_stream.length)}
+    )
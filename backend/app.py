@@ -7,12 +7,31 @@ from backend.utils.db import connect_to_mongo, close_mongo_connection, initializ
 from backend.api import auth as auth_router
 from backend.api import resume as resume_router
 from backend.api import matching as matching_router
+from backend.services.inference_executor import inference_executor
+from backend.services.matching_service import sbert_encode_batcher
+from backend.services.resume_ingestion import resume_ingestion_pool
+from backend.services.resume_import import resume_import_pool
+from backend.services.user_purge import user_purge_worker
+from backend.core.upload_limit import UploadSizeLimitMiddleware, MULTIPART_OVERHEAD_BYTES
+from backend.core.user_cache import user_cache, user_cache_invalidations
+from backend.core.security import password_hash_executor
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
     await initialize_database()
+    await sbert_encode_batcher.start()
+    await resume_ingestion_pool.start()
+    await user_cache_invalidations.start()
+    await user_purge_worker.start()
     yield
+    await user_purge_worker.stop()
+    await user_cache_invalidations.stop()
+    await resume_ingestion_pool.stop()
+    resume_import_pool.shutdown()
+    await sbert_encode_batcher.stop()
+    inference_executor.shutdown()
+    password_hash_executor.shutdown()
     await close_mongo_connection()
 
 app = FastAPI(
@@ -21,6 +40,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# 上传接口的请求体大小限制：超过上限的文件在读完之前就会被拒绝 (413)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/resumes/upload": settings.MAX_UPLOAD_SIZE_BYTES + MULTIPART_OVERHEAD_BYTES,
+        f"{settings.API_V1_STR}/resumes/import": settings.RESUME_IMPORT_MAX_ARCHIVE_BYTES + MULTIPART_OVERHEAD_BYTES,
+    },
+)
+
 # 根路由和 ping-db 路由 (保持不变)
 @app.get("/", tags=["Root"])
 async def read_root():
@@ -36,6 +64,17 @@ async def ping_database():
         print(f"Database ping error: {e}")
         raise HTTPException(status_code=500, detail=f"Database connection error: {str(e)}")
 
+@app.get("/inference-metrics", tags=["Monitoring"])
+async def get_inference_metrics():
+    """NLP 推理线程池的排队深度和等待时间、SBERT 动态批处理统计、密码哈希线程池和用户缓存统计 (当前 worker 进程)"""
+    metrics = inference_executor.metrics()
+    metrics["encode_batches_run"] = sbert_encode_batcher.batches_run
+    metrics["encode_texts_encoded"] = sbert_encode_batcher.texts_encoded
+    metrics["password_hash"] = password_hash_executor.metrics()
+    metrics["user_cache_hits"] = user_cache.hits
+    metrics["user_cache_misses"] = user_cache.misses
+    return metrics
+
 # 注册认证路由
 app.include_router(auth_router.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
 # 注册简历路由
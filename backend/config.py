@@ -37,15 +37,88 @@ class Settings(BaseSettings):
     # MongoDB Settings - 这些将从 .env 文件加载
     MONGO_CONNECTION_STRING: str
     MONGO_DATABASE_NAME: str # 之前这里可能有默认值，现在我们让它从.env加载
+    MONGO_INDEX_AUDIT_ON_STARTUP: bool = True # 启动时 explain() 热点查询，使用全集合扫描 (COLLSCAN) 时打印警告
 
     # JWT Token settings
     JWT_SECRET_KEY: str # 将从 .env 文件加载
     JWT_ALGORITHM: str = "HS256" # 可以保留默认值，除非 .env 中有定义
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080 # 可以保留默认值，除非 .env 中有定义
+    # GET /auth/users 的默认/最大分页大小，以及 /auth/users/export 每批读取的用户数
+    USER_LIST_DEFAULT_LIMIT: int = 50
+    USER_LIST_MAX_LIMIT: int = 200
+    USER_EXPORT_BATCH_SIZE: int = 500
+    # 删除账户后的后台清理：每批删除的简历数、批次之间的间隔 (限制对数据库的压力)、任务租约时长
+    USER_PURGE_BATCH_SIZE: int = 100
+    USER_PURGE_BATCH_DELAY_SECONDS: float = 0.2
+    USER_PURGE_LEASE_SECONDS: int = 60
+    # 失败的清理任务最多尝试的次数，以及第一次重试前的等待时间 (之后每次失败翻倍)
+    USER_PURGE_MAX_ATTEMPTS: int = 5
+    USER_PURGE_RETRY_DELAY_SECONDS: int = 60
+    # bcrypt 计算成本 (修改后，用户下次登录时密码哈希会按新成本重新计算) 和专用哈希线程池
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32 # 排队等待哈希的请求超过此数时，登录请求直接返回 503
+    # 登录限流 (每个 worker 进程)：每个账户的连续失败次数、每个 IP 的尝试次数
+    LOGIN_MAX_FAILURES_PER_ACCOUNT: int = 5
+    LOGIN_ACCOUNT_WINDOW_SECONDS: int = 300
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 30
+    LOGIN_IP_WINDOW_SECONDS: int = 60
+    # 已认证用户的进程内缓存 (TTL 为 0 时禁用)；停用/激活/删除账户的失效事件通过 capped collection 通知所有 worker
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_INVALIDATION_COLLECTION: str = "user_cache_invalidations"
+    USER_CACHE_INVALIDATION_COLLECTION_BYTES: int = 1024 * 1024
 
     # Gemini API Key
     GEMINI_API_KEY: str # <--- 新增
 
+    # spaCy 关键词提取设置
+    SPACY_MODEL_NAME: str = "en_core_web_md"
+    # 提取档位: fast (不加载 parser/ner) | standard (不加载 parser) | full (完整管线，原有行为)
+    KEYWORD_EXTRACTION_PROFILE: str = "full"
+    # 批量 JD 提取 (/matching/extract-jd-keywords/batch) 的 nlp.pipe 参数
+    JD_BATCH_MAX_ITEMS: int = 50
+    JD_BATCH_SIZE: int = 16
+    # 进程内编译好的关键词自动机 LRU 缓存的最大条目数 (每个不同的 JD 关键词列表一个)
+    KEYWORD_AUTOMATON_CACHE_SIZE: int = 256
+
+    # Sentence Transformer 模型设置
+    SBERT_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    # 更换模型或其权重时递增此版本号，已存储的嵌入向量会在下次使用时惰性重算
+    SBERT_MODEL_VERSION: str = "1"
+    # 进程内 JD 关键词嵌入 LRU 缓存的最大条目数
+    JD_EMBEDDING_CACHE_SIZE: int = 256
+    # spaCy/SBERT 推理线程池大小 (每个 gunicorn worker 一个线程池)
+    INFERENCE_EXECUTOR_WORKERS: int = 2
+    # SBERT 动态微批处理：最多等待的毫秒数 / 单批最多文本条数
+    ENCODE_BATCH_MAX_WAIT_MS: float = 5.0
+    ENCODE_BATCH_MAX_SIZE: int = 128
+
+    # 简历原始文件和缩略图存放的 GridFS bucket
+    RESUME_BLOB_BUCKET: str = "resume_blobs"
+    # GET /resumes/ 的默认/最大分页大小
+    RESUME_LIST_DEFAULT_LIMIT: int = 20
+    RESUME_LIST_MAX_LIMIT: int = 100
+    # 简历解析模式：sync (上传时解析，返回 201) | async (先保存文件，返回 202，后台解析)
+    RESUME_INGESTION_MODE: str = "sync"
+    RESUME_INGESTION_WORKERS: int = 2 # 后台解析的并发上限 (每个 gunicorn worker)
+    RESUME_INGESTION_QUEUE_SIZE: int = 100 # 待处理队列上限，队列满时上传请求会等待
+    RESUME_PRECOMPUTE_EMBEDDINGS: bool = True # 解析完成后是否预计算句子嵌入
+    RESUME_INGESTION_STALE_SECONDS: int = 900 # processing 状态超过此时长未更新时视为处理中断，可被其他 worker 重新认领
+    # 上传文件大小上限 (字节)，在接收请求体时即强制执行；超过暂存阈值的文件写入临时文件而不是保存在内存中
+    MAX_UPLOAD_SIZE_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_SPOOL_THRESHOLD_BYTES: int = 1024 * 1024
+    # 每个用户最多保存的简历数量
+    MAX_RESUMES_PER_USER: int = 5
+    # ZIP 批量导入 (POST /resumes/import)：压缩包大小和条目数上限 (单个条目的大小上限同 MAX_UPLOAD_SIZE_BYTES)
+    RESUME_IMPORT_MAX_ARCHIVE_BYTES: int = 200 * 1024 * 1024
+    RESUME_IMPORT_MAX_ENTRIES: int = 500
+    RESUME_IMPORT_WORKERS: int = 2 # 解析子进程数 (每个 gunicorn worker)
+    # 批量导入的简历数量限制：enforce (超过 MAX_RESUMES_PER_USER 的条目跳过) | reject (会超过时拒绝整个压缩包) | off (不限制)
+    RESUME_IMPORT_QUOTA_MODE: str = "enforce"
+    # 缩略图响应的 Cache-Control max-age (秒)；过期后浏览器通过 ETag 重新验证
+    THUMBNAIL_CACHE_MAX_AGE_SECONDS: int = 86400
+
 
     # Pydantic V2 使用 model_config 来配置 .env 文件加载等行为，
     # 但我们在这里使用了 python-dotenv 的显式 load_dotenv()，
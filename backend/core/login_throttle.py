@@ -0,0 +1,88 @@
+# backend/core/login_throttle.py
+"""
+登录尝试的准入控制
+每次校验密码都要在哈希线程池中跑一次 bcrypt，撞库式的大量登录请求会占满线程池，拖慢正常用户的登录。
+这里按 IP 限制单位时间内的登录尝试次数，按账户限制连续失败次数 (登录成功后清零)，
+超过限制的请求在校验密码之前就返回 429。
+计数保存在当前 worker 进程中，多个 gunicorn worker 之间不共享。
+"""
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from backend.config import settings
+
+
+class SlidingWindowLimiter:
+    """每个 key 在 window_seconds 内最多 max_attempts 次"""
+
+    def __init__(self, max_attempts: int, window_seconds: float, max_keys: int = 100_000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._attempts: Dict[str, Deque[float]] = {}
+
+    def _prune(self, key: str, now: float) -> Optional[Deque[float]]:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return None
+        while attempts and attempts[0] <= now - self.window_seconds:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+            return None
+        return attempts
+
+    def retry_after(self, key: str) -> float:
+        """还需等待的秒数；0 表示允许"""
+        now = time.monotonic()
+        attempts = self._prune(key, now)
+        if attempts is None or len(attempts) < self.max_attempts:
+            return 0.0
+        return attempts[0] + self.window_seconds - now
+
+    def record(self, key: str) -> None:
+        now = time.monotonic()
+        if key not in self._attempts and len(self._attempts) >= self.max_keys:
+            # 清理已过期的 key，避免大量不同来源的请求让字典无限增长
+            for stale_key in list(self._attempts):
+                self._prune(stale_key, now)
+            if len(self._attempts) >= self.max_keys:
+                return
+        self._attempts.setdefault(key, deque()).append(now)
+
+    def reset(self, key: str) -> None:
+        self._attempts.pop(key, None)
+
+
+class LoginThrottle:
+    def __init__(self, account_limiter: SlidingWindowLimiter, ip_limiter: SlidingWindowLimiter):
+        self.account_limiter = account_limiter
+        self.ip_limiter = ip_limiter
+
+    @staticmethod
+    def _account_key(account: str) -> str:
+        return account.strip().lower()
+
+    def admit(self, account: str, ip: Optional[str]) -> float:
+        """登录尝试前调用：允许时记录这次尝试 (按 IP) 并返回 0，否则返回需要等待的秒数"""
+        retry_after = self.account_limiter.retry_after(self._account_key(account))
+        if ip:
+            retry_after = max(retry_after, self.ip_limiter.retry_after(ip))
+        if retry_after > 0:
+            return retry_after
+        if ip:
+            self.ip_limiter.record(ip)
+        return 0.0
+
+    def record_failure(self, account: str) -> None:
+        self.account_limiter.record(self._account_key(account))
+
+    def record_success(self, account: str) -> None:
+        self.account_limiter.reset(self._account_key(account))
+
+
+login_throttle = LoginThrottle(
+    SlidingWindowLimiter(settings.LOGIN_MAX_FAILURES_PER_ACCOUNT, settings.LOGIN_ACCOUNT_WINDOW_SECONDS),
+    SlidingWindowLimiter(settings.LOGIN_MAX_ATTEMPTS_PER_IP, settings.LOGIN_IP_WINDOW_SECONDS),
+)
@@ -1,6 +1,6 @@
 # backend/core/security.py
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 
 from jose import JWTError, jwt
 
@@ -11,11 +11,24 @@ from fastapi.security import OAuth2PasswordBearer
 from backend.config import settings
 from backend.models.user import User as UserModel # Beanie User model for DB query
 from backend.models.user import UserRead # Pydantic model for returning user data
+from backend.core.user_cache import user_cache
+from backend.services.inference_executor import InferenceExecutor
 from pydantic import ValidationError
 
 
 # Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds 与 BCRYPT_ROUNDS 相同：成本不同的已有哈希会被 needs_update 识别，登录时重新计算
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt 每次需要 100-300 ms CPU，在专用的有界线程池中执行 (bcrypt 计算时释放 GIL)，不阻塞事件循环，
+# 也不与 NLP 推理争抢线程
+password_hash_executor = InferenceExecutor(settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 # OAuth2 Scheme
 # tokenUrl 应该是您登录接口的完整相对路径
@@ -29,6 +42,17 @@ def get_password_hash(password: str) -> str:
     """生成密码的哈希值"""
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    """在哈希线程池中生成密码哈希"""
+    return await password_hash_executor.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    在哈希线程池中验证密码。返回 (是否匹配, 新哈希)：
+    已有哈希的成本与当前 BCRYPT_ROUNDS 不同时，新哈希为按当前配置重新计算的结果，否则为 None。
+    """
+    return await password_hash_executor.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建JWT访问令牌"""
     to_encode = data.copy()
@@ -42,7 +66,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserModel:
     """
-    解码JWT令牌，验证用户并从数据库获取用户信息。
+    解码JWT令牌，验证用户并获取用户信息 (优先使用进程内缓存，未命中时查询数据库)。
     返回 Beanie User Document 模型实例。
     """
     credentials_exception = HTTPException(
@@ -58,9 +82,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserModel:
     except JWTError:
         raise credentials_exception
     
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
     user = await UserModel.get(user_id) # Beanie 的 get 方法使用 PydanticObjectId
     if user is None:
         raise credentials_exception
+    user_cache.put(user)
     return user
 
 async def get_current_active_user(current_user: UserModel = Depends(get_current_user)) -> UserModel:
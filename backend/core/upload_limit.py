@@ -0,0 +1,81 @@
+# backend/core/upload_limit.py
+"""
+请求体大小限制 (ASGI 中间件)
+Content-Length 超过上限时直接返回 413，不读取请求体；
+没有 Content-Length (chunked) 或声明不实时，在接收请求体的过程中累计字节数，超过上限立即中止并返回 413。
+"""
+import json
+from typing import Dict, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024 # multipart 边界和表单字段的额外开销
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        """limits: 路径前缀 -> 请求体最大字节数，按最长前缀匹配"""
+        self.app = app
+        self._limits: Tuple[Tuple[str, int], ...] = tuple(sorted(limits.items(), key=lambda item: len(item[0]), reverse=True))
+
+    def _limit_for(self, path: str):
+        for prefix, limit in self._limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+        limit = self._limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await _send_too_large(send, limit)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            # 超过上限时在这里直接返回 413，并让应用看到客户端断开：
+            # 如果抛出异常，FastAPI 解析表单时会把它包装成 400 "There was an error parsing the body"
+            nonlocal received, response_started, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    if not response_started:
+                        response_started = True
+                        await _send_too_large(send, limit)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if rejected:
+                return # 已经返回 413，丢弃应用因读取请求体失败而产生的响应
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, tracking_send)
+
+
+async def _send_too_large(send: Send, limit: int) -> None:
+    body = json.dumps({"detail": f"Request body too large. Maximum allowed size is {limit} bytes."}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,155 @@
+# backend/core/user_cache.py
+"""
+已认证用户的进程内缓存
+get_current_user 每次请求都要按 JWT 中的用户 ID 查询 users 集合 (主要为了检查 is_active)，
+这里用一个短 TTL 的 LRU 缓存保存最近的用户文档，命中时不访问数据库。
+
+停用、重新激活和删除账户时需要让所有 gunicorn worker 的缓存失效：
+失效事件写入一个 capped collection，每个 worker 用 tailable cursor 跟踪该集合并删除对应的缓存条目。
+事件丢失 (例如跟踪中断) 时清空整个缓存；TTL 是最终的兜底，缓存的数据最多陈旧 USER_CACHE_TTL_SECONDS 秒。
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from backend.config import settings
+from backend.models.user import User as UserModel
+
+
+class UserCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, UserModel]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, user_id: str) -> Optional[UserModel]:
+        """返回缓存用户的副本 (请求处理中修改字段不会影响缓存)；未命中或已过期时返回 None"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1].model_copy()
+
+    def put(self, user: UserModel) -> None:
+        if not self.enabled:
+            return
+        user_id = str(user.id)
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user.model_copy())
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class UserCacheInvalidationListener:
+    """通过 capped collection 在 worker 进程之间广播缓存失效事件"""
+
+    def __init__(
+        self,
+        cache: UserCache,
+        database_getter: Callable[[], AsyncIOMotorDatabase],
+        collection_name: str,
+        collection_size_bytes: int,
+    ):
+        self.cache = cache
+        self._database_getter = database_getter
+        self.collection_name = collection_name
+        self.collection_size_bytes = collection_size_bytes
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def _collection(self) -> AsyncIOMotorCollection:
+        return self._database_getter()[self.collection_name]
+
+    async def start(self) -> None:
+        if self.running or not self.cache.enabled:
+            return
+        database = self._database_getter()
+        try:
+            await database.create_collection(self.collection_name, capped=True, size=self.collection_size_bytes)
+            # tailable cursor 在空集合上会立即失效，先写入一条占位事件
+            await database[self.collection_name].insert_one({"user_id": None, "created_at": datetime.now(timezone.utc)})
+        except CollectionInvalid:
+            pass # 集合已存在 (其他 worker 已创建)
+        self._task = asyncio.create_task(self._tail())
+        print(f"[User Cache] Listening for invalidations on '{self.collection_name}'.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def publish(self, user_id) -> None:
+        """使本进程的缓存条目立即失效，并通知其他 worker"""
+        self.cache.invalidate(str(user_id))
+        if not self.running:
+            # 没有启动跟踪 (例如测试或脚本中) 时不写入事件，避免把 capped collection 创建成普通集合
+            return
+        try:
+            await self._collection().insert_one({"user_id": str(user_id), "created_at": datetime.now(timezone.utc)})
+        except PyMongoError as e:
+            print(f"[User Cache] Could not publish invalidation for user {user_id}: {e}")
+
+    async def _tail(self) -> None:
+        collection = self._collection()
+        latest = await collection.find_one(sort=[("$natural", -1)])
+        last_id = latest["_id"] if latest else None
+        while True:
+            try:
+                query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+                cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for event in cursor:
+                        last_id = event["_id"]
+                        if event.get("user_id"):
+                            self.cache.invalidate(event["user_id"])
+                    await asyncio.sleep(0.1) # 本批为空，cursor 仍然有效，稍后继续等待新事件
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                print(f"[User Cache] Invalidation cursor error: {e}")
+            # cursor 失效期间可能漏掉事件，清空缓存后重新开始跟踪
+            self.cache.clear()
+            await asyncio.sleep(1)
+
+
+def _users_database() -> AsyncIOMotorDatabase:
+    return UserModel.get_motor_collection().database
+
+
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_ENTRIES)
+user_cache_invalidations = UserCacheInvalidationListener(
+    user_cache,
+    _users_database,
+    settings.USER_CACHE_INVALIDATION_COLLECTION,
+    settings.USER_CACHE_INVALIDATION_COLLECTION_BYTES,
+)
+
+
+async def invalidate_cached_user(user_id) -> None:
+    await user_cache_invalidations.publish(user_id)
@@ -7,11 +7,22 @@ from pymongo import IndexModel # 明确导入 IndexModel
 from pydantic import BaseModel, EmailStr, Field # Correct
 
 
+class KeywordEmbeddings(BaseModel):
+    """JD 关键词嵌入，行顺序与 keywords 一致，向量以 float16 字节紧凑存储"""
+    model_name: str
+    model_version: str
+    dim: int
+    keywords: List[str]
+    vectors: bytes # float16，行优先，形状为 (len(keywords), dim)
+
+
 class ProcessedJD(Document):
     jd_text: str
     keywords: List[str]
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     expire_at: Optional[datetime] = None
+    keyword_embeddings: Optional[KeywordEmbeddings] = None # 首次匹配时计算并持久化
+    content_hash: Optional[str] = None # 规范化 JD 文本的 SHA-256，用于去重
 
     class Settings:
         name = "processed_jds"
@@ -23,6 +34,13 @@ class ProcessedJD(Document):
                 keys=[("expire_at", pymongo.ASCENDING)], 
                 name="expire_at_ttl_index", # 给索引起一个名字是个好习惯
                 expireAfterSeconds=0
+            ),
+            # 同一份 JD (规范化文本相同) 只保留一个文档；sparse 以兼容没有 content_hash 的旧文档
+            IndexModel(
+                keys=[("content_hash", pymongo.ASCENDING)],
+                name="content_hash_unique_index",
+                unique=True,
+                sparse=True
             )
             # 如果您还有其他普通字段索引，例如：
             # IndexModel(keys=[("keywords", pymongo.ASCENDING)], name="keywords_index")
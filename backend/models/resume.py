@@ -3,10 +3,13 @@
 """ 
 # backend/models/resume.py
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, FrozenSet, Type
 
-from beanie import Document, Indexed, PydanticObjectId # PydanticObjectId 用于外键链接
-from pydantic import BaseModel, Field, HttpUrl
+from beanie import Document, PydanticObjectId # PydanticObjectId 用于外键链接
+import pymongo
+from pymongo import IndexModel
+from pydantic import BaseModel, Field, HttpUrl, create_model
 # from .user import User # 如果使用 Beanie Link 类型，可以导入User
 
 class ResumeBase(BaseModel):
@@ -35,11 +38,14 @@ class ResumeRead(BaseModel): # 用于API响应的模型
     title: str
     original_file_name: Optional[str] = None
     raw_text_content: Optional[str] = None
+    layout_text_content: Optional[str] = None # 保留行结构的文本
     parsed_sections: Optional[Dict[str, Any]] = None
     uploaded_at: datetime
     updated_at: datetime
     file_download_url: Optional[str] = None # <--- 修改：从 HttpUrl 改为 str
-    thumbnail_url: Optional[str] = None    # <--- 新增：缩略图 URL
+    thumbnail_url: Optional[str] = None    # <--- 新增：缩略图 URL (默认尺寸)
+    thumbnail_urls: Dict[str, str] = {} # 各尺寸缩略图 URL，例如 {"sidebar": ..., "grid": ...}
+    processing_status: str = "completed" # pending | processing | completed | failed
 
     class Config:
         from_attributes = True # 即使我们手动转换，保留它通常无害
@@ -58,24 +64,120 @@ class ResumeInDBBase(ResumeBase):
         orm_mode = True # Pydantic V1
         # from_attributes = True # Pydantic V2
 
-class Resume(Document):
+class SentenceEmbeddings(BaseModel):
+    """简历句子嵌入 (上传时预计算)，向量以 float16 字节紧凑存储"""
+    model_name: str
+    model_version: str
+    dim: int
+    sentences: List[str]
+    vectors: bytes # float16，行优先，形状为 (len(sentences), dim)
+    computed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class ThumbnailRef(BaseModel):
+    """一个尺寸的缩略图：blob 引用及用于 ETag 的内容哈希"""
+    blob_id: str
+    media_type: str
+    width: int
+    height: int
+    content_hash: str # 图片字节的 SHA-256
+
+class ResumeThumbnailView(BaseModel):
+    """缩略图接口使用的投影：计算 ETag 只需要引用、哈希和 updated_at"""
+    id: PydanticObjectId = Field(alias="_id")
+    thumbnails: Dict[str, ThumbnailRef] = {}
+    updated_at: datetime
+
+class ResumeStatusView(BaseModel):
+    """GET /resumes/{id}/status 使用的投影"""
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: PydanticObjectId
+    processing_status: str = "completed"
+    processing_error: Optional[str] = None
+    updated_at: datetime
+
+class ResumeMatchView(BaseModel):
+    """匹配时使用的投影：只取匹配需要的字段，不加载原始文件和缩略图等二进制内容"""
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: PydanticObjectId
     title: str
-    user_id: Indexed(PydanticObjectId) # type: ignore
     original_file_name: Optional[str] = None
     raw_text_content: Optional[str] = None
+    sentence_embeddings: Optional[SentenceEmbeddings] = None
+
+class ResumeSummaryView(BaseModel):
+    """列表/详情接口默认使用的投影：只包含标题、时间戳和生成 URL 所需的引用"""
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: PydanticObjectId
+    title: str
+    original_file_name: Optional[str] = None
+    file_blob_id: Optional[str] = None
+    thumbnails: Dict[str, ThumbnailRef] = {}
+    processing_status: str = "completed"
+    uploaded_at: datetime
+    updated_at: datetime
+
+# 可通过 fields= 参数按需加载的大字段
+RESUME_HEAVY_FIELDS = {
+    "raw_text_content": Optional[str],
+    "layout_text_content": Optional[str],
+    "parsed_sections": Optional[Dict[str, Any]],
+}
+
+@lru_cache(maxsize=None)
+def resume_view_model(heavy_fields: FrozenSet[str]) -> Type[ResumeSummaryView]:
+    """返回在摘要投影基础上额外包含 heavy_fields 的投影模型 (每种组合只创建一次)"""
+    if not heavy_fields:
+        return ResumeSummaryView
+    extra_fields = {name: (RESUME_HEAVY_FIELDS[name], None) for name in sorted(heavy_fields)}
+    return create_model("ResumeView_" + "_".join(sorted(heavy_fields)), __base__=ResumeSummaryView, **extra_fields)
+
+class Resume(Document):
+    title: str
+    user_id: PydanticObjectId # 索引见 Settings.indexes (以 user_id 为前缀的复合索引)
+    original_file_name: Optional[str] = None
+    raw_text_content: Optional[str] = None # 合并空白后的纯文本，用于匹配
+    layout_text_content: Optional[str] = None # 保留行和文本块结构的文本，用于区段化等按区段处理的功能
     parsed_sections: Optional[Dict[str, Any]] = None
 
-    # 新增字段用于存储原始文件
-    file_content: Optional[bytes] = None # 存储文件原始内容
+    # 原始文件和缩略图存放在 blob store (GridFS) 中，文档只保存引用；
+    # 同一用户重复上传相同内容时，新文档与已有文档共享这些 blob
+    file_blob_id: Optional[str] = None # 原始文件的 blob ID
+    file_size: Optional[int] = None # 原始文件字节数
     file_media_type: Optional[str] = None # 存储文件的媒体类型 (e.g., "application/pdf")
+    content_hash: Optional[str] = None # 原始文件内容的 SHA-256，用于识别重复上传
+
+    # 各尺寸的缩略图 (键为 resume_parser.THUMBNAIL_SIZES 中的档位名)
+    thumbnails: Dict[str, ThumbnailRef] = {}
+
+    # 预计算的句子嵌入，用于匹配时跳过重复的分句和编码
+    sentence_embeddings: Optional[SentenceEmbeddings] = None
 
-    # 新增字段用于存储缩略图
-    thumbnail_content: Optional[bytes] = None      # <--- 新增：缩略图二进制内容
-    thumbnail_media_type: Optional[str] = None   # <--- 新增：缩略图媒体类型 (e.g., "image/png")
+    # 后台解析状态 (异步上传模式)；同步上传和旧文档均为 completed
+    processing_status: str = "completed" # pending | processing | completed | failed
+    processing_error: Optional[str] = None
+    processing_claim: Optional[str] = None # 正在处理该简历的 worker 的认领标记 (见 ResumeIngestionPool._claim)
 
     
     uploaded_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     class Settings:
-        name = "resumes"
\ No newline at end of file
+        name = "resumes"
+        indexes = [
+            # 按用户列出简历 (按 _id 即上传顺序分页)、上传时统计数量、删除账户后分批清理；
+            # 以 user_id 为前缀，同时覆盖只按 user_id 的查询，取代原来的单字段 user_id 索引
+            IndexModel(
+                keys=[("user_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+                name="user_id_id_index"
+            ),
+            # 上传时按 (用户, 文件哈希) 查找已解析过的相同文件；同一用户可以有多份内容相同的简历，因此不是唯一索引
+            IndexModel(
+                keys=[("user_id", pymongo.ASCENDING), ("content_hash", pymongo.ASCENDING)],
+                name="user_content_hash_index"
+            ),
+            # 启动时查找未完成的后台解析任务
+            IndexModel(
+                keys=[("processing_status", pymongo.ASCENDING)],
+                name="processing_status_index"
+            ),
+        ]
\ No newline at end of file
@@ -28,6 +28,15 @@ class UserRead(UserBase): # 用于API响应的模型
         from_attributes = True
         arbitrary_types_allowed = True # 明确允许任意类型，有助于处理像 PydanticObjectId 这样的自定义类型
 
+class UserListView(BaseModel):
+    """用户列表/导出使用的投影：不包含 hashed_password"""
+    id: PydanticObjectId = Field(alias="_id")
+    email: EmailStr
+    full_name: Optional[str] = None
+    is_active: bool = True
+    created_at: datetime
+    updated_at: datetime
+
 # Beanie Document 模型 (数据库模型) - 保持不变
 class User(Document):
     email: Indexed(EmailStr, unique=True) # type: ignore
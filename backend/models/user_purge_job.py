@@ -0,0 +1,53 @@
+# backend/models/user_purge_job.py
+import secrets
+from datetime import datetime, timezone
+from typing import Optional
+
+from beanie import Document, PydanticObjectId
+import pymongo
+from pymongo import IndexModel
+from pydantic import BaseModel, Field
+
+
+class UserPurgeJob(Document):
+    """永久删除账户后，清理该用户简历和 blob 的后台任务 (见 services/user_purge.py)"""
+    user_id: PydanticObjectId
+    # 查询清理进度用的随机令牌 (查询接口不需要认证，不能用可预测的 ObjectId 作为查询键)
+    status_token: str = Field(default_factory=lambda: secrets.token_urlsafe(32))
+    status: str = "pending" # pending | running | completed | failed | cancelled
+    resumes_total: Optional[int] = None # 开始清理时统计的简历数量
+    resumes_deleted: int = 0
+    blobs_deleted: int = 0
+    error: Optional[str] = None
+    attempts: int = 0 # 已失败的次数，未超过 USER_PURGE_MAX_ATTEMPTS 时会重试
+    # running 状态下由处理它的 worker 定期续期，过期后其他 worker 可以接手；failed 状态下为下次重试的时间
+    lease_expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    completed_at: Optional[datetime] = None
+
+    class Settings:
+        name = "user_purge_jobs"
+        indexes = [
+            # 每个被删除的用户只有一个清理任务
+            IndexModel(keys=[("user_id", pymongo.ASCENDING)], name="user_id_unique_index", unique=True),
+            # 按令牌查询清理进度 (sparse：之前创建的任务没有令牌)
+            IndexModel(keys=[("status_token", pymongo.ASCENDING)], name="status_token_unique_index", unique=True, sparse=True),
+            # 启动时查找未完成的任务
+            IndexModel(keys=[("status", pymongo.ASCENDING)], name="status_index"),
+        ]
+
+
+class UserPurgeJobRead(BaseModel):
+    """清理任务进度 (只包含计数，不包含用户信息)"""
+    job_id: str
+    status: str
+    status_url: str
+    resumes_total: Optional[int] = None
+    resumes_deleted: int
+    blobs_deleted: int
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
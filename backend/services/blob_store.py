@@ -0,0 +1,112 @@
+# backend/services/blob_store.py
+"""
+简历二进制内容 (原始文件、缩略图) 的分块存储
+Resume 文档只保存 blob 引用，文档查询不再携带文件内容，也不受 16 MB 文档大小限制。
+BlobStore 定义接口，默认实现基于 MongoDB GridFS，下载时逐块读取。
+"""
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, BinaryIO, Callable, Optional, Union
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+from backend.config import settings
+
+
+class BlobStream:
+    """一个已打开的 blob：先拿到长度，再逐块读取"""
+
+    def __init__(self, length: int, chunks: AsyncIterator[bytes]):
+        self.length = length
+        self._chunks = chunks
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._chunks
+
+
+class BlobStore(ABC):
+    """二进制存储接口"""
+
+    @abstractmethod
+    async def put(self, data: Union[bytes, BinaryIO], filename: str, content_type: Optional[str] = None) -> str:
+        """data 可以是 bytes 或可读的二进制流 (按块读取写入)"""
+
+    @abstractmethod
+    async def open_stream(self, blob_id: str) -> Optional[BlobStream]:
+        """blob 不存在时返回 None"""
+
+    async def read(self, blob_id: str) -> Optional[bytes]:
+        stream = await self.open_stream(blob_id)
+        if stream is None:
+            return None
+        return b"".join([chunk async for chunk in stream])
+
+    @abstractmethod
+    async def delete(self, blob_id: str) -> None:
+        """blob 不存在时静默忽略"""
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, database_getter: Callable[[], AsyncIOMotorDatabase], bucket_name: str):
+        self._database_getter = database_getter
+        self.bucket_name = bucket_name
+        self._bucket: Optional[AsyncIOMotorGridFSBucket] = None
+        self._bucket_database: Optional[AsyncIOMotorDatabase] = None
+
+    def _get_bucket(self) -> AsyncIOMotorGridFSBucket:
+        # 数据库实例在应用启动 (或测试重新初始化 Beanie) 之后才确定，因此惰性创建 bucket
+        database = self._database_getter()
+        if self._bucket is None or self._bucket_database is not database:
+            self._bucket = AsyncIOMotorGridFSBucket(database, bucket_name=self.bucket_name)
+            self._bucket_database = database
+        return self._bucket
+
+    @staticmethod
+    def _to_object_id(blob_id: str) -> Optional[ObjectId]:
+        try:
+            return ObjectId(blob_id)
+        except (InvalidId, TypeError):
+            return None
+
+    async def put(self, data: Union[bytes, BinaryIO], filename: str, content_type: Optional[str] = None) -> str:
+        metadata = {"content_type": content_type} if content_type else None
+        file_id = await self._get_bucket().upload_from_stream(filename, data, metadata=metadata)
+        return str(file_id)
+
+    async def open_stream(self, blob_id: str) -> Optional[BlobStream]:
+        file_id = self._to_object_id(blob_id)
+        if file_id is None:
+            return None
+        try:
+            grid_out = await self._get_bucket().open_download_stream(file_id)
+        except NoFile:
+            return None
+
+        async def iter_chunks() -> AsyncIterator[bytes]:
+            while True:
+                chunk = await grid_out.readchunk()
+                if not chunk:
+                    break
+                yield chunk
+
+        return BlobStream(grid_out.length, iter_chunks())
+
+    async def delete(self, blob_id: str) -> None:
+        file_id = self._to_object_id(blob_id)
+        if file_id is None:
+            return
+        try:
+            await self._get_bucket().delete(file_id)
+        except NoFile:
+            pass
+
+
+def _resume_database() -> AsyncIOMotorDatabase:
+    # 与 Beanie 使用同一个数据库 (应用与测试各自初始化 Beanie 时都适用)
+    from backend.models.resume import Resume
+    return Resume.get_motor_collection().database
+
+
+blob_store: BlobStore = GridFSBlobStore(_resume_database, settings.RESUME_BLOB_BUCKET)
@@ -0,0 +1,107 @@
+# backend/services/encode_batcher.py
+"""
+动态微批处理 (dynamic micro-batching)
+多个用户同时打开侧边栏时，每个请求都会向同一个 SentenceTransformer 发送很小的 encode 调用。
+EncodeBatcher 把一小段时间窗口内 (max_wait_ms) 或累计到 max_batch_size 条文本的请求合并成一次前向计算，
+再把结果切分后交还给各个等待中的协程。
+"""
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.inference_executor import run_inference
+
+
+class EncodeBatcher:
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], max_batch_size: int, max_wait_ms: float):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector_task: Optional[asyncio.Task] = None
+        self._batch_tasks: set = set()
+        self.batches_run = 0
+        self.texts_encoded = 0
+
+    @property
+    def running(self) -> bool:
+        return self._collector_task is not None and not self._collector_task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._collector_task = asyncio.create_task(self._collect_batches())
+        print(f"[Encode Batcher] Started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_seconds * 1000:g}).")
+
+    async def stop(self) -> None:
+        if self._collector_task is not None:
+            self._collector_task.cancel()
+            try:
+                await self._collector_task
+            except asyncio.CancelledError:
+                pass
+            self._collector_task = None
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """编码一组文本，返回 (len(texts), dim) 的矩阵；批处理器未启动时直接编码"""
+        if not self.running:
+            return await run_inference(self._encode_fn, texts)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[List[str], asyncio.Future]] = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                batch_size = len(batch[0][0])
+                deadline = loop.time() + self.max_wait_seconds
+                while batch_size < self.max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    batch.append(item)
+                    batch_size += len(item[0])
+                self._start_batch(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # 停止时，正在收集的批次和队列中剩余的请求作为最后一批计算 (stop 会等待它完成)，
+            # 否则等待这些结果的协程永远不会返回
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if batch:
+                self._start_batch(batch)
+            raise
+
+    def _start_batch(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        # 前向计算在推理线程池中进行，收集下一批的同时上一批可以继续计算
+        task = asyncio.create_task(self._run_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        flat_texts = [text for texts, _ in batch for text in texts]
+        try:
+            matrix = await run_inference(self._encode_fn, flat_texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches_run += 1
+        self.texts_encoded += len(flat_texts)
+        offset = 0
+        for texts, future in batch:
+            if not future.done():
+                future.set_result(matrix[offset:offset + len(texts)])
+            offset += len(texts)
@@ -0,0 +1,104 @@
+# backend/services/inference_executor.py
+"""
+NLP 推理专用执行器
+spaCy 和 SBERT 的推理是同步的 CPU 密集型调用，直接在 async 处理函数中执行会阻塞整个事件循环
+(包括登录、缩略图等廉价请求)。所有推理调用都通过这里的线程池 await 执行，
+并记录排队深度和等待时间，供 /inference-metrics 查看。
+使用线程池而非进程池：模型在每个 worker 进程中只加载一次，torch/spaCy 的计算部分会释放 GIL。
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, TypeVar
+
+from backend.config import settings
+
+T = TypeVar("T")
+
+WAIT_TIME_WINDOW = 1000 # 计算等待时间分位数时保留的最近样本数
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers: int, thread_name_prefix: str = "inference"):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_seconds = 0.0
+        self._total_run_seconds = 0.0
+        self._recent_wait_seconds: deque = deque(maxlen=WAIT_TIME_WINDOW)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在推理线程池中执行 func(*args, **kwargs)，并 await 其结果"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        def _task() -> T:
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait_seconds += started_at - submitted_at
+                self._recent_wait_seconds.append(started_at - submitted_at)
+            succeeded = False
+            try:
+                result = func(*args, **kwargs)
+                succeeded = True
+                return result
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._total_run_seconds += finished_at - started_at
+                    if succeeded:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        def _on_done(future: Future) -> None:
+            # await 在排队期间被取消时任务会被撤销，_task 不会执行，在这里扣除排队计数
+            if future.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        future = self._executor.submit(_task)
+        future.add_done_callback(_on_done)
+        return await asyncio.wrap_future(future)
+
+    @property
+    def queue_depth(self) -> int:
+        """已提交但尚未开始执行的任务数"""
+        with self._lock:
+            return self._queued
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self._completed + self._failed
+            recent_waits = sorted(self._recent_wait_seconds)
+            p95_wait = recent_waits[min(len(recent_waits) - 1, int(len(recent_waits) * 0.95))] if recent_waits else 0.0
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._total_wait_seconds / finished * 1000, 3) if finished else 0.0,
+                "p95_wait_ms": round(p95_wait * 1000, 3),
+                "avg_run_ms": round(self._total_run_seconds / finished * 1000, 3) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+inference_executor = InferenceExecutor(settings.INFERENCE_EXECUTOR_WORKERS)
+
+
+async def run_inference(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await inference_executor.run(func, *args, **kwargs)
@@ -0,0 +1,112 @@
+# backend/services/jd_embedding_cache.py
+"""
+JD 关键词嵌入缓存
+ProcessedJD 的关键词一旦提取就固定不变，因此其嵌入只需计算一次:
+进程内 LRU 命中 -> 直接返回；否则读取文档上持久化的向量；都没有时才编码并写回文档。
+缓存条目随 JD 的 expire_at 一起过期。
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Optional, Tuple
+
+import torch
+
+from backend.config import settings
+from backend.models.processed_jd import ProcessedJD, KeywordEmbeddings
+from backend.services.matching_service import (
+    normalize_jd_keywords,
+    encode_texts_batched,
+    pack_embedding_matrix,
+    unpack_embedding_matrix,
+)
+
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    # MongoDB 默认返回不带时区的 UTC 时间
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+class JDKeywordEmbeddingCache:
+    """以 jd_id 为键的 LRU 缓存，值为 (关键词元组, 嵌入矩阵, 过期时间)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[str, ...], torch.Tensor, Optional[datetime]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, jd_id: str, keywords: Tuple[str, ...]) -> Optional[torch.Tensor]:
+        with self._lock:
+            entry = self._entries.get(jd_id)
+            if entry is None:
+                return None
+            cached_keywords, matrix, expire_at = entry
+            if cached_keywords != keywords or (expire_at is not None and expire_at <= datetime.now(timezone.utc)):
+                del self._entries[jd_id]
+                return None
+            self._entries.move_to_end(jd_id)
+            return matrix
+
+    def put(self, jd_id: str, keywords: Tuple[str, ...], matrix: torch.Tensor, expire_at: Optional[datetime]) -> None:
+        with self._lock:
+            self._entries[jd_id] = (keywords, matrix, _as_utc(expire_at))
+            self._entries.move_to_end(jd_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, jd_id: str) -> None:
+        with self._lock:
+            self._entries.pop(jd_id, None)
+
+
+jd_keyword_embedding_cache = JDKeywordEmbeddingCache(settings.JD_EMBEDDING_CACHE_SIZE)
+
+
+def _is_current_for(embeddings: Optional[KeywordEmbeddings], keywords: Tuple[str, ...]) -> bool:
+    return (
+        embeddings is not None
+        and embeddings.model_name == settings.SBERT_MODEL_NAME
+        and embeddings.model_version == settings.SBERT_MODEL_VERSION
+        and tuple(embeddings.keywords) == keywords
+    )
+
+
+async def get_jd_keyword_embeddings(processed_jd_doc: ProcessedJD) -> Optional[torch.Tensor]:
+    """
+    返回按 normalize_jd_keywords 顺序排列的关键词嵌入矩阵。
+    同一个 JD 在其有效期内只会被编码一次。
+    """
+    keywords = tuple(normalize_jd_keywords(processed_jd_doc.keywords))
+    if not keywords:
+        return None
+    jd_id = str(processed_jd_doc.id)
+
+    matrix = jd_keyword_embedding_cache.get(jd_id, keywords)
+    if matrix is not None:
+        return matrix
+
+    stored = processed_jd_doc.keyword_embeddings
+    if _is_current_for(stored, keywords):
+        matrix = unpack_embedding_matrix(stored.vectors, len(keywords), stored.dim)
+    else:
+        encoded = await encode_texts_batched(list(keywords))
+        if encoded is None:
+            return None
+        embeddings = KeywordEmbeddings(
+            model_name=settings.SBERT_MODEL_NAME,
+            model_version=settings.SBERT_MODEL_VERSION,
+            dim=int(encoded.shape[1]),
+            keywords=list(keywords),
+            vectors=pack_embedding_matrix(encoded),
+        )
+        await ProcessedJD.find_one(ProcessedJD.id == processed_jd_doc.id).update(
+            {"$set": {"keyword_embeddings": embeddings.model_dump()}}
+        )
+        processed_jd_doc.keyword_embeddings = embeddings
+        matrix = unpack_embedding_matrix(embeddings.vectors, len(keywords), embeddings.dim)
+        print(f"[JD Embedding Cache] Encoded and persisted {len(keywords)} keywords for JD {jd_id}.")
+
+    jd_keyword_embedding_cache.put(jd_id, keywords, matrix, processed_jd_doc.expire_at)
+    return matrix
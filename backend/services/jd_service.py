@@ -0,0 +1,142 @@
+# backend/services/jd_service.py
+"""
+ProcessedJD 的获取与创建
+很多用户会查看同一个 LinkedIn 职位，因此 JD 以规范化文本的哈希为键去重：
+已存在时直接返回已有的 jd_id 和关键词并延长其过期时间；
+同一进程内对同一 JD 的并发首次请求只会运行一次关键词提取 (single-flight)，
+跨 worker 的竞争由 content_hash 唯一索引兜底。
+"""
+import asyncio
+import hashlib
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from beanie import UpdateResponse
+from beanie.operators import In
+from pymongo.errors import DuplicateKeyError
+
+from backend.models.processed_jd import ProcessedJD
+from backend.services.inference_executor import run_inference
+from backend.services.keyword_extractor import extract_keywords_from_jd, extract_keywords_from_jds
+
+PROCESSED_JD_TTL = timedelta(hours=1) # 每次命中都会把过期时间延长到从现在起这么久之后
+
+_inflight_extractions: Dict[str, "asyncio.Future[ProcessedJD]"] = {}
+
+
+def normalize_jd_text(jd_text: str) -> str:
+    """合并所有空白字符，使仅在换行/缩进上不同的同一份 JD 得到相同的哈希"""
+    return re.sub(r"\s+", " ", jd_text).strip()
+
+
+def compute_jd_content_hash(jd_text: str) -> str:
+    return hashlib.sha256(normalize_jd_text(jd_text).encode("utf-8")).hexdigest()
+
+
+async def _find_and_touch(content_hash: str) -> Optional[ProcessedJD]:
+    """按哈希查找已有 JD，并在同一次原子操作中延长其 expire_at"""
+    return await ProcessedJD.find_one(ProcessedJD.content_hash == content_hash).update(
+        {"$set": {"expire_at": datetime.now(timezone.utc) + PROCESSED_JD_TTL}},
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
+
+
+async def _extract_and_insert(jd_text: str, content_hash: str) -> ProcessedJD:
+    keywords = await run_inference(extract_keywords_from_jd, jd_text)
+    return await _insert_processed_jd(jd_text, content_hash, keywords)
+
+
+async def _insert_processed_jd(jd_text: str, content_hash: str, keywords: List[str]) -> ProcessedJD:
+    processed_jd_doc = ProcessedJD(
+        jd_text=jd_text,
+        keywords=keywords,
+        content_hash=content_hash,
+        expire_at=datetime.now(timezone.utc) + PROCESSED_JD_TTL,
+    )
+    try:
+        await processed_jd_doc.insert()
+    except DuplicateKeyError:
+        # 另一个 worker 进程抢先插入了同一份 JD，使用它的结果
+        existing = await _find_and_touch(content_hash)
+        if existing is None:
+            raise
+        return existing
+    return processed_jd_doc
+
+
+async def get_or_create_processed_jd(jd_text: str) -> ProcessedJD:
+    content_hash = compute_jd_content_hash(jd_text)
+
+    existing = await _find_and_touch(content_hash)
+    if existing is not None:
+        return existing
+
+    pending = _inflight_extractions.get(content_hash)
+    if pending is None:
+        pending = asyncio.ensure_future(_extract_and_insert(jd_text, content_hash))
+        _inflight_extractions[content_hash] = pending
+        pending.add_done_callback(lambda _: _inflight_extractions.pop(content_hash, None))
+    # shield: 某个等待者的请求被取消时，不影响其他等待同一次提取的请求
+    return await asyncio.shield(pending)
+
+
+async def get_or_create_processed_jds(jd_texts: List[str], batch_size: int) -> List[ProcessedJD]:
+    """
+    批量版本：按内容哈希去重 (包括请求内部的重复)，已有的 JD 一次查询取回并延长过期时间，
+    其余的通过 nlp.pipe 一次性提取。返回与 jd_texts 一一对应的文档。
+    """
+    hashes = [compute_jd_content_hash(text) for text in jd_texts]
+    first_text_by_hash: Dict[str, str] = {}
+    for content_hash, text in zip(hashes, jd_texts):
+        first_text_by_hash.setdefault(content_hash, text)
+    unique_hashes = list(first_text_by_hash)
+
+    await ProcessedJD.find(In(ProcessedJD.content_hash, unique_hashes)).update_many(
+        {"$set": {"expire_at": datetime.now(timezone.utc) + PROCESSED_JD_TTL}}
+    )
+    existing_docs = await ProcessedJD.find(In(ProcessedJD.content_hash, unique_hashes)).to_list()
+    docs_by_hash: Dict[str, ProcessedJD] = {doc.content_hash: doc for doc in existing_docs}
+
+    # 正在被其他请求提取的 JD 直接等待其结果，其余的由本次批量提取负责
+    awaiting: Dict[str, "asyncio.Future[ProcessedJD]"] = {}
+    to_extract: List[str] = []
+    for content_hash in unique_hashes:
+        if content_hash in docs_by_hash:
+            continue
+        if content_hash in _inflight_extractions:
+            awaiting[content_hash] = _inflight_extractions[content_hash]
+        else:
+            to_extract.append(content_hash)
+
+    if to_extract:
+        loop = asyncio.get_running_loop()
+        own_futures: Dict[str, "asyncio.Future[ProcessedJD]"] = {}
+        for content_hash in to_extract:
+            future = loop.create_future()
+            own_futures[content_hash] = future
+            _inflight_extractions[content_hash] = future
+        try:
+            keyword_lists = await run_inference(
+                extract_keywords_from_jds,
+                [first_text_by_hash[content_hash] for content_hash in to_extract],
+                batch_size,
+            )
+            for content_hash, keywords in zip(to_extract, keyword_lists):
+                processed_jd_doc = await _insert_processed_jd(first_text_by_hash[content_hash], content_hash, keywords)
+                docs_by_hash[content_hash] = processed_jd_doc
+                own_futures[content_hash].set_result(processed_jd_doc)
+        except Exception as e:
+            for future in own_futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception() # 已经向本次调用方抛出，避免 "exception was never retrieved" 警告
+            raise
+        finally:
+            for content_hash in to_extract:
+                _inflight_extractions.pop(content_hash, None)
+
+    for content_hash, future in awaiting.items():
+        docs_by_hash[content_hash] = await asyncio.shield(future)
+
+    return [docs_by_hash[content_hash] for content_hash in hashes]
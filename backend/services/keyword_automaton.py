@@ -0,0 +1,113 @@
+# backend/services/keyword_automaton.py
+"""
+JD 关键词的多模式精确匹配 (Aho-Corasick)
+把一个 JD 的全部关键词编译成一个自动机，单次扫描简历文本即可找到所有命中，
+并且只接受落在词边界上的命中，避免 "go" 命中 "good"、"r" 命中几乎任何单词这类误报。
+安装了 pyahocorasick 时使用其 C 实现，否则使用下面的纯 Python 实现。
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterator, List, Set, Tuple
+
+from backend.config import settings
+
+try:
+    import ahocorasick # pyahocorasick (可选依赖)
+except ImportError:
+    ahocorasick = None
+
+# 这些字符被视为单词的一部分："c" 不应命中 "c++" 或 "c#" 中的 c
+_EXTRA_WORD_CHARS = "+#_"
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch in _EXTRA_WORD_CHARS
+
+
+class KeywordAutomaton:
+    def __init__(self, keywords: Tuple[str, ...]):
+        # 自动机匹配小写形式，命中后映射回原关键词
+        self.keywords = keywords
+        self._patterns: List[str] = [kw.lower() for kw in keywords]
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for index, pattern in enumerate(self._patterns):
+                if pattern:
+                    self._automaton.add_word(pattern, index)
+            self._automaton.make_automaton()
+        else:
+            self._build_trie()
+
+    def _build_trie(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        for index, pattern in enumerate(self._patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(index)
+
+        # 广度优先计算失败指针，并把失败链上的输出合并到当前状态
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def _iter_raw_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """产生 (结束位置, 关键词下标)，不考虑词边界"""
+        if ahocorasick is not None:
+            if len(self._automaton) == 0:
+                return
+            yield from self._automaton.iter(text)
+            return
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in outputs[state]:
+                yield position, index
+
+    def find_matches(self, text: str) -> Set[str]:
+        """单次扫描 text，返回所有在词边界上命中的关键词 (原始形式)"""
+        text_lower = text.lower()
+        text_length = len(text_lower)
+        matched: Set[str] = set()
+        for end, index in self._iter_raw_matches(text_lower):
+            keyword = self.keywords[index]
+            if keyword in matched:
+                continue
+            start = end - len(self._patterns[index]) + 1
+            if start > 0 and _is_word_char(text_lower[start - 1]) and _is_word_char(text_lower[start]):
+                continue
+            if end + 1 < text_length and _is_word_char(text_lower[end + 1]) and _is_word_char(text_lower[end]):
+                continue
+            matched.add(keyword)
+        return matched
+
+
+@lru_cache(maxsize=settings.KEYWORD_AUTOMATON_CACHE_SIZE)
+def get_keyword_automaton(keywords: Tuple[str, ...]) -> KeywordAutomaton:
+    """
+    返回编译好的关键词自动机。
+    一个 jd_id 的关键词列表是固定的，因此以关键词元组为缓存键即相当于按 JD 缓存，
+    同时也覆盖了直接提交 jd_text 的请求。
+    """
+    return KeywordAutomaton(keywords)
@@ -5,15 +5,39 @@ from spacy.lang.en.stop_words import STOP_WORDS as spacy_stop_words
 from typing import List, Set, Optional, Dict
 import re
 
+from backend.config import settings
+
+# --- 提取档位 ---
+# 不需要的组件在加载时就排除 (exclude)，而不是加载后跳过，以减少每个 gunicorn worker 的内存和每次调用的耗时
+#   fast:     tokenizer + PhraseMatcher + tagger/attribute_ruler/lemmatizer (不生成 noun_chunks 和实体)
+#   standard: fast + NER
+#   full:     完整管线 (含 parser 生成 noun_chunks)，即原有行为
+# 注意: en_core_web_md 的 tok2vec 使用静态词向量作为输入特征，因此 tagger/ner 仍需要向量表；
+# 若要去掉 300 维向量表，可将 SPACY_MODEL_NAME 设为 en_core_web_sm (本提取器从不读取 token.vector)。
+EXTRACTION_PROFILE_EXCLUDES: Dict[str, List[str]] = {
+    "fast": ["parser", "ner", "senter"],
+    "standard": ["parser", "senter"],
+    "full": [],
+}
+
+extraction_profile = settings.KEYWORD_EXTRACTION_PROFILE
+if extraction_profile not in EXTRACTION_PROFILE_EXCLUDES:
+    print(f"Unknown KEYWORD_EXTRACTION_PROFILE '{extraction_profile}', falling back to 'full'.")
+    extraction_profile = "full"
+
 # --- spaCy 模型加载 ---
 # 确保此模型已在 Dockerfile 中下载: python -m spacy download en_core_web_md
 try:
-    nlp = spacy.load("en_core_web_md") # 使用中型模型以获得更好的NER和词向量
+    nlp = spacy.load(settings.SPACY_MODEL_NAME, exclude=EXTRACTION_PROFILE_EXCLUDES[extraction_profile]) # 默认中型模型以获得更好的NER和词向量
+    print(f"spaCy model '{settings.SPACY_MODEL_NAME}' loaded with profile '{extraction_profile}'. Pipeline: {nlp.pipe_names}")
 except OSError:
-    print("spaCy model 'en_core_web_md' not found. Please run: `python -m spacy download en_core_web_md` or ensure it's in your Dockerfile.")
+    print(f"spaCy model '{settings.SPACY_MODEL_NAME}' not found. Please run: `python -m spacy download {settings.SPACY_MODEL_NAME}` or ensure it's in your Dockerfile.")
     # 在生产环境中，如果模型加载失败，可能需要更健壮的错误处理或回退机制
     # 为了演示，如果加载失败，后续的 nlp(text) 调用会直接失败
-    raise ImportError("spaCy 'md' model not found. Critical for keyword extraction.")
+    raise ImportError(f"spaCy model '{settings.SPACY_MODEL_NAME}' not found. Critical for keyword extraction.")
+
+HAS_NER = nlp.has_pipe("ner")
+HAS_PARSER = nlp.has_pipe("parser") # doc.noun_chunks 需要依存句法分析
 
 # --- 已知技术技能列表 (您提供的列表已经很全面了) ---
 # --- 预定义的技术/技能词典 ---
@@ -259,10 +283,7 @@ IRRELEVANT_SECTION_HEADERS_AFTER_QUALIFICATIONS = [
 #     return None
 
 # --- 主关键词提取函数 ---
-def extract_keywords_from_jd(jd_text: str) -> List[str]:
-    if not jd_text:
-        return []
-
+def _prepare_jd_text(jd_text: str) -> str:
     # # 1. 尝试提取相关区段文本
     # text_to_process = get_relevant_jd_sections_text(jd_text)
     # if text_to_process is None:
@@ -270,10 +291,42 @@ def extract_keywords_from_jd(jd_text: str) -> List[str]:
     text_to_process = jd_text
     # 2. 规范化换行符和空白
     processed_text = text_to_process.replace('\r\n', ' ').replace('\r', ' ').replace('\n', ' ')
-    processed_text = re.sub(r'\s+', ' ', processed_text).strip()
-    
-    doc = nlp(processed_text)
-    
+    return re.sub(r'\s+', ' ', processed_text).strip()
+
+def extract_keywords_from_jd(jd_text: str) -> List[str]:
+    if not jd_text:
+        return []
+    return extract_keywords_from_doc(nlp(_prepare_jd_text(jd_text)))
+
+def extract_keywords_from_jds(jd_texts: List[str], batch_size: int = 16) -> List[List[str]]:
+    """
+    批量提取多个 JD 的关键词：通过 nlp.pipe 成批处理，摊薄每个 JD 的管线开销。
+    返回与 jd_texts 一一对应的关键词列表。
+    """
+    results: List[List[str]] = [[] for _ in jd_texts]
+    non_empty = [(index, _prepare_jd_text(text)) for index, text in enumerate(jd_texts) if text]
+    # 固定在当前线程中处理 (n_process=1)：这里运行在推理线程池中，进程里已有 torch/OpenMP 线程，
+    # 每个请求再 fork 子进程既可能死锁，也会为每个请求各加载一份模型
+    docs = nlp.pipe((text for _, text in non_empty), batch_size=batch_size, n_process=1)
+    for (index, _), doc in zip(non_empty, docs):
+        results[index] = extract_keywords_from_doc(doc)
+    return results
+
+def drop_keywords_contained_in_longer(keywords: Set[str]) -> List[str]:
+    """
+    移除作为另一个关键词中完整单词出现的关键词 (按空白切分，避免 "py" 被 "python" 吞掉)，返回排序后的列表。
+    先把每个关键词切分出的词元建成索引，再逐个查表，总耗时与词元总数成线性关系。
+    被移除的关键词本身只有一个词元，不可能再包含其他关键词，因此无需按长度顺序逐个比较。
+    """
+    contained_tokens: Set[str] = set()
+    for keyword in keywords:
+        for token in keyword.split():
+            if token != keyword:
+                contained_tokens.add(token)
+    return sorted(keyword for keyword in keywords if keyword not in contained_tokens)
+
+def extract_keywords_from_doc(doc) -> List[str]:
+    """从已经过 spaCy 管线处理的 Doc 中提取关键词"""
     # 使用集合存储，自动去重
     extracted_keywords: Set[str] = set()
 
@@ -285,8 +338,8 @@ def extract_keywords_from_jd(jd_text: str) -> List[str]:
     print(f"[DEBUG] Keywords after PhraseMatcher: {extracted_keywords}") # <--- 添加调试打印
 
 
-    # 优先级 2: NER 提取相关实体
-    for ent in doc.ents:
+    # 优先级 2: NER 提取相关实体 (fast 档位不加载 ner，doc.ents 为空)
+    for ent in (doc.ents if HAS_NER else ()):
         print(f"[DEBUG] NER Entity: '{ent.text.lower().strip()}' Label: '{ent.label_}'") # <--- 添加调试打印
 
         ent_text_lower = ent.text.lower().strip()
@@ -300,8 +353,8 @@ def extract_keywords_from_jd(jd_text: str) -> List[str]:
         # GPE (地点) 和 LOC (位置) 通常是噪音，除非特定职位需要 (例如，区域销售经理)
         # PERSON, DATE, TIME, MONEY, QUANTITY, ORDINAL, CARDINAL 通常也是噪音
 
-    # 优先级 3: 名词短语 (Noun Chunks)
-    for chunk in doc.noun_chunks:
+    # 优先级 3: 名词短语 (Noun Chunks)，仅 full 档位 (加载了 parser) 可用
+    for chunk in (doc.noun_chunks if HAS_PARSER else ()):
         # 清理名词短语，移除内部的停用词等，保留多个词构成的有意义短语
         cleaned_chunk_parts = [
             token.lemma_.lower() for token in chunk
@@ -352,34 +405,8 @@ def extract_keywords_from_jd(jd_text: str) -> List[str]:
         if kw in KNOWN_TECH_SKILLS_SET or kw not in NOISE_WORDS_TO_REMOVE_SET
     }
 
-    # 4. (可选) 处理子字符串/包含关系
-    #    例如，如果同时提取了 "java" 和 "java developer"，通常保留 "java developer"
-    #    这是一个更复杂的步骤，可以后续优化。一个简单方法是优先保留更长的关键词。
-    #    例如：
-    final_keywords_list = sorted(list(final_keywords_set), key=len, reverse=True)
-    deduplicated_keywords = []
-    for kw_long in final_keywords_list:
-        is_sub_part_of_already_added = False
-        for kw_added in deduplicated_keywords:
-            if kw_long in kw_added: # 如果长的包含短的，通常已处理。这里是短的包含在长的里面。
-                # 如果 kw_long 是 kw_added 的子串，并且它们不完全一样
-                if kw_long != kw_added and kw_long in kw_added.split(): # 避免 "py" in "python"
-                    is_sub_part_of_already_added = True
-                    break
-        if not is_sub_part_of_already_added:
-            is_super_string_of_already_added = False
-            temp_dedup_list = []
-            for kw_added in deduplicated_keywords:
-                if kw_added != kw_long and kw_added in kw_long.split(): # kw_added 是 kw_long 的子串
-                    pass # kw_long 更具体，保留它，之后 kw_added 会被过滤
-                else:
-                    temp_dedup_list.append(kw_added)
-            deduplicated_keywords = temp_dedup_list
-            deduplicated_keywords.append(kw_long)
-    return sorted(list(set(deduplicated_keywords)))
-    # 上述子串逻辑比较复杂且容易出错，初期可以先不加，依赖前面的优先级和噪音过滤。
-
-    # return sorted(list(final_keywords_set))
+    # 4. 处理包含关系：如果同时提取了 "java" 和 "java developer"，只保留更具体的 "java developer"
+    return drop_keywords_contained_in_longer(final_keywords_set)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,15 @@
 # backend/services/matching_service.py
-from typing import List, Set, Dict, Any, Tuple
+from typing import List, Set, Dict, Any, Tuple, Optional
 # import spacy # 如果还需要 spaCy 进行简历文本预处理
 from sentence_transformers import SentenceTransformer, util # 导入 sentence-transformers
 import torch # sentence-transformers 可能需要 torch
+import numpy as np
+
+from backend.config import settings
+from backend.models.resume import Resume, SentenceEmbeddings
+from backend.services.inference_executor import run_inference
+from backend.services.encode_batcher import EncodeBatcher
+from backend.services.keyword_automaton import get_keyword_automaton
 
 # nltk 组件 (如果还需要用于简历文本预处理，例如分句)
 import nltk
@@ -13,7 +20,7 @@ from nltk.tokenize import sent_tokenize
 # 初始化 Sentence Transformer 模型 (应该在应用启动时加载一次，而不是每次调用都加载)
 # 为简单起见，我们在这里定义，实际应用中应考虑全局加载或作为类成员
 try:
-    model_name = 'all-MiniLM-L6-v2' # 速度快，效果不错
+    model_name = settings.SBERT_MODEL_NAME # 默认 all-MiniLM-L6-v2，速度快，效果不错
     # model_name = 'all-mpnet-base-v2' # 效果更好，稍大
     sbert_model = SentenceTransformer(model_name)
     print(f"SentenceTransformer model '{model_name}' loaded successfully.")
@@ -161,6 +168,188 @@ def calculate_combined_match_score(
     score = (matched_keywords_count / len(jd_keywords_set)) * 100.0
     return round(score, 2)
 
+# --- 简历句子嵌入的预计算与存储 ---
+EMBEDDING_STORAGE_DTYPE = np.float16 # 存储时使用 float16，体积减半，精度对余弦相似度足够
+
+def is_embedding_current(embeddings: Optional[SentenceEmbeddings]) -> bool:
+    """检查已存储的嵌入是否由当前配置的模型生成"""
+    return (
+        embeddings is not None
+        and embeddings.model_name == settings.SBERT_MODEL_NAME
+        and embeddings.model_version == settings.SBERT_MODEL_VERSION
+    )
+
+def pack_embedding_matrix(matrix: np.ndarray) -> bytes:
+    return np.ascontiguousarray(matrix, dtype=EMBEDDING_STORAGE_DTYPE).tobytes()
+
+def unpack_embedding_matrix(buffer: bytes, rows: int, dim: int) -> torch.Tensor:
+    matrix = np.frombuffer(buffer, dtype=EMBEDDING_STORAGE_DTYPE).reshape(rows, dim)
+    return torch.from_numpy(matrix.astype(np.float32))
+
+def _build_sentence_embeddings(resume_sentences: List[str], matrix: np.ndarray) -> SentenceEmbeddings:
+    return SentenceEmbeddings(
+        model_name=settings.SBERT_MODEL_NAME,
+        model_version=settings.SBERT_MODEL_VERSION,
+        dim=int(matrix.shape[1]),
+        sentences=resume_sentences,
+        vectors=pack_embedding_matrix(matrix),
+    )
+
+def compute_resume_sentence_embeddings(resume_text: Optional[str]) -> Optional[SentenceEmbeddings]:
+    """对简历文本分句并一次性编码，返回可直接存入 Resume 文档的嵌入 (同步版本)"""
+    if not sbert_model or not resume_text or not resume_text.strip():
+        return None
+    try:
+        resume_sentences = sent_tokenize(resume_text)
+        if not resume_sentences:
+            return None
+        return _build_sentence_embeddings(resume_sentences, _encode_texts(resume_sentences))
+    except Exception as e:
+        print(f"Error computing resume sentence embeddings: {e}")
+        return None
+
+# --- 动态微批处理：并发请求的 encode 调用合并为一次前向计算 ---
+def _encode_texts(texts: List[str]) -> np.ndarray:
+    return sbert_model.encode(texts, convert_to_numpy=True)
+
+sbert_encode_batcher = EncodeBatcher(
+    _encode_texts,
+    max_batch_size=settings.ENCODE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.ENCODE_BATCH_MAX_WAIT_MS,
+)
+
+async def encode_texts_batched(texts: List[str]) -> Optional[np.ndarray]:
+    """通过动态批处理器编码文本；模型不可用或编码出错时返回 None"""
+    if not sbert_model or not texts:
+        return None
+    try:
+        return await sbert_encode_batcher.encode(texts)
+    except Exception as e:
+        print(f"Error encoding texts with SentenceTransformer: {e}")
+        return None
+
+async def embed_resume_text(resume_text: Optional[str]) -> Optional[SentenceEmbeddings]:
+    """compute_resume_sentence_embeddings 的异步版本，编码经由动态批处理器"""
+    if not sbert_model or not resume_text or not resume_text.strip():
+        return None
+    try:
+        resume_sentences = await run_inference(sent_tokenize, resume_text)
+    except Exception as e:
+        print(f"Error splitting resume text into sentences: {e}")
+        return None
+    if not resume_sentences:
+        return None
+    matrix = await encode_texts_batched(resume_sentences)
+    if matrix is None:
+        return None
+    return _build_sentence_embeddings(resume_sentences, matrix)
+
+def normalize_jd_keywords(jd_keywords: List[str]) -> List[str]:
+    """清理并去重JD关键词，返回稳定排序的列表 (关键词嵌入矩阵的行顺序与之对应)"""
+    return sorted(set(kw.strip() for kw in jd_keywords if kw.strip()))
+
+async def ensure_resume_embeddings(resume_doc) -> Optional[SentenceEmbeddings]:
+    """
+    返回简历的当前句子嵌入。
+    如果缺失或由旧模型生成，则惰性重算并写回数据库 (仅更新该字段)。
+    """
+    if is_embedding_current(resume_doc.sentence_embeddings):
+        return resume_doc.sentence_embeddings
+
+    embeddings = await embed_resume_text(resume_doc.raw_text_content)
+    if embeddings is not None:
+        await Resume.find_one(Resume.id == resume_doc.id).update(
+            {"$set": {"sentence_embeddings": embeddings.model_dump()}}
+        )
+        print(f"[Matching Service] Recomputed sentence embeddings for resume {resume_doc.id}.")
+    resume_doc.sentence_embeddings = embeddings
+    return embeddings
+
+def calculate_batched_match_details(
+    resume_text: str,
+    jd_keywords: List[str],
+    similarity_threshold=0.5,
+    resume_embeddings: Optional[SentenceEmbeddings] = None,
+    keyword_embeddings: Optional[torch.Tensor] = None
+) -> Tuple[float, List[Dict[str, Any]]]:
+    """
+    批量版本的组合匹配：与 calculate_combined_match_score 规则相同，
+    但所有未直接命中的JD关键词一次性编码，构建 关键词 × 简历句子 的相似度矩阵，
+    再按行取最大值，避免每个关键词一次单独的 encode/cos_sim 调用。
+    如果提供了当前模型的 resume_embeddings，则直接使用，不再分句和编码简历；
+    keyword_embeddings 为按 normalize_jd_keywords 顺序排列的关键词嵌入 (来自缓存)，提供时不再编码关键词。
+    返回 (分数, 每个关键词的命中详情)。
+    """
+    if not resume_text or not jd_keywords:
+        return 0.0, []
+
+    keywords = normalize_jd_keywords(jd_keywords)
+    if not keywords:
+        return 0.0, []
+
+    # 1. 直接匹配：关键词自动机单次扫描简历文本，只接受词边界上的命中
+    directly_matched = get_keyword_automaton(tuple(keywords)).find_matches(resume_text)
+    direct_hits = [keyword_phrase in directly_matched for keyword_phrase in keywords]
+    max_similarities: List[Optional[float]] = [None] * len(keywords)
+
+    # 2. 对未直接命中的关键词做一次批量语义匹配
+    pending_indices = [i for i, hit in enumerate(direct_hits) if not hit]
+    if pending_indices and sbert_model:
+        try:
+            if is_embedding_current(resume_embeddings) and resume_embeddings.sentences:
+                resume_sentences = resume_embeddings.sentences
+                resume_sentence_embeddings = unpack_embedding_matrix(
+                    resume_embeddings.vectors, len(resume_sentences), resume_embeddings.dim
+                )
+            else:
+                resume_sentences = sent_tokenize(resume_text)
+                resume_sentence_embeddings = (
+                    sbert_model.encode(resume_sentences, convert_to_tensor=True) if resume_sentences else None
+                )
+            if resume_sentences:
+                if keyword_embeddings is not None and keyword_embeddings.shape[0] == len(keywords):
+                    pending_keyword_embeddings = keyword_embeddings[pending_indices]
+                else:
+                    pending_keyword_embeddings = sbert_model.encode(
+                        [keywords[i] for i in pending_indices], convert_to_tensor=True
+                    )
+                if resume_sentence_embeddings.nelement() > 0 and pending_keyword_embeddings.nelement() > 0:
+                    similarity_matrix = util.cos_sim(
+                        pending_keyword_embeddings, resume_sentence_embeddings.to(pending_keyword_embeddings.device)
+                    )
+                    row_max = torch.max(similarity_matrix, dim=1).values.tolist()
+                    for keyword_index, similarity in zip(pending_indices, row_max):
+                        max_similarities[keyword_index] = similarity
+        except Exception as e:
+            print(f"Error calculating batched semantic similarity: {e}")
+
+    # 3. 汇总每个关键词的命中情况
+    keyword_details: List[Dict[str, Any]] = []
+    matched_keywords_count = 0
+    for keyword_phrase, direct_hit, similarity in zip(keywords, direct_hits, max_similarities):
+        semantic_hit = not direct_hit and similarity is not None and similarity >= similarity_threshold
+        if direct_hit or semantic_hit:
+            matched_keywords_count += 1
+        keyword_details.append({
+            "keyword": keyword_phrase,
+            "direct_match": direct_hit,
+            "semantic_match": semantic_hit,
+            "similarity": round(similarity, 4) if similarity is not None else None,
+        })
+
+    print(f"Total JD keywords matched (batched): {matched_keywords_count}/{len(keywords)}")
+    score = (matched_keywords_count / len(keywords)) * 100.0
+    return round(score, 2), keyword_details
+
+def calculate_batched_match_score(
+    resume_text: str,
+    jd_keywords: List[str],
+    similarity_threshold=0.5,
+    resume_embeddings: Optional[SentenceEmbeddings] = None
+) -> float:
+    score, _ = calculate_batched_match_details(resume_text, jd_keywords, similarity_threshold, resume_embeddings)
+    return score
+
 # 在您的 services/matching_service.py 中，将主要的 calculate_match_score 指向这个新函数
 # calculate_match_score = calculate_combined_match_score # 如果您想替换掉旧的
 
@@ -171,7 +360,7 @@ def get_sbert_model():
     global _sbert_model_instance
     if _sbert_model_instance is None:
         try:
-            model_name = 'all-MiniLM-L6-v2' # 或者 'all-mpnet-base-v2'
+            model_name = settings.SBERT_MODEL_NAME # 或者 'all-mpnet-base-v2'
             _sbert_model_instance = SentenceTransformer(model_name)
             print(f"SentenceTransformer model '{model_name}' loaded successfully for matching service.")
         except Exception as e:
@@ -184,7 +373,9 @@ sbert_model = get_sbert_model() # 在模块加载时尝试加载一次
 # 确保您的 calculate_match_score 现在指向 calculate_combined_match_score
 # 如果您在 api/matching.py 中导入的是 calculate_match_score，
 # 那么在这里修改:
-calculate_match_score = calculate_combined_match_score
+# 默认使用批量相似度矩阵版本；calculate_combined_match_score 保留为逐关键词的参考实现
+calculate_match_score = calculate_batched_match_score
+calculate_match_details = calculate_batched_match_details
 
 if __name__ == '__main__':
     # 测试代码
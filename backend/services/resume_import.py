@@ -0,0 +1,254 @@
+# backend/services/resume_import.py
+"""
+ZIP 压缩包批量导入简历
+压缩包中的 PDF / DOCX 条目依次读出，交给有界的解析子进程池处理 (复用 extract_resume_content：
+文本提取、区段化和缩略图)，解析完成后写入 blob store 和 Resume 集合。
+每个条目处理完即产出一条结果，由接口以 NDJSON 流式返回；同时处理中的条目数有上限，
+压缩包不会被整个解压到内存中。
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Literal, Optional, Set, Tuple
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel
+
+from backend.config import settings
+from backend.models.resume import Resume
+from backend.services.blob_store import blob_store
+from backend.services.matching_service import embed_resume_text
+from backend.services.resume_ingestion import (
+    find_reusable_resume, insert_reused_resume, reused_resume_fields, store_thumbnails
+)
+from backend.services.resume_parser import ProcessedDocument, extract_resume_content
+
+IMPORT_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+IMPORT_CREATED = "created" # 新解析并保存
+IMPORT_REUSED = "reused" # 与已有简历内容相同，复用其解析结果 (见 resume_ingestion.find_reusable_resume)
+IMPORT_SKIPPED = "skipped" # 不支持的文件类型，或超出简历数量限制
+IMPORT_FAILED = "failed"
+
+
+class ResumeImportResult(BaseModel):
+    """NDJSON 中的一行：一个条目的处理结果 (按完成顺序返回，index 为条目在压缩包中的序号)"""
+    type: Literal["result"] = "result"
+    index: int
+    file_name: str
+    status: str
+    resume_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ResumeImportSummary(BaseModel):
+    """NDJSON 的最后一行：各状态的条目数"""
+    type: Literal["summary"] = "summary"
+    total: int
+    created: int = 0
+    reused: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+class ResumeImportPool:
+    """
+    解析子进程池 (每个 gunicorn worker 一个，惰性创建)。
+    使用 spawn 启动子进程：子进程只导入 resume_parser，不继承父进程中的模型、线程和数据库连接。
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run_extraction(
+        self, content: bytes, content_type: str, filename: str
+    ) -> Tuple[ProcessedDocument, Dict[str, str]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), extract_resume_content, content, content_type, filename)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+resume_import_pool = ResumeImportPool(settings.RESUME_IMPORT_WORKERS)
+
+# 客户端断开后仍在处理的条目任务 (让它们完成写入，避免留下孤立的 blob)
+_detached_tasks: Set[asyncio.Task] = set()
+
+
+def entry_content_type(entry_name: str) -> Optional[str]:
+    """按扩展名判断条目类型；不支持的类型返回 None"""
+    return IMPORT_CONTENT_TYPES.get(os.path.splitext(entry_name)[1].lower())
+
+
+def list_archive_entries(zip_file: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """压缩包中的文件条目，忽略目录、隐藏文件和 macOS 打包时附带的 __MACOSX 元数据"""
+    entries = []
+    for info in zip_file.infolist():
+        base_name = os.path.basename(info.filename)
+        if info.is_dir() or not base_name or base_name.startswith(".") or info.filename.startswith("__MACOSX/"):
+            continue
+        entries.append(info)
+    return entries
+
+
+class _ImportQuota:
+    """剩余可导入的简历数量；解析前预留名额，失败时归还。remaining 为 None 表示不限制"""
+
+    def __init__(self, remaining: Optional[int]):
+        self.remaining = remaining
+
+    def try_reserve(self) -> bool:
+        if self.remaining is None:
+            return True
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def release(self) -> None:
+        if self.remaining is not None:
+            self.remaining += 1
+
+
+async def _import_entry(
+    content: bytes, content_type: str, file_name: str, user_id: PydanticObjectId
+) -> Tuple[str, str]:
+    """导入一个条目，返回 (状态, 简历 ID)；文件无法解析时抛出 ValueError"""
+    content_hash = hashlib.sha256(content).hexdigest()
+    reusable_resume = await find_reusable_resume(user_id, content_hash)
+    if reusable_resume is not None:
+        new_resume = Resume(
+            title=file_name,
+            original_file_name=file_name,
+            user_id=user_id,
+            content_hash=content_hash,
+            **reused_resume_fields(reusable_resume)
+        )
+        if await insert_reused_resume(new_resume, reusable_resume):
+            return IMPORT_REUSED, str(new_resume.id)
+        # 被复用的简历在导入期间被删除，按新文件解析
+
+    processed, parsed_sections = await resume_import_pool.run_extraction(content, content_type, file_name)
+    sentence_embeddings = await embed_resume_text(processed.raw_text) if settings.RESUME_PRECOMPUTE_EMBEDDINGS else None
+
+    file_blob_id = await blob_store.put(content, file_name, content_type)
+    thumbnails = await store_thumbnails(processed, file_name)
+    new_resume = Resume(
+        title=file_name,
+        original_file_name=file_name,
+        user_id=user_id,
+        raw_text_content=processed.raw_text,
+        layout_text_content=processed.layout_text,
+        parsed_sections=parsed_sections,
+        file_blob_id=file_blob_id,
+        file_size=len(content),
+        file_media_type=content_type,
+        content_hash=content_hash,
+        thumbnails=thumbnails,
+        sentence_embeddings=sentence_embeddings,
+    )
+    try:
+        await new_resume.insert()
+    except Exception:
+        for blob_id in [file_blob_id] + [ref.blob_id for ref in thumbnails.values()]:
+            await blob_store.delete(blob_id)
+        raise
+    return IMPORT_CREATED, str(new_resume.id)
+
+
+async def import_resume_archive(
+    zip_file: zipfile.ZipFile,
+    entries: List[zipfile.ZipInfo],
+    user_id: PydanticObjectId,
+    quota_remaining: Optional[int],
+) -> AsyncIterator[BaseModel]:
+    """
+    导入 entries 中的条目，每完成一个产出一条 ResumeImportResult，最后产出 ResumeImportSummary。
+    quota_remaining 为还能导入的简历数量 (None 表示不限制)，用完后其余条目标记为 skipped。
+    """
+    quota = _ImportQuota(quota_remaining)
+    results: asyncio.Queue = asyncio.Queue()
+    # 已读出但尚未处理完的条目数上限，限制内存中同时存在的条目内容
+    in_flight = asyncio.Semaphore(resume_import_pool.max_workers * 2)
+    entry_tasks: List[asyncio.Task] = []
+
+    def finish(result: ResumeImportResult) -> None:
+        in_flight.release()
+        results.put_nowait(result)
+
+    async def run_entry(index: int, info: zipfile.ZipInfo, content_type: str, content: bytes) -> None:
+        file_name = os.path.basename(info.filename)
+        try:
+            import_status, resume_id = await _import_entry(content, content_type, file_name, user_id)
+        except Exception as e:
+            quota.release()
+            print(f"[Import Service] Failed to import {info.filename}: {e}")
+            finish(ResumeImportResult(index=index, file_name=info.filename, status=IMPORT_FAILED, error=str(e)))
+        else:
+            finish(ResumeImportResult(index=index, file_name=info.filename, status=import_status, resume_id=resume_id))
+
+    async def feed() -> None:
+        try:
+            await feed_entries()
+        except Exception as e:
+            # 意外错误时结束输出流，否则消费端会一直等待剩余条目的结果
+            print(f"[Import Service] Stopped reading archive: {e}")
+            results.put_nowait(e)
+
+    async def feed_entries() -> None:
+        for index, info in enumerate(entries):
+            await in_flight.acquire()
+            content_type = entry_content_type(info.filename)
+            if content_type is None:
+                finish(ResumeImportResult(index=index, file_name=info.filename, status=IMPORT_SKIPPED, error="Unsupported file type. Supported types are PDF and DOCX."))
+                continue
+            if info.file_size > settings.MAX_UPLOAD_SIZE_BYTES:
+                finish(ResumeImportResult(index=index, file_name=info.filename, status=IMPORT_FAILED, error=f"File too large. Maximum allowed size is {settings.MAX_UPLOAD_SIZE_BYTES} bytes."))
+                continue
+            if not quota.try_reserve():
+                finish(ResumeImportResult(index=index, file_name=info.filename, status=IMPORT_SKIPPED, error=f"Upload limit reached. You can only upload a maximum of {settings.MAX_RESUMES_PER_USER} resumes."))
+                continue
+            try:
+                # 解压时的输出长度受 ZipInfo.file_size 约束，声明的大小不实也不会读出更多数据
+                content = await asyncio.to_thread(zip_file.read, info)
+            except Exception as e:
+                # 损坏的条目 (BadZipFile、zlib.error、EOFError 等)、加密条目或不支持的压缩方法
+                quota.release()
+                finish(ResumeImportResult(index=index, file_name=info.filename, status=IMPORT_FAILED, error=f"Could not read archive entry: {e}"))
+                continue
+            entry_tasks.append(asyncio.create_task(run_entry(index, info, content_type, content)))
+
+    summary = ResumeImportSummary(total=len(entries))
+    feeder = asyncio.create_task(feed())
+    try:
+        for _ in range(len(entries)):
+            result = await results.get()
+            if isinstance(result, Exception):
+                raise result
+            setattr(summary, result.status, getattr(summary, result.status) + 1)
+            yield result
+        yield summary
+    finally:
+        feeder.cancel()
+        # 客户端提前断开时，已在处理的条目继续完成写入 (条目内容已读出，不再依赖压缩包)
+        for task in entry_tasks:
+            if not task.done():
+                _detached_tasks.add(task)
+                task.add_done_callback(_detached_tasks.discard)
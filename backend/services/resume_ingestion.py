@@ -0,0 +1,273 @@
+# backend/services/resume_ingestion.py
+"""
+简历解析流水线
+解析文本、区段化和生成缩略图都是 CPU 密集的同步操作 (PyMuPDF / python-docx)，
+统一在有界的后台线程池中执行，避免阻塞事件循环。
+异步上传模式下，上传接口只保存文件并返回 202，ResumeIngestionPool 的后台 worker
+再从队列中取出简历完成解析，并把结果和状态 (processing_status) 写回文档。
+同一用户重复上传内容相同 (content_hash 相同) 的文件时，直接复用已有简历的解析结果和 blob，不再重新解析。
+"""
+import asyncio
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from beanie import PydanticObjectId
+from beanie.operators import In
+
+from backend.config import settings
+from backend.models.resume import Resume, ResumeStatusView, ResumeSummaryView, ThumbnailRef
+from backend.services.blob_store import blob_store
+from backend.services.matching_service import embed_resume_text
+# extract_resume_content 定义在 resume_parser 中 (只依赖解析库)，批量导入的子进程可以直接导入它而不加载模型
+from backend.services.resume_parser import ProcessedDocument, extract_resume_content
+
+PROCESSING_PENDING = "pending"
+PROCESSING_RUNNING = "processing"
+PROCESSING_COMPLETED = "completed"
+PROCESSING_FAILED = "failed"
+
+# 重复上传时从已有简历复制的解析结果，以及共享引用的 blob
+REUSABLE_RESUME_FIELDS = (
+    "raw_text_content",
+    "layout_text_content",
+    "parsed_sections",
+    "sentence_embeddings",
+    "file_blob_id",
+    "file_size",
+    "file_media_type",
+    "thumbnails",
+)
+
+
+async def store_thumbnails(processed: ProcessedDocument, filename: Optional[str]) -> Dict[str, ThumbnailRef]:
+    """把各尺寸缩略图写入 blob store，返回保存在简历文档中的引用 (含用于 ETag 的内容哈希)"""
+    refs: Dict[str, ThumbnailRef] = {}
+    for size_name, thumbnail in processed.thumbnails.items():
+        blob_id = await blob_store.put(thumbnail.data, f"{filename}.{size_name}.thumbnail", thumbnail.media_type)
+        refs[size_name] = ThumbnailRef(
+            blob_id=blob_id,
+            media_type=thumbnail.media_type,
+            width=thumbnail.width,
+            height=thumbnail.height,
+            content_hash=hashlib.sha256(thumbnail.data).hexdigest(),
+        )
+    return refs
+
+
+async def find_reusable_resume(user_id: PydanticObjectId, content_hash: str) -> Optional[Resume]:
+    """查找该用户已解析完成、文件内容相同的简历"""
+    return await Resume.find_one(
+        Resume.user_id == user_id,
+        Resume.content_hash == content_hash,
+        Resume.processing_status == PROCESSING_COMPLETED,
+    )
+
+
+def reused_resume_fields(source: Resume) -> Dict[str, Any]:
+    """新简历从 source 复用的字段 (标题、文件名等元数据由调用方提供)"""
+    return {field_name: getattr(source, field_name) for field_name in REUSABLE_RESUME_FIELDS}
+
+
+async def insert_reused_resume(new_resume: Resume, source: Resume) -> bool:
+    """
+    插入复用 source 的解析结果和 blob 的新简历。
+    插入之后再确认 source 仍然存在：source 存在说明它的删除 (如果有) 在插入之后才开始，
+    delete_resume_blobs 查询时会看到新简历并保留共享的 blob。
+    source 已被删除时，共享的 blob 可能已经或即将被删除：撤销插入并返回 False，调用方改为按新文件处理。
+    """
+    await new_resume.insert()
+    if await Resume.find(Resume.id == source.id).count() > 0:
+        return True
+    await new_resume.delete()
+    await delete_resume_blobs(new_resume)
+    return False
+
+
+async def delete_resume_blobs(resume: Resume) -> None:
+    """删除简历引用的 blob；仍被同一用户其他相同内容的简历引用的 blob 保留"""
+    blob_ids = {resume.file_blob_id} | {ref.blob_id for ref in resume.thumbnails.values()}
+    blob_ids.discard(None)
+    if resume.content_hash:
+        siblings = await Resume.find(
+            Resume.user_id == resume.user_id,
+            Resume.content_hash == resume.content_hash,
+            Resume.id != resume.id,
+        ).project(ResumeSummaryView).to_list()
+        for sibling in siblings:
+            blob_ids.discard(sibling.file_blob_id)
+            blob_ids.difference_update(ref.blob_id for ref in sibling.thumbnails.values())
+    for blob_id in blob_ids:
+        await blob_store.delete(blob_id)
+
+
+class ResumeIngestionPool:
+    def __init__(self, max_workers: int, max_queue_size: int):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._requeue_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        print(f"[Ingestion Service] Started {self.max_workers} ingestion worker(s).")
+        # 在后台重新入队：未完成的简历多于队列容量时，不阻塞应用启动
+        self._requeue_task = asyncio.create_task(self._requeue_unfinished())
+
+    async def stop(self) -> None:
+        if self._requeue_task is not None:
+            self._requeue_task.cancel()
+            await asyncio.gather(self._requeue_task, return_exceptions=True)
+            self._requeue_task = None
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_extraction(
+        self, content: Union[bytes, str], content_type: Optional[str], filename: Optional[str]
+    ) -> Tuple[ProcessedDocument, Dict[str, str]]:
+        """在解析线程池中执行 extract_resume_content (同步上传模式也使用)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, extract_resume_content, content, content_type, filename)
+
+    async def submit(self, resume_id: PydanticObjectId) -> None:
+        """提交一份待解析的简历；后台 worker 未启动时 (例如测试中) 直接在当前任务中处理"""
+        if not self.running:
+            await self.process(resume_id)
+            return
+        await self._queue.put(resume_id)
+
+    async def _requeue_unfinished(self) -> None:
+        # 进程重启前未完成的任务重新入队；每个 worker 进程都会入队，但 process 中的认领保证同一份简历只被处理一次
+        unfinished = await Resume.find(
+            In(Resume.processing_status, [PROCESSING_PENDING, PROCESSING_RUNNING])
+        ).project(ResumeStatusView).to_list()
+        for resume_doc in unfinished:
+            await self._queue.put(resume_doc.id)
+        if unfinished:
+            print(f"[Ingestion Service] Re-queued {len(unfinished)} unfinished resume(s).")
+
+    async def _worker(self) -> None:
+        while True:
+            resume_id = await self._queue.get()
+            try:
+                await self.process(resume_id)
+            except Exception as e:
+                print(f"[Ingestion Service] Unexpected error while processing resume {resume_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _claim(self, resume_id: PydanticObjectId) -> Optional[str]:
+        """
+        原子地认领一份待解析的简历 (pending，或超过 RESUME_INGESTION_STALE_SECONDS 未更新的 processing)，
+        返回认领标记；已被其他 worker 认领或已结束时返回 None。
+        """
+        now = datetime.now(timezone.utc)
+        claim = uuid.uuid4().hex
+        update_result = await Resume.find_one({
+            "_id": resume_id,
+            "$or": [
+                {"processing_status": PROCESSING_PENDING},
+                {
+                    "processing_status": PROCESSING_RUNNING,
+                    "updated_at": {"$lt": now - timedelta(seconds=settings.RESUME_INGESTION_STALE_SECONDS)},
+                },
+            ],
+        }).update({"$set": {"processing_status": PROCESSING_RUNNING, "processing_claim": claim, "updated_at": now}})
+        if update_result is None or update_result.modified_count != 1:
+            return None
+        return claim
+
+    async def process(self, resume_id: PydanticObjectId) -> None:
+        claim = await self._claim(resume_id)
+        if claim is None:
+            return
+        try:
+            resume_doc = await Resume.get(resume_id)
+            if resume_doc is None:
+                return
+            await self._process_claimed(resume_doc, claim)
+        except Exception as e:
+            # 任何错误 (读取文件、缩略图、嵌入、写回文档) 都把任务标记为失败，避免一直停留在 processing
+            print(f"[Ingestion Service] Failed to process resume {resume_id}: {e}")
+            await _set_status(resume_id, PROCESSING_FAILED, str(e) or type(e).__name__, claim)
+
+    async def _process_claimed(self, resume_doc: Resume, claim: str) -> None:
+        resume_id = resume_doc.id
+        content = await blob_store.read(resume_doc.file_blob_id) if resume_doc.file_blob_id else None
+        if content is None:
+            await _set_status(resume_id, PROCESSING_FAILED, "Uploaded file is missing.", claim)
+            return
+
+        try:
+            processed, parsed_sections = await self.run_extraction(
+                content, resume_doc.file_media_type, resume_doc.original_file_name
+            )
+        except ValueError as e:
+            await _set_status(resume_id, PROCESSING_FAILED, str(e), claim)
+            return
+
+        updates = {
+            "raw_text_content": processed.raw_text,
+            "layout_text_content": processed.layout_text,
+            "parsed_sections": parsed_sections,
+            "processing_status": PROCESSING_COMPLETED,
+            "processing_error": None,
+            "processing_claim": None,
+            "updated_at": datetime.now(timezone.utc),
+        }
+        thumbnails = await store_thumbnails(processed, resume_doc.original_file_name)
+        try:
+            updates["thumbnails"] = {size_name: ref.model_dump() for size_name, ref in thumbnails.items()}
+            if settings.RESUME_PRECOMPUTE_EMBEDDINGS:
+                sentence_embeddings = await embed_resume_text(processed.raw_text)
+                updates["sentence_embeddings"] = sentence_embeddings.model_dump() if sentence_embeddings else None
+
+            # 只在认领仍属于当前 worker 时写回 (认领过期后可能已被其他 worker 接手)
+            update_result = await Resume.find_one({"_id": resume_id, "processing_claim": claim}).update({"$set": updates})
+        except Exception:
+            # 结果没有写回文档，刚生成的缩略图不会被引用
+            await _delete_blobs([ref.blob_id for ref in thumbnails.values()])
+            raise
+        if update_result is not None and update_result.matched_count == 0:
+            # 简历在解析期间被删除或被其他 worker 接手，清理刚生成的缩略图
+            await _delete_blobs([ref.blob_id for ref in thumbnails.values()])
+            return
+        print(f"[Ingestion Service] Resume {resume_id} processed.")
+
+
+async def _delete_blobs(blob_ids: List[str]) -> None:
+    for blob_id in blob_ids:
+        await blob_store.delete(blob_id)
+
+
+async def _set_status(
+    resume_id: PydanticObjectId, processing_status: str, error: Optional[str] = None, claim: Optional[str] = None
+) -> None:
+    """更新解析状态；给出 claim 时只在认领仍属于调用方时更新"""
+    query = {"_id": resume_id}
+    if claim is not None:
+        query["processing_claim"] = claim
+    await Resume.find_one(query).update({"$set": {
+        "processing_status": processing_status,
+        "processing_error": error,
+        "processing_claim": None,
+        "updated_at": datetime.now(timezone.utc),
+    }})
+
+
+resume_ingestion_pool = ResumeIngestionPool(settings.RESUME_INGESTION_WORKERS, settings.RESUME_INGESTION_QUEUE_SIZE)
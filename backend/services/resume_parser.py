@@ -2,11 +2,13 @@
 简历解析
 """ 
 # backend/services/resume_parser.py
+import asyncio
 import io
 from PyPDF2 import PdfReader
 from docx import Document as DocxDocument
 from fastapi import UploadFile
-from typing import Optional, Tuple, Dict, List, Any # 确保导入 Dict, List, Any
+from pydantic import BaseModel
+from typing import Optional, Tuple, Dict, List, Any, Union # 确保导入 Dict, List, Any
 import fitz # PyMuPDF
 import re # 导入正则表达式库
 
@@ -15,104 +17,151 @@ SUPPORTED_MIME_TYPES = {
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
 }
 
-async def parse_resume_file(file: UploadFile) -> str:
-    """
-    解析上传的简历文件 (PDF 或 DOCX) 并提取纯文本内容。
-    """
-    if file.content_type not in SUPPORTED_MIME_TYPES:
-        raise ValueError(f"Unsupported file type: {file.content_type}. Supported types are PDF and DOCX.")
+# 缩略图尺寸档位：名称 -> (最大宽度, 最大高度) 像素。sidebar 用于扩展侧边栏，grid 用于主页面网格
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int]] = {
+    "sidebar": (150, 200),
+    "grid": (300, 400),
+}
+DEFAULT_THUMBNAIL_SIZE = "sidebar"
+THUMBNAIL_MEDIA_TYPE = "image/jpeg" # JPEG 比 PNG 小得多，PyMuPDF 可以直接输出
+THUMBNAIL_JPEG_QUALITY = 80
 
-    file_extension = SUPPORTED_MIME_TYPES[file.content_type]
-    content = await file.read() # 读取文件内容为 bytes
-    await file.seek(0) # 重置文件指针，以防后续需要再次读取
 
-    text_content = ""
+class PageMetadata(BaseModel):
+    number: int # 从 1 开始
+    width: float
+    height: float
+    text_block_count: int
 
-    try:
-        if file_extension == "pdf":
-            # ==> 使用 PyMuPDF (fitz) 解析 PDF <==
-            pdf_doc = fitz.open(stream=content, filetype="pdf")
-            for page_num in range(len(pdf_doc)):
-                page = pdf_doc.load_page(page_num)
-                # 使用 text_content += page.get_text("text") or "" 获取纯文本，通常效果更好
-                # "blocks" 参数可以提供更结构化的文本块，但对于纯文本提取，"text" 即可
-                text_content += page.get_text("text", sort=True) or "" # sort=True尝试按阅读顺序排序
-            pdf_doc.close()
-        
-        elif file_extension == "docx":
-            docx_file = io.BytesIO(content)
-            doc = DocxDocument(docx_file)
-            for para in doc.paragraphs:
-                text_content += para.text + "\n"
-        
-        return ' '.join(text_content.split()) # 清理多余的空格和换行符
+class RenderedThumbnail(BaseModel):
+    data: bytes
+    media_type: str
+    width: int
+    height: int
+
+class ProcessedDocument(BaseModel):
+    """process_document 的结果：一次打开文档得到的全部内容"""
+    media_type: str
+    page_count: Optional[int] = None # DOCX 没有固定分页，为 None
+    pages: List[PageMetadata] = []
+    text_blocks: List[str] = [] # PDF 文本块 / DOCX 段落，按阅读顺序
+    raw_text: str = "" # 合并空白后的纯文本 (用于关键词匹配和嵌入)
+    layout_text: str = "" # 保留行结构的文本，每行一行、文本块之间空一行 (用于区段化)
+    thumbnails: Dict[str, RenderedThumbnail] = {} # 首页缩略图，按 THUMBNAIL_SIZES 的档位 (仅 PDF)
+
+
+def process_document(
+    content: Union[bytes, str], content_type: Optional[str], filename: Optional[str] = None, render_thumbnail: bool = True
+) -> ProcessedDocument:
+    """
+    单次处理简历文件：文档只打开一次，同时得到文本块、页面信息和首页缩略图。
+    content 可以是文件内容，也可以是 (暂存的) 文件路径；传入路径时由 PyMuPDF / python-docx 直接读取文件，
+    不需要先把整个文件读成 Python bytes。
+    CPU 密集的同步函数，应在工作线程中调用 (见 parse_resume_file 和 resume_ingestion)。
+    不支持的类型或无法解析的文件抛出 ValueError。
+    """
+    if content_type not in SUPPORTED_MIME_TYPES:
+        raise ValueError(f"Unsupported file type: {content_type}. Supported types are PDF and DOCX.")
 
+    try:
+        if SUPPORTED_MIME_TYPES[content_type] == "pdf":
+            processed = _process_pdf(content, render_thumbnail)
+        else:
+            processed = _process_docx(content)
     except Exception as e:
         # 可以记录更详细的日志
-        print(f"Error parsing file {file.filename}: {e}")
-        # 根据需要，可以选择抛出更具体的错误或返回空字符串/None
-        raise ValueError(f"Could not parse the uploaded file: {file.filename}. Error: {str(e)}")
-    
+        print(f"Error parsing file {filename}: {e}")
+        raise ValueError(f"Could not parse the uploaded file: {filename}. Error: {str(e)}")
 
-THUMBNAIL_WIDTH = 150 # 缩略图目标宽度 (像素)
-THUMBNAIL_HEIGHT = 200 # 缩略图目标高度 (像素) - 可根据简历常见比例调整
+    processed.raw_text = " ".join(" ".join(processed.text_blocks).split()) # 清理多余的空格和换行符
+    processed.layout_text = "\n\n".join(_normalize_block_lines(block) for block in processed.text_blocks)
+    return processed
 
 
-async def generate_pdf_thumbnail(pdf_content: bytes) -> Optional[Tuple[bytes, str]]:
-    print("[Thumbnail Service] Attempting to generate PDF thumbnail...") # 1. 函数进入点
-    doc = None # 初始化 doc，确保 finally 块中可用
-    try:
-        if not pdf_content:
-            print("[Thumbnail Service] PDF content is empty. Returning None.") # 2. 检查输入内容
-            return None
+def _normalize_block_lines(block: str) -> str:
+    """保留块内的换行，只合并每行内部的空白并去掉空行"""
+    return "\n".join(" ".join(line.split()) for line in block.splitlines() if line.strip())
 
-        print(f"[Thumbnail Service] Opening PDF from bytes (length: {len(pdf_content)})...") # 3. 尝试打开
-        doc = fitz.open(stream=pdf_content, filetype="pdf")
-        print(f"[Thumbnail Service] PDF opened. Number of pages: {len(doc)}") # 4. 页面数量
 
-        if len(doc) == 0:
-            print("[Thumbnail Service] PDF has no pages. Returning None.") # 5. 无页面处理
-            if doc: doc.close() # 确保关闭文档
-            return None
+def _process_pdf(content: Union[bytes, str], render_thumbnail: bool) -> ProcessedDocument:
+    processed = ProcessedDocument(media_type="application/pdf")
+    pdf_doc = fitz.open(content, filetype="pdf") if isinstance(content, str) else fitz.open(stream=content, filetype="pdf")
+    with pdf_doc:
+        processed.page_count = len(pdf_doc)
+        for page in pdf_doc:
+            # "blocks" 返回 (x0, y0, x1, y1, 文本, 块序号, 块类型)，块类型 0 为文本，sort=True 按阅读顺序排序
+            page_blocks = [
+                block[4].strip() for block in page.get_text("blocks", sort=True)
+                if block[6] == 0 and block[4].strip()
+            ]
+            processed.text_blocks.extend(page_blocks)
+            processed.pages.append(PageMetadata(
+                number=page.number + 1,
+                width=page.rect.width,
+                height=page.rect.height,
+                text_block_count=len(page_blocks),
+            ))
+            if render_thumbnail and page.number == 0:
+                for size_name, (max_width, max_height) in THUMBNAIL_SIZES.items():
+                    thumbnail = _render_page_thumbnail(page, max_width, max_height)
+                    if thumbnail:
+                        processed.thumbnails[size_name] = thumbnail
+    return processed
+
+
+def _process_docx(content: Union[bytes, str]) -> ProcessedDocument:
+    doc = DocxDocument(content if isinstance(content, str) else io.BytesIO(content))
+    return ProcessedDocument(
+        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        text_blocks=[para.text.strip() for para in doc.paragraphs if para.text.strip()],
+    )
 
-        page = doc[0] # 获取第一页
-        print("[Thumbnail Service] Got first page.") # 6. 获取首页
 
-        # 根据您的 THUMBNAIL_WIDTH 和 THUMBNAIL_HEIGHT 计算缩放
-        zoom_x = THUMBNAIL_WIDTH / page.rect.width if page.rect.width > 0 else 1
-        zoom_y = THUMBNAIL_HEIGHT / page.rect.height if page.rect.height > 0 else 1
-        zoom = min(zoom_x, zoom_y) 
+def _render_page_thumbnail(page, max_width: int, max_height: int) -> Optional[RenderedThumbnail]:
+    """把一页渲染为不超过 max_width x max_height 的 JPEG 缩略图；失败时返回 None，不影响文本提取"""
+    try:
+        # 按目标宽高计算缩放，保持页面比例
+        zoom_x = max_width / page.rect.width if page.rect.width > 0 else 1
+        zoom_y = max_height / page.rect.height if page.rect.height > 0 else 1
+        zoom = min(zoom_x, zoom_y)
         if zoom <= 0: # 防止 zoom 值为0或负数
             print(f"[Thumbnail Service] Invalid zoom factor calculated ({zoom}). Using zoom=1.")
             zoom = 1 # 使用一个安全的默认值
-        
-        print(f"[Thumbnail Service] Page rect: {page.rect}, Calculated zoom: {zoom}") # 7. 页面尺寸和缩放
 
-        matrix = fitz.Matrix(zoom, zoom)
-        print("[Thumbnail Service] Getting pixmap with matrix...") # 8. 尝试获取像素图
-        pix = page.get_pixmap(matrix=matrix, alpha=False)
-        print(f"[Thumbnail Service] Got pixmap (width: {pix.width}, height: {pix.height}). Converting to PNG bytes...") # 9. 获取成功
-
-        img_bytes = pix.tobytes("png") # 输出为 PNG 格式
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        img_bytes = pix.tobytes("jpeg", jpg_quality=THUMBNAIL_JPEG_QUALITY)
         if not img_bytes:
-            print("[Thumbnail Service] PNG bytes are empty after conversion. Returning None.") # 10. 检查转换结果
-            if doc: doc.close()
+            print("[Thumbnail Service] JPEG bytes are empty after conversion.")
             return None
-
-        print(f"[Thumbnail Service] PNG bytes generated (length: {len(img_bytes)}). Returning image data.") # 11. 成功返回
-        if doc: doc.close()
-        return img_bytes, "image/png"
+        print(f"[Thumbnail Service] Thumbnail generated ({pix.width}x{pix.height}, {len(img_bytes)} bytes).")
+        return RenderedThumbnail(data=img_bytes, media_type=THUMBNAIL_MEDIA_TYPE, width=pix.width, height=pix.height)
     except Exception as e:
-        print(f"[Thumbnail Service] Error generating PDF thumbnail: {e}") # 12. 捕获到异常
-        # 考虑打印更详细的堆栈跟踪信息进行调试
-        import traceback
-        print(traceback.format_exc())
-        if doc: doc.close() # 确保在异常情况下也关闭文档
+        print(f"[Thumbnail Service] Error generating PDF thumbnail: {e}")
         return None
-    # finally: # finally 块不是必须的，因为我们在 try 和 except 中都调用了 close
-    #     if doc:
-    #         print("[Thumbnail Service] Closing PDF document in finally.")
-    #         doc.close()
+
+
+async def parse_resume_file(file: UploadFile) -> str:
+    """
+    解析上传的简历文件 (PDF 或 DOCX) 并提取纯文本内容。
+    """
+    content = await file.read() # 读取文件内容为 bytes
+    await file.seek(0) # 重置文件指针，以防后续需要再次读取
+    processed = await asyncio.to_thread(process_document, content, file.content_type, file.filename, False)
+    return processed.raw_text
+
+
+async def generate_pdf_thumbnail(pdf_content: bytes) -> Optional[Tuple[bytes, str]]:
+    """生成 PDF 首页的默认尺寸缩略图，返回 (图片字节, 媒体类型)；失败时返回 None"""
+    if not pdf_content:
+        return None
+    try:
+        processed = await asyncio.to_thread(process_document, pdf_content, "application/pdf")
+    except ValueError:
+        return None
+    thumbnail = processed.thumbnails.get(DEFAULT_THUMBNAIL_SIZE)
+    if thumbnail is None:
+        return None
+    return thumbnail.data, thumbnail.media_type
 
 # --- 新增：简历区段化逻辑 ---
 SECTION_TITLE_KEYWORDS = {
@@ -145,10 +194,33 @@ CANONICAL_SECTION_KEYS = {
     "language proficiency": "languages"
 }
 
+def _build_section_header_index() -> Tuple["re.Pattern[str]", Dict[str, str]]:
+    """
+    把所有区段标题关键词合并为一个预编译的交替模式，并建立 小写标题 -> 标准化键名 的映射。
+    同一个关键词出现在多个区段时 (例如 "portfolio")，与逐个尝试时一样取第一次出现的区段。
+    """
+    title_to_key: Dict[str, str] = {}
+    for canonical_key, keywords_list in SECTION_TITLE_KEYWORDS.items():
+        for keyword in keywords_list:
+            title_to_key.setdefault(keyword.lower(), CANONICAL_SECTION_KEYS.get(keyword, canonical_key))
+    # 整行只能是标题本身，可带可选的冒号或各种破折号：^\s*(标题1|标题2|...)\s*[:\-\–—]?\s*$
+    alternation = "|".join(re.escape(title) for title in title_to_key)
+    pattern = re.compile(r"^\s*(?P<title>" + alternation + r")\s*[:\-\–—]?\s*$", re.IGNORECASE)
+    return pattern, title_to_key
+
+SECTION_HEADER_PATTERN, SECTION_TITLE_TO_KEY = _build_section_header_index()
+
+def match_section_header(line: str) -> Optional[str]:
+    """如果整行是一个区段标题，返回其标准化键名"""
+    match = SECTION_HEADER_PATTERN.fullmatch(line)
+    if match is None:
+        return None
+    return SECTION_TITLE_TO_KEY[match.group("title").lower()]
+
 def segment_text_into_sections(raw_text: str) -> Dict[str, str]:
     """
-    尝试将原始简历文本分割成不同的区段。
-    这是一个基于规则的简单实现。
+    尝试将简历文本分割成不同的区段。
+    这是一个基于规则的简单实现，需要保留行结构的文本 (ProcessedDocument.layout_text)。
     """
     if not raw_text or not raw_text.strip():
         return {}
@@ -159,29 +231,13 @@ def segment_text_into_sections(raw_text: str) -> Dict[str, str]:
     current_section_key: Optional[str] = None
     current_section_content: List[str] = []
     
-    # 构建一个扁平的 (原始标题小写, 标准化键名) 列表，用于匹配
-    header_patterns = []
-    for canonical_key, keywords_list in SECTION_TITLE_KEYWORDS.items():
-        for keyword in keywords_list:
-            # 为每个关键词创建一个不区分大小写的、匹配整行（可带冒号等）的正则表达式模式
-            # ^\s*keyword\s*[:\-\–—]?\s*$
-            # \s* 匹配任意空白符（包括没有）
-            # [:\-\–—]? 匹配可选的冒号或各种破折号
-            # $ 匹配行尾
-            pattern = re.compile(r"^\s*" + re.escape(keyword) + r"\s*[:\-\–—]?\s*$", re.IGNORECASE)
-            header_patterns.append((pattern, CANONICAL_SECTION_KEYS.get(keyword, canonical_key)))
-
     # 内容开始前的部分，可以放入 "header_details" 或 "unknown_initial"
     initial_content_key = "unknown_initial"
 
     for line in lines:
         cleaned_line = line.strip()
         
-        matched_section_key: Optional[str] = None
-        for pattern, key in header_patterns:
-            if pattern.fullmatch(cleaned_line): # 使用 fullmatch 确保整行都是标题
-                matched_section_key = key
-                break
+        matched_section_key = match_section_header(cleaned_line) # 一次匹配即可判断是否为任一区段标题
         
         if matched_section_key:
             # 找到了新的区段标题
@@ -210,4 +266,25 @@ def segment_text_into_sections(raw_text: str) -> Dict[str, str]:
     if initial_content_key in sections and not sections[initial_content_key]:
         del sections[initial_content_key]
         
-    return sections
\ No newline at end of file
+    return sections
+
+
+def extract_resume_content(
+    content: Union[bytes, str], content_type: Optional[str], filename: Optional[str]
+) -> Tuple[ProcessedDocument, Dict[str, str]]:
+    """
+    同步执行：提取文本和缩略图 (文档只打开一次)，并在保留行结构的文本上区段化。
+    返回 (处理结果, 区段字典)；文件无法解析时抛出 ValueError。
+    """
+    processed = process_document(content, content_type, filename)
+
+    parsed_sections: Dict[str, str] = {}
+    if processed.layout_text.strip(): # 仅当有文本时才尝试区段化
+        try:
+            parsed_sections = segment_text_into_sections(processed.layout_text)
+            print(f"[Resume Parser] Resume segmented. Found sections: {list(parsed_sections.keys())}")
+        except Exception as e_segment:
+            # 即使区段化失败，我们仍然保存原始文本，不中断解析流程
+            print(f"Warning: Error segmenting resume text for {filename}: {e_segment}")
+
+    return processed, parsed_sections
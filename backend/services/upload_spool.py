@@ -0,0 +1,97 @@
+# backend/services/upload_spool.py
+"""
+上传文件的暂存
+按块从 UploadFile 读取：不超过阈值的小文件保存在内存中；超过阈值时写入临时文件，
+解析器直接按路径打开 (PyMuPDF / python-docx 自行读取文件)，blob store 从文件流式写入，
+整个上传过程中不会在 Python 中持有多份完整的文件内容。超过上限时立即中止读取。
+读取的同时计算文件内容的 SHA-256，用于识别重复上传。
+"""
+import hashlib
+import io
+import os
+import tempfile
+from typing import BinaryIO, Optional, Union
+
+from fastapi import UploadFile
+
+UPLOAD_READ_CHUNK_SIZE = 256 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class SpooledUpload:
+    def __init__(self):
+        self.size = 0
+        self.content: Optional[bytes] = None # 小文件：内存中的内容
+        self.path: Optional[str] = None # 大文件：临时文件路径
+        self.sha256: Optional[str] = None # 文件内容的 SHA-256 (十六进制)
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """传给 process_document 的内容：bytes 或文件路径"""
+        return self.path if self.path is not None else self.content
+
+    def open(self) -> BinaryIO:
+        """以只读二进制流打开 (用于写入 blob store)"""
+        if self.path is not None:
+            return open(self.path, "rb")
+        return io.BytesIO(self.content)
+
+    def read_bytes(self) -> bytes:
+        if self.path is not None:
+            with open(self.path, "rb") as spooled_file:
+                return spooled_file.read()
+        return self.content
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def spool_upload(upload_file: UploadFile, max_size: int, spool_threshold: int) -> SpooledUpload:
+    """按块读取上传文件；超过 max_size 时抛出 UploadTooLargeError (此时不会读完整个文件)"""
+    spooled = SpooledUpload()
+    buffer = bytearray()
+    temp_file = None
+    digest = hashlib.sha256()
+    try:
+        while True:
+            chunk = await upload_file.read(UPLOAD_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            spooled.size += len(chunk)
+            if spooled.size > max_size:
+                raise UploadTooLargeError(f"File too large. Maximum allowed size is {max_size} bytes.")
+            digest.update(chunk)
+            if temp_file is None and spooled.size > spool_threshold:
+                temp_file = tempfile.NamedTemporaryFile(prefix="resume-upload-", delete=False)
+                spooled.path = temp_file.name
+                temp_file.write(buffer)
+                buffer = bytearray()
+            if temp_file is not None:
+                temp_file.write(chunk)
+            else:
+                buffer.extend(chunk)
+    except BaseException:
+        if temp_file is not None:
+            temp_file.close()
+        spooled.close()
+        raise
+    if temp_file is not None:
+        temp_file.close()
+    else:
+        spooled.content = bytes(buffer)
+    spooled.sha256 = digest.hexdigest()
+    return spooled
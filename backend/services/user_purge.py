@@ -0,0 +1,244 @@
+# backend/services/user_purge.py
+"""
+永久删除账户后的数据清理
+删除账户的接口只删除 User 文档并创建一个 UserPurgeJob，立即返回 202；
+UserPurgeWorker 在后台分批删除该用户的简历 (delete_many) 及其引用的 blob (原始文件和缩略图)，
+批次之间暂停 USER_PURGE_BATCH_DELAY_SECONDS，避免集中删除影响其他请求。
+
+每一批先删 blob 再删简历文档，进程在任意位置中断后重新处理都是幂等的：
+未完成的任务在启动时 (以及空闲时定期) 重新入队。多个 worker 进程通过任务上的租约
+(lease_expires_at) 保证同一任务同一时间只有一个进程在处理。
+失败的任务 (例如清理期间数据库暂时不可用) 按指数退避重试，最多尝试 USER_PURGE_MAX_ATTEMPTS 次。
+
+清理任务在删除 User 文档之前创建。开始清理前会确认账户确实已被删除：
+删除失败或进程在两步之间中断时，任务会被取消 (cancelled)，不会删除仍然存在的账户的数据。
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from beanie import PydanticObjectId
+from beanie.operators import In
+
+from backend.config import settings
+from backend.models.resume import Resume, ResumeSummaryView
+from backend.models.user import User
+from backend.models.user_purge_job import UserPurgeJob
+from backend.services.blob_store import blob_store
+
+PURGE_PENDING = "pending"
+PURGE_RUNNING = "running"
+PURGE_COMPLETED = "completed"
+PURGE_FAILED = "failed"
+PURGE_CANCELLED = "cancelled" # 账户没有被删除，不清理
+
+CANCELLED_USER_EXISTS = "User account still exists; purge cancelled."
+
+
+async def create_purge_job(user_id: PydanticObjectId) -> UserPurgeJob:
+    """为即将删除的用户创建清理任务；该用户已有任务时返回已有任务 (已取消的任务重新置为 pending)"""
+    existing = await UserPurgeJob.find_one(UserPurgeJob.user_id == user_id)
+    if existing is not None:
+        if existing.status == PURGE_CANCELLED:
+            now = datetime.now(timezone.utc)
+            await existing.set({
+                UserPurgeJob.status: PURGE_PENDING,
+                UserPurgeJob.error: None,
+                UserPurgeJob.attempts: 0,
+                UserPurgeJob.created_at: now,
+                UserPurgeJob.updated_at: now,
+            })
+        return existing
+    job = UserPurgeJob(user_id=user_id)
+    await job.insert()
+    return job
+
+
+async def cancel_purge_job(job_id: PydanticObjectId, reason: str) -> None:
+    """取消尚未开始的清理任务 (例如删除账户失败时)"""
+    now = datetime.now(timezone.utc)
+    await UserPurgeJob.find_one({"_id": job_id, "status": PURGE_PENDING}).update({"$set": {
+        "status": PURGE_CANCELLED,
+        "error": reason,
+        "lease_expires_at": None,
+        "updated_at": now,
+    }})
+
+
+class UserPurgeWorker:
+    def __init__(
+        self,
+        batch_size: int,
+        batch_delay_seconds: float,
+        lease_seconds: int,
+        max_attempts: int = 5,
+        retry_delay_seconds: int = 60,
+    ):
+        self.batch_size = batch_size
+        self.batch_delay_seconds = batch_delay_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        await self._requeue_unfinished()
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    async def submit(self, job_id: PydanticObjectId) -> None:
+        """提交清理任务；后台 worker 未启动时 (例如测试中) 直接在当前任务中处理"""
+        if not self.running:
+            await self.process(job_id)
+            return
+        await self._queue.put(job_id)
+
+    async def _requeue_unfinished(self) -> None:
+        unfinished = await UserPurgeJob.find({"$or": [
+            {"status": {"$in": [PURGE_PENDING, PURGE_RUNNING]}},
+            {"status": PURGE_FAILED, "attempts": {"$lt": self.max_attempts}},
+        ]}).to_list()
+        for job in unfinished:
+            await self._queue.put(job.id)
+        if unfinished:
+            print(f"[Purge Service] Queued {len(unfinished)} unfinished purge job(s).")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job_id = await asyncio.wait_for(self._queue.get(), timeout=self.lease_seconds)
+            except asyncio.TimeoutError:
+                # 空闲时检查是否有其他进程中断后留下、租约已过期的任务
+                await self._requeue_unfinished()
+                continue
+            try:
+                await self.process(job_id)
+            except Exception as e:
+                print(f"[Purge Service] Unexpected error while processing purge job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _claim(self, job_id: PydanticObjectId) -> bool:
+        """
+        把任务标记为由当前进程处理 (pending、租约已过期的 running，或到了重试时间且未超过尝试次数的 failed)；
+        已被其他进程处理、已结束或还不到重试时间时返回 False
+        """
+        now = datetime.now(timezone.utc)
+        update_result = await UserPurgeJob.find_one({
+            "_id": job_id,
+            "$or": [
+                {"status": PURGE_PENDING},
+                {"status": PURGE_RUNNING, "lease_expires_at": {"$lt": now}},
+                {"status": PURGE_FAILED, "attempts": {"$lt": self.max_attempts}, "lease_expires_at": {"$lt": now}},
+            ],
+        }).update({"$set": {
+            "status": PURGE_RUNNING,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+            "updated_at": now,
+        }})
+        return update_result is not None and update_result.modified_count == 1
+
+    async def process(self, job_id: PydanticObjectId) -> None:
+        if not await self._claim(job_id):
+            return
+        job = await UserPurgeJob.get(job_id)
+        if await User.get(job.user_id) is not None:
+            await self._release_for_existing_user(job_id)
+            return
+        try:
+            if job.resumes_total is None:
+                resumes_total = await Resume.find(Resume.user_id == job.user_id).count()
+                await self._update(job_id, {"$set": {"resumes_total": resumes_total}})
+            while await self._purge_batch(job):
+                await asyncio.sleep(self.batch_delay_seconds)
+        except Exception as e:
+            # 每一批都是幂等的，失败后从剩余的简历继续；lease_expires_at 记录下次重试的时间
+            retry_delay = self.retry_delay_seconds * 2 ** job.attempts
+            await self._update(job_id, {
+                "$set": {
+                    "status": PURGE_FAILED,
+                    "error": str(e),
+                    "lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=retry_delay),
+                },
+                "$inc": {"attempts": 1},
+            })
+            if job.attempts + 1 < self.max_attempts:
+                print(f"[Purge Service] Purge job {job_id} failed: {e}. Retrying in {retry_delay} seconds.")
+            else:
+                print(f"[Purge Service] Purge job {job_id} failed: {e}. Giving up after {self.max_attempts} attempt(s).")
+            raise
+        now = datetime.now(timezone.utc)
+        await self._update(job_id, {"$set": {"status": PURGE_COMPLETED, "error": None, "lease_expires_at": None, "completed_at": now}})
+        print(f"[Purge Service] Purge job {job_id} completed for user {job.user_id}.")
+
+    async def _release_for_existing_user(self, job_id: PydanticObjectId) -> None:
+        """
+        账户仍然存在时不清理。任务在删除账户之前创建，创建后 lease_seconds 内账户可能还在删除过程中：
+        此时把任务放回 pending，等删除完成后的提交 (或空闲时的重新入队) 再处理；超过这段时间则取消任务。
+        """
+        now = datetime.now(timezone.utc)
+        update_result = await UserPurgeJob.find_one({
+            "_id": job_id,
+            "created_at": {"$lt": now - timedelta(seconds=self.lease_seconds)},
+        }).update({"$set": {
+            "status": PURGE_CANCELLED,
+            "error": CANCELLED_USER_EXISTS,
+            "lease_expires_at": None,
+            "updated_at": now,
+        }})
+        if update_result is not None and update_result.modified_count == 1:
+            print(f"[Purge Service] Purge job {job_id} cancelled: the user account still exists.")
+            return
+        await self._update(job_id, {"$set": {"status": PURGE_PENDING, "lease_expires_at": None}})
+
+    async def _purge_batch(self, job: UserPurgeJob) -> bool:
+        """删除一批简历及其 blob；没有剩余简历时返回 False"""
+        resume_views: List[ResumeSummaryView] = await Resume.find(
+            Resume.user_id == job.user_id
+        ).sort(+Resume.id).limit(self.batch_size).project(ResumeSummaryView).to_list()
+        if not resume_views:
+            return False
+
+        # 同一用户的重复上传共享 blob (见 resume_ingestion.delete_resume_blobs)，这里整批去重后删除
+        blob_ids = set()
+        for resume_view in resume_views:
+            if resume_view.file_blob_id:
+                blob_ids.add(resume_view.file_blob_id)
+            blob_ids.update(ref.blob_id for ref in resume_view.thumbnails.values())
+        for blob_id in blob_ids:
+            await blob_store.delete(blob_id)
+
+        delete_result = await Resume.find(In(Resume.id, [resume_view.id for resume_view in resume_views])).delete()
+        resumes_deleted = delete_result.deleted_count if delete_result is not None else len(resume_views)
+        await self._update(job.id, {
+            "$inc": {"resumes_deleted": resumes_deleted, "blobs_deleted": len(blob_ids)},
+            "$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)},
+        })
+        return True
+
+    @staticmethod
+    async def _update(job_id: PydanticObjectId, update: dict) -> None:
+        update.setdefault("$set", {})["updated_at"] = datetime.now(timezone.utc)
+        await UserPurgeJob.find_one(UserPurgeJob.id == job_id).update(update)
+
+
+user_purge_worker = UserPurgeWorker(
+    settings.USER_PURGE_BATCH_SIZE,
+    settings.USER_PURGE_BATCH_DELAY_SECONDS,
+    settings.USER_PURGE_LEASE_SECONDS,
+    settings.USER_PURGE_MAX_ATTEMPTS,
+    settings.USER_PURGE_RETRY_DELAY_SECONDS,
+)
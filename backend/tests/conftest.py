@@ -17,6 +17,7 @@ from backend.config import settings # 您的配置
 from backend.models.user import User # 导入所有需要被 Beanie 初始化的模型
 from backend.models.resume import Resume
 from backend.models.processed_jd import ProcessedJD
+from backend.models.user_purge_job import UserPurgeJob
 
 # 为测试环境设置不同的数据库名称 (非常重要！)
 TEST_MONGO_DATABASE_NAME = "test_resume_align_db" 
@@ -64,7 +65,7 @@ async def initialize_test_database(db_client: AsyncIOMotorClient):
             # print(f"Initializing Beanie for test database: {TEST_MONGO_DATABASE_NAME} (function scope)...")
             await init_beanie(
                 database=test_db,
-                document_models=[User, Resume, ProcessedJD]
+                document_models=[User, Resume, ProcessedJD, UserPurgeJob]
             )
             # print("Beanie initialized for test database (function scope).")
     except Exception as e:
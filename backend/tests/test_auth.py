@@ -173,4 +173,169 @@ async def test_read_users_me_no_token(async_client: AsyncClient):
 # --- 您可以继续添加测试用例 ---
 # 例如：测试停用账户、重新激活账户等
 # async def test_deactivate_user(async_client: AsyncClient, test_user: dict): ...
-# async def test_reactivate_user(async_client: AsyncClient, test_user_registered_and_deactivated: dict): ...
\ No newline at end of file
+# async def test_reactivate_user(async_client: AsyncClient, test_user_registered_and_deactivated: dict): ...
+
+async def test_get_current_user_uses_cache_until_invalidated():
+    """缓存命中时不查询 users 集合；停用/删除账户后缓存失效，下次请求重新查询"""
+    from backend.core.security import create_access_token, get_current_user
+    from backend.core.user_cache import user_cache, invalidate_cached_user
+
+    user_id = ObjectId()
+    mock_user = MagicMock()
+    mock_user.id = user_id
+    mock_user.model_copy.return_value = mock_user
+    token = create_access_token(data={"sub": str(user_id)})
+
+    user_cache.clear()
+    with patch("backend.core.security.UserModel.get", AsyncMock(return_value=mock_user)) as mock_get:
+        first = await get_current_user(token)
+        second = await get_current_user(token)
+        assert mock_get.await_count == 1
+
+        await invalidate_cached_user(user_id)
+        third = await get_current_user(token)
+        assert mock_get.await_count == 2
+
+    assert first is second is third is mock_user
+    user_cache.clear()
+
+
+async def test_deactivate_updates_only_status_fields_of_cached_user():
+    """依赖注入的用户可能来自缓存：停用时只做部分更新，不用 save() 写回整个文档"""
+    current_user = MagicMock()
+    current_user.id = ObjectId()
+    current_user.is_active = True
+    current_user.set = AsyncMock()
+    current_user.save = AsyncMock()
+
+    with patch("backend.api.auth.invalidate_cached_user", AsyncMock()) as mock_invalidate, \
+         patch("backend.api.auth.UserRead"):
+        await deactivate_current_user(current_user)
+
+    current_user.save.assert_not_called()
+    update = current_user.set.await_args.args[0]
+    assert set(update) == {User.is_active, User.updated_at}
+    assert update[User.is_active] is False
+    mock_invalidate.assert_awaited_once_with(current_user.id)
+
+
+async def test_login_throttle_limits_failures_per_account_and_attempts_per_ip():
+    from backend.core.login_throttle import LoginThrottle, SlidingWindowLimiter
+
+    throttle = LoginThrottle(SlidingWindowLimiter(2, 60), SlidingWindowLimiter(3, 60))
+
+    # 同一账户连续失败 2 次后被限流 (邮箱大小写不影响)；成功登录清零
+    assert throttle.admit("a@example.com", "10.0.0.1") == 0
+    throttle.record_failure("a@example.com")
+    assert throttle.admit("A@example.com", "10.0.0.2") == 0
+    throttle.record_failure("A@example.com")
+    assert throttle.admit("a@example.com", "10.0.0.3") > 0
+    throttle.record_success("a@example.com")
+    assert throttle.admit("a@example.com", "10.0.0.4") == 0
+
+    # 同一 IP 尝试不同账户，超过 3 次后被限流
+    for i in range(3):
+        assert throttle.admit(f"user{i}@example.com", "10.0.0.9") == 0
+    assert throttle.admit("other@example.com", "10.0.0.9") > 0
+
+
+async def test_login_returns_429_when_throttled(async_client: AsyncClient):
+    from backend.core.login_throttle import login_throttle
+
+    with patch.object(login_throttle, "admit", return_value=42.5), \
+         patch("backend.api.auth.User.find_one", AsyncMock()) as mock_find_one:
+        response = await async_client.post(
+            f"{settings.API_V1_STR}/auth/login/token",
+            data={"username": "someone@example.com", "password": "guess"}
+        )
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["retry-after"] == "43"
+    mock_find_one.assert_not_called()
+
+
+async def test_verify_and_update_password_rehashes_when_rounds_change():
+    """已有哈希的 bcrypt 成本与配置不同时，验证成功后返回按当前成本计算的新哈希"""
+    from passlib.hash import bcrypt
+    from backend.core.security import verify_and_update_password
+
+    old_hash = bcrypt.using(rounds=4).hash("s3cret-password")
+    verified, new_hash = await verify_and_update_password("s3cret-password", old_hash)
+    assert verified
+    assert new_hash is not None and f"${settings.BCRYPT_ROUNDS:02d}$" in new_hash
+
+    verified, unchanged = await verify_and_update_password("s3cret-password", new_hash)
+    assert verified and unchanged is None
+
+    verified, _ = await verify_and_update_password("wrong-password", old_hash)
+    assert not verified
+
+
+async def test_cancelled_queued_hash_does_not_keep_logins_busy():
+    """排队中的密码哈希被取消 (例如客户端断开) 后排队计数随之恢复，登录不会一直返回 503"""
+    import asyncio
+    import threading
+    from fastapi import HTTPException
+    from backend.api.auth import _admit_login_attempt
+    from backend.core.security import hash_password
+    from backend.services.inference_executor import InferenceExecutor
+
+    executor = InferenceExecutor(max_workers=1, thread_name_prefix="password-hash")
+    release = threading.Event()
+    request = MagicMock()
+    request.client.host = "10.0.0.50"
+    try:
+        with patch("backend.core.security.password_hash_executor", executor), \
+             patch("backend.api.auth.password_hash_executor", executor), \
+             patch.object(settings, "PASSWORD_HASH_MAX_QUEUE", 2):
+            blocker = asyncio.create_task(executor.run(release.wait, 5))
+            queued = [asyncio.create_task(hash_password("s3cret-password")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(HTTPException) as busy:
+                _admit_login_attempt("queued@example.com", request)
+            assert busy.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+            for task in queued:
+                task.cancel()
+            await asyncio.gather(*queued, return_exceptions=True)
+            _admit_login_attempt("queued@example.com", request) # 不再返回 503
+
+            release.set()
+            await blocker
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+async def test_list_users_paginates_with_projection_and_exports_ndjson(async_client: AsyncClient):
+    """用户列表按 _id 分页并使用不含 hashed_password 的投影；导出接口分批读取并返回 NDJSON"""
+    from datetime import datetime, timezone
+    from backend.core.security import get_current_active_user
+    from backend.models.user import UserListView
+
+    now = datetime.now(timezone.utc)
+    views = [
+        UserListView(_id=ObjectId(), email=f"user{i}@example.com", created_at=now, updated_at=now)
+        for i in range(3)
+    ]
+    mock_user_model = MagicMock()
+    mock_query = mock_user_model.find.return_value.sort.return_value.limit.return_value.project
+    mock_query.return_value.to_list = AsyncMock(return_value=views)
+
+    app.dependency_overrides = {get_current_active_user: lambda: MagicMock()}
+    with patch("backend.api.auth.User", mock_user_model), \
+         patch.object(settings, "USER_EXPORT_BATCH_SIZE", 5):
+        response = await async_client.get(f"{settings.API_V1_STR}/auth/users?limit=2")
+        export_response = await async_client.get(f"{settings.API_V1_STR}/auth/users/export")
+    app.dependency_overrides = {}
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert [item["email"] for item in body] == ["user0@example.com", "user1@example.com"]
+    assert all("hashed_password" not in item for item in body)
+    assert response.headers["x-next-cursor"] == str(views[1].id)
+    mock_query.assert_called_with(UserListView)
+
+    assert export_response.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in export_response.text.splitlines()]
+    assert [item["email"] for item in exported] == [view.email for view in views]
@@ -0,0 +1,39 @@
+"""
+启动时查询计划检查的测试
+"""
+# backend/tests/test_index_audit.py
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.utils.index_audit import audit_hot_path_queries, hot_path_queries, winning_plan_uses_collection_scan
+
+pytestmark = pytest.mark.asyncio
+
+IXSCAN_EXPLAIN = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "user_id_id_index"}}}}
+# MongoDB 7 的 SBE 计划把计划树放在 queryPlan 下
+COLLSCAN_EXPLAIN = {"queryPlanner": {"winningPlan": {"queryPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}}
+
+
+async def test_winning_plan_detection():
+    assert not winning_plan_uses_collection_scan(IXSCAN_EXPLAIN)
+    assert winning_plan_uses_collection_scan(COLLSCAN_EXPLAIN)
+    assert winning_plan_uses_collection_scan({"queryPlanner": {"winningPlan": {"stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}})
+
+
+async def test_audit_reports_collection_scans():
+    """只有 resumes 集合缺少索引时，只报告 resumes 上的查询"""
+    def make_cursor(collection_name):
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.explain = AsyncMock(return_value=COLLSCAN_EXPLAIN if collection_name == "resumes" else IXSCAN_EXPLAIN)
+        return cursor
+
+    collections = {}
+    database = MagicMock()
+    database.__getitem__.side_effect = lambda name: collections.setdefault(name, MagicMock(find=MagicMock(return_value=make_cursor(name))))
+
+    collection_scans = await audit_hot_path_queries(database)
+
+    expected = [query.name for query in hot_path_queries() if query.collection == "resumes"]
+    assert collection_scans == expected
@@ -0,0 +1,76 @@
+"""
+JD 去重服务测试
+mock 掉数据库和关键词提取，只验证哈希去重与 single-flight 行为
+"""
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from backend.services import jd_service
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_content_hash_ignores_whitespace_differences():
+    a = "Senior Python Engineer\n\n  Requirements:\tFastAPI, MongoDB"
+    b = "Senior Python Engineer Requirements: FastAPI, MongoDB"
+    assert jd_service.compute_jd_content_hash(a) == jd_service.compute_jd_content_hash(b)
+    assert jd_service.compute_jd_content_hash(a) != jd_service.compute_jd_content_hash(b + " React")
+
+
+async def test_existing_jd_is_returned_without_extraction():
+    existing = MagicMock()
+    with patch.object(jd_service, "_find_and_touch", AsyncMock(return_value=existing)), \
+         patch.object(jd_service, "_extract_and_insert", AsyncMock()) as mock_extract:
+        result = await jd_service.get_or_create_processed_jd("Some job description text " * 5)
+
+    assert result is existing
+    mock_extract.assert_not_called()
+
+
+async def test_concurrent_first_requests_are_single_flighted():
+    created = MagicMock()
+    extraction_started = asyncio.Event()
+
+    async def slow_extract(jd_text, content_hash):
+        extraction_started.set()
+        await asyncio.sleep(0.05)
+        return created
+
+    with patch.object(jd_service, "_find_and_touch", AsyncMock(return_value=None)), \
+         patch.object(jd_service, "_extract_and_insert", side_effect=slow_extract) as mock_extract:
+        results = await asyncio.gather(*[
+            jd_service.get_or_create_processed_jd("Backend engineer with Go and Kubernetes " * 3)
+            for _ in range(5)
+        ])
+
+    assert all(result is created for result in results)
+    assert mock_extract.call_count == 1
+    assert jd_service._inflight_extractions == {}
+
+
+async def test_batch_extracts_only_missing_unique_jds_in_order():
+    known_text = "Data engineer with Spark and Airflow experience " * 2
+    new_text = "Frontend developer with React and TypeScript skills " * 2
+    known_doc = MagicMock(content_hash=jd_service.compute_jd_content_hash(known_text))
+
+    mock_jd_model = MagicMock()
+    mock_jd_model.find.return_value.update_many = AsyncMock()
+    mock_jd_model.find.return_value.to_list = AsyncMock(return_value=[known_doc])
+
+    async def fake_insert(jd_text, content_hash, keywords):
+        return MagicMock(content_hash=content_hash, keywords=keywords)
+
+    with patch.object(jd_service, "ProcessedJD", mock_jd_model), \
+         patch.object(jd_service, "In", MagicMock()), \
+         patch.object(jd_service, "_insert_processed_jd", side_effect=fake_insert), \
+         patch.object(jd_service, "run_inference", AsyncMock(return_value=[["react", "typescript"]])) as mock_run:
+        results = await jd_service.get_or_create_processed_jds([new_text, known_text, new_text + "  "], 8)
+
+    # 请求内重复的 JD 只提取一次，已存在的 JD 不提取
+    mock_run.assert_awaited_once()
+    assert mock_run.await_args.args[1] == [new_text]
+    assert results[1] is known_doc
+    assert results[0] is results[2]
+    assert results[0].keywords == ["react", "typescript"]
+    assert jd_service._inflight_extractions == {}
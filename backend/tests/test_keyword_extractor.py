@@ -0,0 +1,48 @@
+"""
+关键词提取后期过滤的测试
+包含关系去重改为基于词元索引实现后，结果必须与原先的逐对比较实现完全一致
+"""
+import random
+
+from backend.services.keyword_extractor import drop_keywords_contained_in_longer
+
+
+def _reference_dedup(final_keywords_set):
+    # 原 extract_keywords_from_jd 中的 O(n²) 实现，原样保留作为对照
+    final_keywords_list = sorted(list(final_keywords_set), key=len, reverse=True)
+    deduplicated_keywords = []
+    for kw_long in final_keywords_list:
+        is_sub_part_of_already_added = False
+        for kw_added in deduplicated_keywords:
+            if kw_long in kw_added:
+                if kw_long != kw_added and kw_long in kw_added.split():
+                    is_sub_part_of_already_added = True
+                    break
+        if not is_sub_part_of_already_added:
+            temp_dedup_list = []
+            for kw_added in deduplicated_keywords:
+                if kw_added != kw_long and kw_added in kw_long.split():
+                    pass
+                else:
+                    temp_dedup_list.append(kw_added)
+            deduplicated_keywords = temp_dedup_list
+            deduplicated_keywords.append(kw_long)
+    return sorted(list(set(deduplicated_keywords)))
+
+
+def test_longer_phrase_absorbs_its_words_but_not_substrings():
+    keywords = {"java", "java developer", "py", "python", "machine learning", "learning"}
+    assert drop_keywords_contained_in_longer(keywords) == ["java developer", "machine learning", "py", "python"]
+
+
+def test_matches_reference_implementation_on_random_inputs():
+    # 小词表 + 随机组合，保证大量的词元重叠、前缀/子串关系以及多余空白
+    vocabulary = ["java", "py", "python", "data", "science", "c++", "go", "golang", "ml", "react", "js", "a"]
+    rng = random.Random(20261018)
+    for _ in range(500):
+        keywords = set()
+        for _ in range(rng.randint(0, 30)):
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 4))]
+            separator = rng.choice([" ", " ", " ", "  ", "\t"])
+            keywords.add(separator.join(words))
+        assert drop_keywords_contained_in_longer(keywords) == _reference_dedup(keywords)
@@ -76,4 +76,45 @@ async def test_get_suggestions(mock_db, async_client: AsyncClient):
             assert "prompt_used" in data
     
     # 清理依赖项覆盖
-    app.dependency_overrides = {}
\ No newline at end of file
+    app.dependency_overrides = {}
+
+async def test_match_resumes_fetches_all_resumes_in_one_query(async_client: AsyncClient):
+    """匹配接口一次 $in 查询取回所有简历，并按请求顺序返回结果"""
+    mock_user = MagicMock(spec=User)
+    mock_user.id = ObjectId()
+    first_id, second_id, missing_id = ObjectId(), ObjectId(), ObjectId()
+
+    def make_view(resume_id, title):
+        view = MagicMock()
+        view.id = resume_id
+        view.title = title
+        view.original_file_name = f"{title}.pdf"
+        view.raw_text_content = "Python developer with FastAPI experience."
+        return view
+
+    mock_jd = MagicMock(spec=ProcessedJD)
+    mock_jd.jd_text = "Backend engineer"
+    mock_jd.keywords = ["python"]
+
+    mock_resume_model = MagicMock()
+    # 数据库返回顺序与请求顺序不同
+    mock_resume_model.find.return_value.project.return_value.to_list = AsyncMock(
+        return_value=[make_view(second_id, "second"), make_view(first_id, "first")]
+    )
+
+    app.dependency_overrides = {get_current_active_user: lambda: mock_user}
+    with patch("backend.api.matching.ProcessedJD.get", AsyncMock(return_value=mock_jd)), \
+         patch("backend.api.matching.get_jd_keyword_embeddings", AsyncMock(return_value=None)), \
+         patch("backend.api.matching.Resume", mock_resume_model), \
+         patch("backend.api.matching.In", MagicMock()), \
+         patch("backend.api.matching.ensure_resume_embeddings", AsyncMock(return_value=None)), \
+         patch("backend.api.matching.run_inference", AsyncMock(return_value=(100.0, []))):
+        response = await async_client.post(
+            f"{settings.API_V1_STR}/matching/match-resumes",
+            json={"jd_id": str(ObjectId()), "resume_ids": [str(first_id), str(missing_id), str(second_id)]}
+        )
+    app.dependency_overrides = {}
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [r["resume_title"] for r in response.json()["match_results"]] == ["first", "second"]
+    mock_resume_model.find.assert_called_once()
@@ -0,0 +1,239 @@
+"""
+匹配服务的单元测试
+使用模拟的 SentenceTransformer，不依赖真实模型
+"""
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+import pytest
+import torch
+
+from backend.services import matching_service
+
+
+def _fake_sbert_model(vectors_by_text):
+    """构造一个按文本返回固定向量的假模型"""
+    fake_model = MagicMock()
+
+    def fake_encode(texts, convert_to_tensor=True):
+        if isinstance(texts, str):
+            return torch.tensor(vectors_by_text.get(texts, [0.0, 0.0, 1.0]))
+        return torch.tensor([vectors_by_text.get(text, [0.0, 0.0, 1.0]) for text in texts])
+
+    fake_model.encode.side_effect = fake_encode
+    return fake_model
+
+
+def test_batched_match_details_flags_direct_and_semantic_hits():
+    resume_text = "I build web services with Python. I also deploy containers to the cloud."
+    vectors = {
+        "I build web services with Python.": [1.0, 0.0, 0.0],
+        "I also deploy containers to the cloud.": [0.0, 1.0, 0.0],
+        "docker": [0.1, 0.9, 0.0],        # 与第二句语义接近
+        "agile methodology": [0.0, 0.0, 1.0], # 与任何句子都不相似
+    }
+    fake_model = _fake_sbert_model(vectors)
+
+    with patch.object(matching_service, "sbert_model", fake_model), \
+         patch.object(matching_service, "sent_tokenize", side_effect=lambda text: list(vectors)[:2]):
+        score, details = matching_service.calculate_batched_match_details(
+            resume_text, ["python", "docker", "agile methodology"], similarity_threshold=0.5
+        )
+
+    by_keyword = {detail["keyword"]: detail for detail in details}
+    assert by_keyword["python"]["direct_match"] is True
+    assert by_keyword["python"]["similarity"] is None
+    assert by_keyword["docker"]["semantic_match"] is True
+    assert by_keyword["agile methodology"]["direct_match"] is False
+    assert by_keyword["agile methodology"]["semantic_match"] is False
+    assert score == round(2 / 3 * 100.0, 2)
+
+    # 简历句子和未命中的关键词各只编码一次 (批量)
+    assert fake_model.encode.call_count == 2
+
+
+def test_batched_match_score_agrees_with_per_keyword_scoring():
+    resume_text = "Experienced with Python and Docker. Worked with AWS cloud services."
+    vectors = {
+        "Experienced with Python and Docker.": [1.0, 0.0, 0.0],
+        "Worked with AWS cloud services.": [0.0, 1.0, 0.0],
+        "amazon web services": [0.2, 0.8, 0.0],
+        "scrum": [0.0, 0.0, 1.0],
+    }
+    fake_model = _fake_sbert_model(vectors)
+    keywords = ["python", "docker", "amazon web services", "scrum"]
+
+    with patch.object(matching_service, "sbert_model", fake_model), \
+         patch.object(matching_service, "sent_tokenize", side_effect=lambda text: list(vectors)[:2]):
+        batched_score = matching_service.calculate_batched_match_score(resume_text, keywords)
+        per_keyword_score = matching_service.calculate_combined_match_score(resume_text, keywords)
+
+    assert batched_score == per_keyword_score == 75.0
+
+
+def test_stored_resume_embeddings_skip_resume_encoding():
+    sentences = ["I build web services with Python.", "I also deploy containers to the cloud."]
+    stored = matching_service.SentenceEmbeddings(
+        model_name=matching_service.settings.SBERT_MODEL_NAME,
+        model_version=matching_service.settings.SBERT_MODEL_VERSION,
+        dim=3,
+        sentences=sentences,
+        vectors=matching_service.pack_embedding_matrix(
+            np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        ),
+    )
+    fake_model = _fake_sbert_model({"docker": [0.1, 0.9, 0.0]})
+
+    with patch.object(matching_service, "sbert_model", fake_model), \
+         patch.object(matching_service, "sent_tokenize") as mock_sent_tokenize:
+        score, details = matching_service.calculate_batched_match_details(
+            " ".join(sentences), ["docker"], resume_embeddings=stored
+        )
+
+    mock_sent_tokenize.assert_not_called()
+    assert fake_model.encode.call_count == 1 # 只编码了JD关键词
+    assert details[0]["semantic_match"] is True
+    assert score == 100.0
+
+
+def test_embeddings_from_other_model_version_are_stale():
+    stale = matching_service.SentenceEmbeddings(
+        model_name=matching_service.settings.SBERT_MODEL_NAME,
+        model_version=matching_service.settings.SBERT_MODEL_VERSION + "-old",
+        dim=3,
+        sentences=["Python developer."],
+        vectors=matching_service.pack_embedding_matrix(np.zeros((1, 3))),
+    )
+    assert matching_service.is_embedding_current(stale) is False
+    assert matching_service.is_embedding_current(None) is False
+
+
+def test_jd_keyword_embedding_cache_evicts_and_expires():
+    from datetime import datetime, timedelta, timezone
+    from backend.services.jd_embedding_cache import JDKeywordEmbeddingCache
+
+    cache = JDKeywordEmbeddingCache(max_entries=2)
+    future = datetime.now(timezone.utc) + timedelta(hours=1)
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    keywords = ("docker", "python")
+    matrix = torch.zeros((2, 3))
+
+    cache.put("jd-1", keywords, matrix, future)
+    cache.put("jd-2", keywords, matrix, future)
+    assert cache.get("jd-1", keywords) is matrix # jd-1 变为最近使用
+    cache.put("jd-3", keywords, matrix, future)
+    assert cache.get("jd-2", keywords) is None # 最久未使用的被淘汰
+    assert cache.get("jd-1", ("python",)) is None # 关键词不一致视为未命中
+
+    cache.put("jd-expired", keywords, matrix, past.replace(tzinfo=None)) # 模拟 MongoDB 返回的无时区时间
+    assert cache.get("jd-expired", keywords) is None
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_runs_off_loop_and_records_metrics():
+    import threading
+    from backend.services.inference_executor import InferenceExecutor
+
+    executor = InferenceExecutor(max_workers=1)
+    try:
+        loop_thread = threading.current_thread().name
+        thread_name = await executor.run(lambda: threading.current_thread().name)
+        assert thread_name != loop_thread
+        assert thread_name.startswith("inference")
+
+        assert await executor.run(sorted, [3, 1, 2], reverse=True) == [3, 2, 1]
+
+        metrics = executor.metrics()
+        assert metrics["completed"] == 2
+        assert metrics["queue_depth"] == 0
+        assert metrics["running"] == 0
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_inference_executor_queue_depth_survives_cancelled_calls():
+    """排队中的调用被取消后，排队计数随之减少，不会永久偏高"""
+    import asyncio
+    import threading
+    from backend.services.inference_executor import InferenceExecutor
+
+    executor = InferenceExecutor(max_workers=1)
+    release = threading.Event()
+    try:
+        blocker = asyncio.create_task(executor.run(release.wait, 5))
+        queued = [asyncio.create_task(executor.run(sorted, [2, 1])) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        assert executor.queue_depth == 5
+
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        assert executor.queue_depth == 0
+
+        release.set()
+        assert await blocker is True
+        assert await executor.run(sorted, [2, 1]) == [1, 2]
+        assert executor.metrics()["queue_depth"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_encode_batcher_merges_concurrent_requests():
+    import asyncio
+    from backend.services.encode_batcher import EncodeBatcher
+
+    calls = []
+
+    def fake_encode(texts):
+        calls.append(list(texts))
+        return np.array([[float(len(text))] for text in texts])
+
+    batcher = EncodeBatcher(fake_encode, max_batch_size=100, max_wait_ms=50)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.encode(["a", "bb"]),
+            batcher.encode(["ccc"]),
+            batcher.encode(["dddd", "eeeee"]),
+        )
+    finally:
+        await batcher.stop()
+
+    assert len(calls) == 1 # 三个请求合并成一次前向计算
+    assert [row[0] for row in results[0]] == [1.0, 2.0]
+    assert [row[0] for row in results[1]] == [3.0]
+    assert [row[0] for row in results[2]] == [4.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_encode_batcher_stop_completes_pending_requests():
+    """停止时仍在收集窗口或队列中的请求会被计算完，而不是一直等待"""
+    import asyncio
+    from backend.services.encode_batcher import EncodeBatcher
+
+    def fake_encode(texts):
+        return np.array([[float(len(text))] for text in texts])
+
+    batcher = EncodeBatcher(fake_encode, max_batch_size=100, max_wait_ms=60_000)
+    await batcher.start()
+    pending = [asyncio.create_task(batcher.encode(["a"])), asyncio.create_task(batcher.encode(["bb", "ccc"]))]
+    await asyncio.sleep(0.01)
+    await batcher.stop()
+
+    results = await asyncio.wait_for(asyncio.gather(*pending), timeout=5)
+    assert [row[0] for row in results[0]] == [1.0]
+    assert [row[0] for row in results[1]] == [2.0, 3.0]
+
+
+def test_keyword_automaton_respects_word_boundaries():
+    from backend.services.keyword_automaton import KeywordAutomaton
+
+    automaton = KeywordAutomaton(("go", "c", "c++", "r", "node.js", "machine learning"))
+    matched = automaton.find_matches("Good communicator. Built services in C++ and Node.js with Machine Learning.")
+    assert matched == {"c++", "node.js", "machine learning"}
+
+    matched = automaton.find_matches("Languages: Go, R, C.")
+    assert matched == {"go", "r", "c"}
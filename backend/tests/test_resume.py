@@ -67,4 +67,394 @@ async def test_list_user_resumes(async_client: AsyncClient, test_user: dict):
     assert isinstance(resumes_list, list)
     assert len(resumes_list) > 0 # 假设之前至少上传了一个
 
-# ... 更多简历相关的测试：获取单个、删除、数量限制等 ...
\ No newline at end of file
+# ... 更多简历相关的测试：获取单个、删除、数量限制等 ...
+
+
+async def test_download_streams_file_from_blob_store(async_client: AsyncClient):
+    """下载接口从 blob store 逐块读取，而不是从简历文档中读取整个文件"""
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.app import app
+    from backend.core.security import get_current_active_user
+    from backend.services.blob_store import BlobStream
+
+    mock_user = MagicMock()
+    mock_user.id = ObjectId()
+    mock_resume = MagicMock(spec=Resume)
+    mock_resume.user_id = mock_user.id
+    mock_resume.file_blob_id = str(ObjectId())
+    mock_resume.file_media_type = "application/pdf"
+    mock_resume.original_file_name = "cv.pdf"
+
+    chunks = [b"%PDF-1.4 ", b"chunk-2 ", b"chunk-3"]
+
+    async def iter_chunks():
+        for chunk in chunks:
+            yield chunk
+
+    mock_blob_store = MagicMock()
+    mock_blob_store.open_stream = AsyncMock(return_value=BlobStream(sum(map(len, chunks)), iter_chunks()))
+
+    app.dependency_overrides = {get_current_active_user: lambda: mock_user}
+    with patch("backend.api.resume.Resume.get", AsyncMock(return_value=mock_resume)), \
+         patch("backend.api.resume.blob_store", mock_blob_store):
+        response = await async_client.get(f"{settings.API_V1_STR}/resumes/{ObjectId()}/file")
+    app.dependency_overrides = {}
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b"".join(chunks)
+    assert response.headers["content-length"] == str(len(b"".join(chunks)))
+    mock_blob_store.open_stream.assert_awaited_once_with(mock_resume.file_blob_id)
+
+
+async def test_list_resumes_paginates_with_summary_projection(async_client: AsyncClient):
+    """列表默认使用摘要投影，并通过 X-Next-Cursor 返回下一页游标"""
+    from datetime import datetime, timezone
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.app import app
+    from backend.core.security import get_current_active_user
+    from backend.models.resume import ResumeSummaryView
+
+    mock_user = MagicMock()
+    mock_user.id = ObjectId()
+    now = datetime.now(timezone.utc)
+    views = [
+        ResumeSummaryView(_id=ObjectId(), user_id=mock_user.id, title=f"CV {i}", uploaded_at=now, updated_at=now)
+        for i in range(3)
+    ]
+
+    mock_resume_model = MagicMock()
+    mock_query = mock_resume_model.find.return_value.sort.return_value.limit.return_value.project
+    mock_query.return_value.to_list = AsyncMock(return_value=views)
+
+    app.dependency_overrides = {get_current_active_user: lambda: mock_user}
+    with patch("backend.api.resume.Resume", mock_resume_model):
+        response = await async_client.get(f"{settings.API_V1_STR}/resumes/?limit=2")
+        bad_fields_response = await async_client.get(f"{settings.API_V1_STR}/resumes/?fields=file_content")
+    app.dependency_overrides = {}
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert [item["title"] for item in body] == ["CV 0", "CV 1"]
+    assert body[0]["raw_text_content"] is None
+    assert response.headers["x-next-cursor"] == str(views[1].id)
+    mock_query.assert_called_with(ResumeSummaryView)
+    assert bad_fields_response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_async_upload_returns_job_and_defers_parsing(async_client: AsyncClient):
+    """异步模式只保存文件并返回 202，解析交给后台 worker"""
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.app import app
+    from backend.core.security import get_current_active_user
+
+    mock_user = MagicMock()
+    mock_user.id = ObjectId()
+    resume_id = ObjectId()
+
+    mock_resume_model = MagicMock()
+    mock_resume_model.find.return_value.count = AsyncMock(return_value=0)
+    mock_resume_model.return_value.id = resume_id
+    mock_resume_model.return_value.insert = AsyncMock()
+
+    mock_blob_store = MagicMock()
+    mock_blob_store.put = AsyncMock(return_value=str(ObjectId()))
+    mock_pool = MagicMock()
+    mock_pool.submit = AsyncMock()
+    mock_pool.run_extraction = AsyncMock()
+
+    app.dependency_overrides = {get_current_active_user: lambda: mock_user}
+    with patch("backend.api.resume.Resume", mock_resume_model), \
+         patch("backend.api.resume.blob_store", mock_blob_store), \
+         patch("backend.api.resume.resume_ingestion_pool", mock_pool), \
+         patch("backend.api.resume.find_reusable_resume", AsyncMock(return_value=None)):
+        response = await async_client.post(
+            f"{settings.API_V1_STR}/resumes/upload?processing_mode=async",
+            files={'resume_file': ('async.pdf', io.BytesIO(b"%PDF-1.4 dummy"), 'application/pdf')}
+        )
+    app.dependency_overrides = {}
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    body = response.json()
+    assert body["job_id"] == str(resume_id)
+    assert body["status"] == "pending"
+    assert body["status_url"].endswith(f"/resumes/{resume_id}/status")
+    mock_pool.submit.assert_awaited_once_with(resume_id)
+    mock_pool.run_extraction.assert_not_called()
+
+
+async def test_thumbnail_revalidation_returns_304_without_reading_blob(async_client: AsyncClient):
+    """If-None-Match 命中时返回 304，不打开缩略图 blob"""
+    from datetime import datetime, timezone
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.models.resume import ResumeThumbnailView, ThumbnailRef
+    from backend.services.blob_store import BlobStream
+
+    resume_view = ResumeThumbnailView(
+        _id=ObjectId(),
+        thumbnails={"sidebar": ThumbnailRef(blob_id=str(ObjectId()), media_type="image/jpeg", width=141, height=200, content_hash="ab" * 32)},
+        updated_at=datetime(2026, 10, 18, tzinfo=timezone.utc),
+    )
+
+    async def iter_chunks():
+        yield b"\xff\xd8jpeg"
+
+    mock_blob_store = MagicMock()
+    mock_blob_store.open_stream = AsyncMock(return_value=BlobStream(6, iter_chunks()))
+    mock_resume_model = MagicMock()
+    mock_resume_model.find_one.return_value.project = AsyncMock(return_value=resume_view)
+
+    url = f"{settings.API_V1_STR}/resumes/{resume_view.id}/thumbnail"
+    with patch("backend.api.resume.Resume", mock_resume_model), \
+         patch("backend.api.resume.blob_store", mock_blob_store):
+        first = await async_client.get(url)
+        etag = first.headers["etag"]
+        second = await async_client.get(url, headers={"If-None-Match": etag})
+        unknown_size = await async_client.get(url + "?size=huge")
+
+    assert first.status_code == status.HTTP_200_OK
+    assert first.headers["content-type"] == "image/jpeg"
+    assert "max-age" in first.headers["cache-control"]
+    assert second.status_code == status.HTTP_304_NOT_MODIFIED
+    assert second.headers["etag"] == etag
+    mock_blob_store.open_stream.assert_awaited_once()
+    assert unknown_size.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_upload_rejects_oversized_body_with_413(async_client: AsyncClient):
+    """Content-Length 超过上限时由中间件直接返回 413，不进入上传接口"""
+    from unittest.mock import patch, MagicMock
+    from backend.core.upload_limit import MULTIPART_OVERHEAD_BYTES
+
+    mock_blob_store = MagicMock()
+    oversized = b"0" * (settings.MAX_UPLOAD_SIZE_BYTES + MULTIPART_OVERHEAD_BYTES + 1)
+    with patch("backend.api.resume.blob_store", mock_blob_store):
+        response = await async_client.post(
+            f"{settings.API_V1_STR}/resumes/upload",
+            files={'resume_file': ('huge.pdf', io.BytesIO(oversized), 'application/pdf')}
+        )
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    mock_blob_store.put.assert_not_called()
+
+
+async def test_upload_rejects_oversized_chunked_body_with_413(async_client: AsyncClient):
+    """没有 Content-Length (chunked) 的请求体在接收过程中超过上限时同样返回 413，而不是表单解析失败的 400"""
+    from unittest.mock import patch, MagicMock
+    from backend.core.upload_limit import MULTIPART_OVERHEAD_BYTES
+
+    chunk = b"0" * (256 * 1024)
+    chunk_count = (settings.MAX_UPLOAD_SIZE_BYTES + MULTIPART_OVERHEAD_BYTES) // len(chunk) + 2
+
+    async def chunked_body():
+        yield (
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="resume_file"; filename="huge.pdf"\r\n'
+            b"Content-Type: application/pdf\r\n\r\n"
+        )
+        for _ in range(chunk_count):
+            yield chunk
+        yield b"\r\n--boundary--\r\n"
+
+    mock_blob_store = MagicMock()
+    with patch("backend.api.resume.blob_store", mock_blob_store):
+        response = await async_client.post(
+            f"{settings.API_V1_STR}/resumes/upload",
+            content=chunked_body(),
+            headers={"content-type": "multipart/form-data; boundary=boundary"}
+        )
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    mock_blob_store.put.assert_not_called()
+
+
+async def test_spool_upload_moves_large_files_to_disk():
+    """小文件留在内存中，超过阈值的文件写入临时文件，关闭后临时文件被删除"""
+    import os
+    from fastapi import UploadFile
+    from backend.services.upload_spool import UploadTooLargeError, spool_upload
+
+    small = await spool_upload(UploadFile(io.BytesIO(b"a" * 10), filename="small.pdf"), max_size=100, spool_threshold=50)
+    assert small.path is None
+    assert small.source == b"a" * 10
+
+    large = await spool_upload(UploadFile(io.BytesIO(b"b" * 80), filename="large.pdf"), max_size=100, spool_threshold=50)
+    with large:
+        assert large.size == 80
+        assert os.path.exists(large.path)
+        assert large.source == large.path
+        with large.open() as stream:
+            assert stream.read() == b"b" * 80
+        spooled_path = large.path
+    assert not os.path.exists(spooled_path)
+
+    with pytest.raises(UploadTooLargeError):
+        await spool_upload(UploadFile(io.BytesIO(b"c" * 120), filename="huge.pdf"), max_size=100, spool_threshold=50)
+
+
+async def test_duplicate_upload_reuses_parsed_content_and_blobs(async_client: AsyncClient):
+    """同一用户重复上传相同文件时复用已有解析结果和 blob，只保存新的标题"""
+    import hashlib
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.app import app
+    from backend.core.security import get_current_active_user
+    from backend.models.resume import ThumbnailRef
+    from backend.services.resume_ingestion import REUSABLE_RESUME_FIELDS
+
+    mock_user = MagicMock()
+    mock_user.id = ObjectId()
+    file_content = b"%PDF-1.4 same resume"
+
+    existing = MagicMock()
+    existing.id = ObjectId()
+    for field_name in REUSABLE_RESUME_FIELDS:
+        setattr(existing, field_name, None)
+    existing.raw_text_content = "Python developer"
+    existing.file_blob_id = str(ObjectId())
+    existing.thumbnails = {"sidebar": ThumbnailRef(blob_id=str(ObjectId()), media_type="image/jpeg", width=141, height=200, content_hash="cd" * 32)}
+    mock_find_reusable = AsyncMock(return_value=existing)
+
+    mock_resume_model = MagicMock()
+    mock_resume_model.find.return_value.count = AsyncMock(return_value=1)
+    mock_resume_model.return_value.id = ObjectId()
+    mock_resume_model.return_value.insert = AsyncMock()
+    mock_blob_store = MagicMock()
+    mock_blob_store.put = AsyncMock()
+    mock_pool = MagicMock()
+    mock_pool.run_extraction = AsyncMock()
+
+    app.dependency_overrides = {get_current_active_user: lambda: mock_user}
+    with patch("backend.api.resume.Resume", mock_resume_model), \
+         patch("backend.api.resume.blob_store", mock_blob_store), \
+         patch("backend.api.resume.resume_ingestion_pool", mock_pool), \
+         patch("backend.api.resume.find_reusable_resume", mock_find_reusable), \
+         patch("backend.api.resume.insert_reused_resume", AsyncMock(return_value=True)):
+        await async_client.post(
+            f"{settings.API_V1_STR}/resumes/upload",
+            data={'title': 'Renamed Copy'},
+            files={'resume_file': ('copy.pdf', io.BytesIO(file_content), 'application/pdf')}
+        )
+    app.dependency_overrides = {}
+
+    mock_find_reusable.assert_awaited_once_with(mock_user.id, hashlib.sha256(file_content).hexdigest())
+    mock_pool.run_extraction.assert_not_called()
+    mock_blob_store.put.assert_not_called()
+    created_kwargs = mock_resume_model.call_args.kwargs
+    assert created_kwargs["title"] == "Renamed Copy"
+    assert created_kwargs["content_hash"] == hashlib.sha256(file_content).hexdigest()
+    assert created_kwargs["file_blob_id"] == existing.file_blob_id
+    assert created_kwargs["thumbnails"] == existing.thumbnails
+    assert created_kwargs["raw_text_content"] == "Python developer"
+
+
+async def test_insert_reused_resume_rolls_back_when_source_was_deleted():
+    """被复用的简历在插入期间被删除时，撤销插入并清理不再被引用的共享 blob"""
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.services.resume_ingestion import insert_reused_resume
+
+    source = MagicMock()
+    source.id = ObjectId()
+    new_resume = MagicMock()
+    new_resume.insert = AsyncMock()
+    new_resume.delete = AsyncMock()
+
+    mock_resume_model = MagicMock()
+    mock_delete_blobs = AsyncMock()
+    with patch("backend.services.resume_ingestion.Resume", mock_resume_model), \
+         patch("backend.services.resume_ingestion.delete_resume_blobs", mock_delete_blobs):
+        mock_resume_model.find.return_value.count = AsyncMock(return_value=1)
+        assert await insert_reused_resume(new_resume, source) is True
+        new_resume.delete.assert_not_awaited()
+
+        mock_resume_model.find.return_value.count = AsyncMock(return_value=0)
+        assert await insert_reused_resume(new_resume, source) is False
+
+    assert new_resume.insert.await_count == 2
+    new_resume.delete.assert_awaited_once()
+    mock_delete_blobs.assert_awaited_once_with(new_resume)
+
+
+async def test_delete_resume_blobs_keeps_blobs_shared_with_duplicates():
+    """删除简历时，仍被其他相同内容的简历引用的 blob 不会被删除"""
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.models.resume import ThumbnailRef
+    from backend.services.resume_ingestion import delete_resume_blobs
+
+    shared_file, shared_thumb, own_thumb = str(ObjectId()), str(ObjectId()), str(ObjectId())
+    resume = MagicMock()
+    resume.id = ObjectId()
+    resume.content_hash = "ef" * 32
+    resume.file_blob_id = shared_file
+    resume.thumbnails = {
+        "sidebar": ThumbnailRef(blob_id=shared_thumb, media_type="image/jpeg", width=141, height=200, content_hash="01" * 32),
+        "grid": ThumbnailRef(blob_id=own_thumb, media_type="image/jpeg", width=283, height=400, content_hash="02" * 32),
+    }
+    sibling = MagicMock()
+    sibling.file_blob_id = shared_file
+    sibling.thumbnails = {"sidebar": resume.thumbnails["sidebar"]}
+
+    mock_resume_model = MagicMock()
+    mock_resume_model.find.return_value.project.return_value.to_list = AsyncMock(return_value=[sibling])
+    mock_blob_store = MagicMock()
+    mock_blob_store.delete = AsyncMock()
+
+    with patch("backend.services.resume_ingestion.Resume", mock_resume_model), \
+         patch("backend.services.resume_ingestion.blob_store", mock_blob_store):
+        await delete_resume_blobs(resume)
+
+    mock_blob_store.delete.assert_awaited_once_with(own_thumb)
+
+
+async def test_ingestion_marks_resume_failed_on_unexpected_error():
+    """解析过程中任何异常都会把简历标记为 failed，而不是停留在 processing"""
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.services.resume_ingestion import PROCESSING_FAILED, ResumeIngestionPool
+
+    resume_doc = MagicMock()
+    resume_doc.id = ObjectId()
+    resume_doc.processing_status = "pending"
+    resume_doc.file_blob_id = str(ObjectId())
+
+    mock_resume_model = MagicMock()
+    mock_resume_model.get = AsyncMock(return_value=resume_doc)
+    mock_resume_model.find_one.return_value.update = AsyncMock(return_value=MagicMock(matched_count=1, modified_count=1))
+    mock_blob_store = MagicMock()
+    mock_blob_store.read = AsyncMock(side_effect=RuntimeError("GridFS unavailable"))
+
+    pool = ResumeIngestionPool(max_workers=1, max_queue_size=1)
+    with patch("backend.services.resume_ingestion.Resume", mock_resume_model), \
+         patch("backend.services.resume_ingestion.blob_store", mock_blob_store):
+        await pool.process(resume_doc.id)
+
+    last_update = mock_resume_model.find_one.return_value.update.await_args_list[-1].args[0]
+    assert last_update["$set"]["processing_status"] == PROCESSING_FAILED
+    assert last_update["$set"]["processing_error"] == "GridFS unavailable"
+
+
+async def test_ingestion_skips_resume_claimed_by_another_worker():
+    """认领失败 (已被其他 worker 处理或已结束) 时不读取文件，也不修改状态"""
+    from unittest.mock import patch, AsyncMock, MagicMock
+    from bson import ObjectId
+    from backend.services.resume_ingestion import ResumeIngestionPool
+
+    mock_resume_model = MagicMock()
+    mock_resume_model.get = AsyncMock()
+    mock_resume_model.find_one.return_value.update = AsyncMock(return_value=MagicMock(matched_count=0, modified_count=0))
+    mock_blob_store = MagicMock()
+    mock_blob_store.read = AsyncMock()
+
+    pool = ResumeIngestionPool(max_workers=1, max_queue_size=1)
+    with patch("backend.services.resume_ingestion.Resume", mock_resume_model), \
+         patch("backend.services.resume_ingestion.blob_store", mock_blob_store):
+        await pool.process(ObjectId())
+
+    mock_resume_model.find_one.return_value.update.assert_awaited_once()
+    mock_resume_model.get.assert_not_awaited()
+    mock_blob_store.read.assert_not_awaited()
@@ -0,0 +1,151 @@
+"""
+ZIP 批量导入测试
+"""
+# backend/tests/test_resume_import.py
+import io
+import json
+import zipfile
+import zlib
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+from httpx import AsyncClient
+
+from backend.config import settings
+from backend.services.resume_import import (
+    IMPORT_CREATED, IMPORT_FAILED, IMPORT_SKIPPED, import_resume_archive, list_archive_entries
+)
+from backend.services.resume_parser import ProcessedDocument
+
+pytestmark = pytest.mark.asyncio
+
+
+def _build_archive(files: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _processed_document() -> ProcessedDocument:
+    return ProcessedDocument(
+        media_type="application/pdf", page_count=1, pages=[], text_blocks=[],
+        raw_text="Python developer", layout_text="Skills\nPython", thumbnails={}
+    )
+
+
+async def test_list_archive_entries_ignores_directories_and_metadata():
+    archive_bytes = _build_archive({
+        "resumes/a.pdf": b"%PDF a",
+        "resumes/.DS_Store": b"",
+        "__MACOSX/resumes/._a.pdf": b"",
+        "notes.txt": b"hello",
+    })
+    with zipfile.ZipFile(io.BytesIO(archive_bytes)) as archive:
+        names = [info.filename for info in list_archive_entries(archive)]
+    assert names == ["resumes/a.pdf", "notes.txt"]
+
+
+async def test_import_archive_enforces_quota_and_reports_each_entry():
+    """名额用完后其余简历标记为 skipped，不支持的文件也逐条返回结果"""
+    archive_bytes = _build_archive({"a.pdf": b"%PDF a", "b.pdf": b"%PDF b", "notes.txt": b"hello"})
+
+    mock_pool = MagicMock()
+    mock_pool.max_workers = 2
+    mock_pool.run_extraction = AsyncMock(return_value=(_processed_document(), {"skills": "Python"}))
+    mock_blob_store = MagicMock()
+    mock_blob_store.put = AsyncMock(return_value=str(ObjectId()))
+    mock_resume_model = MagicMock()
+    mock_resume_model.return_value.id = ObjectId()
+    mock_resume_model.return_value.insert = AsyncMock()
+
+    with zipfile.ZipFile(io.BytesIO(archive_bytes)) as archive, \
+         patch("backend.services.resume_import.resume_import_pool", mock_pool), \
+         patch("backend.services.resume_import.blob_store", mock_blob_store), \
+         patch("backend.services.resume_import.Resume", mock_resume_model), \
+         patch("backend.services.resume_import.find_reusable_resume", AsyncMock(return_value=None)), \
+         patch("backend.services.resume_import.store_thumbnails", AsyncMock(return_value={})), \
+         patch("backend.services.resume_import.embed_resume_text", AsyncMock(return_value=None)):
+        items = [item async for item in import_resume_archive(archive, list_archive_entries(archive), ObjectId(), quota_remaining=1)]
+
+    results = {item.file_name: item for item in items[:-1]}
+    assert results["a.pdf"].status == IMPORT_CREATED
+    assert results["b.pdf"].status == IMPORT_SKIPPED
+    assert results["notes.txt"].status == IMPORT_SKIPPED
+    mock_pool.run_extraction.assert_awaited_once()
+
+    summary = items[-1]
+    assert summary.type == "summary"
+    assert (summary.total, summary.created, summary.skipped, summary.failed) == (3, 1, 2, 0)
+
+
+async def test_import_archive_reports_corrupt_entry_as_failed():
+    """解压失败 (zlib.error) 的条目标记为 failed，并归还预留的名额"""
+    zip_file = MagicMock()
+    zip_file.read.side_effect = [zlib.error("invalid stored block lengths"), b"%PDF b"]
+    entries = [zipfile.ZipInfo("a.pdf"), zipfile.ZipInfo("b.pdf")]
+
+    mock_pool = MagicMock()
+    mock_pool.max_workers = 1
+    mock_import_entry = AsyncMock(return_value=(IMPORT_CREATED, str(ObjectId())))
+
+    with patch("backend.services.resume_import.resume_import_pool", mock_pool), \
+         patch("backend.services.resume_import._import_entry", mock_import_entry):
+        items = [item async for item in import_resume_archive(zip_file, entries, ObjectId(), quota_remaining=1)]
+
+    results = {item.file_name: item for item in items[:-1]}
+    assert results["a.pdf"].status == IMPORT_FAILED
+    assert "invalid stored block lengths" in results["a.pdf"].error
+    assert results["b.pdf"].status == IMPORT_CREATED
+    assert (items[-1].created, items[-1].failed) == (1, 1)
+
+
+async def test_import_archive_ends_stream_when_reading_fails():
+    """读取压缩包时出现意外错误，输出流以异常结束而不是一直等待"""
+    mock_pool = MagicMock()
+    mock_pool.max_workers = 1
+
+    with patch("backend.services.resume_import.resume_import_pool", mock_pool), \
+         patch("backend.services.resume_import.entry_content_type", side_effect=KeyError("boom")):
+        with pytest.raises(KeyError):
+            async for _ in import_resume_archive(MagicMock(), [zipfile.ZipInfo("a.pdf")], ObjectId(), quota_remaining=None):
+                pass
+
+
+async def test_import_endpoint_streams_ndjson(async_client: AsyncClient):
+    from backend.app import app
+    from backend.core.security import get_current_active_user
+    from backend.services.resume_import import ResumeImportResult, ResumeImportSummary
+
+    mock_user = MagicMock()
+    mock_user.id = ObjectId()
+
+    async def fake_import(zip_file, entries, user_id, quota_remaining):
+        yield ResumeImportResult(index=0, file_name="a.pdf", status=IMPORT_CREATED, resume_id=str(ObjectId()))
+        yield ResumeImportSummary(total=1, created=1)
+
+    mock_resume_model = MagicMock()
+    mock_resume_model.find.return_value.count = AsyncMock(return_value=0)
+
+    app.dependency_overrides = {get_current_active_user: lambda: mock_user}
+    with patch("backend.api.resume.Resume", mock_resume_model), \
+         patch("backend.api.resume.import_resume_archive", fake_import):
+        response = await async_client.post(
+            f"{settings.API_V1_STR}/resumes/import",
+            files={"archive": ("resumes.zip", io.BytesIO(_build_archive({"a.pdf": b"%PDF a"})), "application/zip")}
+        )
+        bad_archive = await async_client.post(
+            f"{settings.API_V1_STR}/resumes/import",
+            files={"archive": ("resumes.zip", io.BytesIO(b"not a zip"), "application/zip")}
+        )
+    app.dependency_overrides = {}
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["status"] == IMPORT_CREATED
+    assert lines[-1] == {"type": "summary", "total": 1, "created": 1, "reused": 0, "skipped": 0, "failed": 0}
+    assert bad_archive.status_code == status.HTTP_400_BAD_REQUEST
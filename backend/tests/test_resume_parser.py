@@ -0,0 +1,88 @@
+"""
+简历文件解析测试
+在内存中生成 PDF / DOCX，验证 process_document 一次处理即可得到文本、页面信息和缩略图
+"""
+import io
+
+import fitz
+import pytest
+from docx import Document as DocxDocument
+
+from backend.services.resume_parser import process_document, segment_text_into_sections, match_section_header
+
+
+def _make_pdf(lines) -> bytes:
+    pdf_doc = fitz.open()
+    page = pdf_doc.new_page(width=595, height=842)
+    for index, line in enumerate(lines):
+        page.insert_text((72, 72 + index * 40), line)
+    content = pdf_doc.tobytes()
+    pdf_doc.close()
+    return content
+
+
+def test_process_pdf_returns_text_pages_and_thumbnail():
+    content = _make_pdf(["Jane Doe", "Experience", "Python developer at Example Corp"])
+
+    processed = process_document(content, "application/pdf", "cv.pdf")
+
+    assert processed.page_count == 1
+    assert processed.pages[0].number == 1
+    assert processed.pages[0].width == pytest.approx(595)
+    assert processed.raw_text == "Jane Doe Experience Python developer at Example Corp"
+    assert set(processed.thumbnails) == {"sidebar", "grid"}
+    sidebar, grid = processed.thumbnails["sidebar"], processed.thumbnails["grid"]
+    assert sidebar.data.startswith(b"\xff\xd8") # JPEG
+    assert sidebar.media_type == "image/jpeg"
+    assert sidebar.width <= 150 and sidebar.height <= 200
+    assert grid.width <= 300 and grid.height <= 400 and grid.width > sidebar.width
+
+
+def test_process_pdf_can_skip_thumbnail():
+    processed = process_document(_make_pdf(["Only text"]), "application/pdf", "cv.pdf", render_thumbnail=False)
+    assert processed.raw_text == "Only text"
+    assert processed.thumbnails == {}
+
+
+def test_process_docx_uses_paragraphs():
+    docx_doc = DocxDocument()
+    docx_doc.add_paragraph("Skills")
+    docx_doc.add_paragraph("")
+    docx_doc.add_paragraph("Python,   FastAPI")
+    buffer = io.BytesIO()
+    docx_doc.save(buffer)
+
+    processed = process_document(
+        buffer.getvalue(), "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "cv.docx"
+    )
+
+    assert processed.text_blocks == ["Skills", "Python,   FastAPI"]
+    assert processed.raw_text == "Skills Python, FastAPI"
+    assert processed.page_count is None
+    assert processed.thumbnails == {}
+
+
+def test_unsupported_or_corrupt_files_raise_value_error():
+    with pytest.raises(ValueError):
+        process_document(b"plain text", "text/plain", "cv.txt")
+    with pytest.raises(ValueError):
+        process_document(b"not a pdf", "application/pdf", "broken.pdf")
+
+
+def test_layout_text_keeps_lines_so_sections_are_found():
+    content = _make_pdf(["Jane Doe", "Experience", "Python developer at Example Corp", "Skills:", "Python, FastAPI"])
+
+    processed = process_document(content, "application/pdf", "cv.pdf")
+    sections = segment_text_into_sections(processed.layout_text)
+
+    assert "\n" in processed.layout_text
+    assert sections["unknown_initial"] == "Jane Doe"
+    assert sections["experience"] == "Python developer at Example Corp"
+    assert sections["skills"] == "Python, FastAPI"
+
+
+def test_section_headers_use_first_canonical_mapping():
+    assert match_section_header("Work Experience:") == "experience"
+    assert match_section_header("  TECHNICAL SKILLS  ") == "skills"
+    assert match_section_header("Portfolio") == "contact_info" # 同时出现在 contact_info 和 projects 中
+    assert match_section_header("Experience at Example Corp") is None
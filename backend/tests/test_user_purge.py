@@ -0,0 +1,187 @@
+"""
+账户删除后的后台清理测试
+"""
+# backend/tests/test_user_purge.py
+from datetime import datetime, timezone
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+from fastapi import status
+from httpx import AsyncClient
+
+from backend.config import settings
+from backend.models.resume import ResumeSummaryView, ThumbnailRef
+from backend.services.user_purge import PURGE_CANCELLED, PURGE_COMPLETED, PURGE_FAILED, PURGE_PENDING, UserPurgeWorker
+
+pytestmark = pytest.mark.asyncio
+
+
+def _resume_view(user_id, file_blob_id, thumbnail_blob_id=None) -> ResumeSummaryView:
+    now = datetime.now(timezone.utc)
+    thumbnails = {}
+    if thumbnail_blob_id:
+        thumbnails["sidebar"] = ThumbnailRef(blob_id=thumbnail_blob_id, media_type="image/jpeg", width=141, height=200, content_hash="ab" * 32)
+    return ResumeSummaryView(_id=ObjectId(), user_id=user_id, title="CV", file_blob_id=file_blob_id, thumbnails=thumbnails, uploaded_at=now, updated_at=now)
+
+
+async def test_purge_deletes_resumes_and_blobs_in_batches():
+    """按批删除简历和 blob (共享的 blob 只删一次)，记录进度并在最后标记为 completed"""
+    user_id = ObjectId()
+    job = MagicMock()
+    job.id = ObjectId()
+    job.user_id = user_id
+    job.resumes_total = None
+
+    shared_file = str(ObjectId())
+    first_batch = [_resume_view(user_id, shared_file, str(ObjectId())), _resume_view(user_id, shared_file)]
+    second_batch = [_resume_view(user_id, str(ObjectId()))]
+
+    mock_job_model = MagicMock()
+    mock_job_model.find_one.return_value.update = AsyncMock(return_value=MagicMock(modified_count=1))
+    mock_job_model.get = AsyncMock(return_value=job)
+    mock_resume_model = MagicMock()
+    mock_resume_model.find.return_value.count = AsyncMock(return_value=3)
+    mock_resume_model.find.return_value.sort.return_value.limit.return_value.project.return_value.to_list = AsyncMock(
+        side_effect=[first_batch, second_batch, []]
+    )
+    mock_resume_model.find.return_value.delete = AsyncMock(side_effect=[MagicMock(deleted_count=2), MagicMock(deleted_count=1)])
+    mock_blob_store = MagicMock()
+    mock_blob_store.delete = AsyncMock()
+
+    worker = UserPurgeWorker(batch_size=2, batch_delay_seconds=0, lease_seconds=60)
+    with patch("backend.services.user_purge.UserPurgeJob", mock_job_model), \
+         patch("backend.services.user_purge.User.get", AsyncMock(return_value=None)), \
+         patch("backend.services.user_purge.Resume", mock_resume_model), \
+         patch("backend.services.user_purge.blob_store", mock_blob_store):
+        await worker.process(job.id)
+
+    assert mock_blob_store.delete.await_count == 3
+    assert mock_resume_model.find.return_value.delete.await_count == 2
+    updates = [call.args[0] for call in mock_job_model.find_one.return_value.update.await_args_list]
+    assert {"resumes_deleted": 2, "blobs_deleted": 2} == updates[2]["$inc"]
+    assert updates[-1]["$set"]["status"] == PURGE_COMPLETED
+
+
+async def test_purge_skips_job_claimed_by_another_worker():
+    mock_job_model = MagicMock()
+    mock_job_model.find_one.return_value.update = AsyncMock(return_value=MagicMock(modified_count=0))
+    mock_job_model.get = AsyncMock()
+
+    worker = UserPurgeWorker(batch_size=2, batch_delay_seconds=0, lease_seconds=60)
+    with patch("backend.services.user_purge.UserPurgeJob", mock_job_model):
+        await worker.process(ObjectId())
+
+    mock_job_model.get.assert_not_called()
+
+
+@pytest.mark.parametrize("cancel_modified, expected_status", [(1, PURGE_CANCELLED), (0, PURGE_PENDING)])
+async def test_purge_leaves_existing_account_untouched(cancel_modified, expected_status):
+    """账户仍然存在时不删除任何数据：任务创建已久则取消，刚创建 (账户可能正在删除) 则放回 pending"""
+    job = MagicMock()
+    job.id = ObjectId()
+    job.user_id = ObjectId()
+
+    mock_job_model = MagicMock()
+    mock_job_model.find_one.return_value.update = AsyncMock(side_effect=[
+        MagicMock(modified_count=1), MagicMock(modified_count=cancel_modified), MagicMock(modified_count=1)
+    ])
+    mock_job_model.get = AsyncMock(return_value=job)
+    mock_resume_model = MagicMock()
+    mock_blob_store = MagicMock()
+    mock_blob_store.delete = AsyncMock()
+
+    worker = UserPurgeWorker(batch_size=2, batch_delay_seconds=0, lease_seconds=60)
+    with patch("backend.services.user_purge.UserPurgeJob", mock_job_model), \
+         patch("backend.services.user_purge.User.get", AsyncMock(return_value=MagicMock())), \
+         patch("backend.services.user_purge.Resume", mock_resume_model), \
+         patch("backend.services.user_purge.blob_store", mock_blob_store):
+        await worker.process(job.id)
+
+    mock_resume_model.find.assert_not_called()
+    mock_blob_store.delete.assert_not_called()
+    last_update = mock_job_model.find_one.return_value.update.await_args_list[-1].args[0]
+    assert last_update["$set"]["status"] == expected_status
+
+
+async def test_failed_purge_is_scheduled_for_retry():
+    """清理失败时记录失败次数和下次重试时间，之后可以重新认领 failed 任务"""
+    job = MagicMock()
+    job.id = ObjectId()
+    job.user_id = ObjectId()
+    job.resumes_total = 1
+    job.attempts = 1
+
+    mock_job_model = MagicMock()
+    mock_job_model.find_one.return_value.update = AsyncMock(return_value=MagicMock(modified_count=1))
+    mock_job_model.get = AsyncMock(return_value=job)
+    mock_resume_model = MagicMock()
+    mock_resume_model.find.return_value.sort.return_value.limit.return_value.project.return_value.to_list = AsyncMock(
+        side_effect=RuntimeError("connection reset")
+    )
+
+    worker = UserPurgeWorker(batch_size=2, batch_delay_seconds=0, lease_seconds=60, max_attempts=3, retry_delay_seconds=10)
+    with patch("backend.services.user_purge.UserPurgeJob", mock_job_model), \
+         patch("backend.services.user_purge.User.get", AsyncMock(return_value=None)), \
+         patch("backend.services.user_purge.Resume", mock_resume_model):
+        with pytest.raises(RuntimeError):
+            await worker.process(job.id)
+
+    claim_filter = mock_job_model.find_one.call_args_list[0].args[0]
+    retry_claim = claim_filter["$or"][2]
+    assert (retry_claim["status"], retry_claim["attempts"]) == (PURGE_FAILED, {"$lt": 3})
+    failure = mock_job_model.find_one.return_value.update.await_args_list[-1].args[0]
+    assert failure["$set"]["status"] == PURGE_FAILED
+    assert failure["$inc"] == {"attempts": 1}
+    retry_in = (failure["$set"]["lease_expires_at"] - datetime.now(timezone.utc)).total_seconds()
+    assert 15 < retry_in <= 20
+
+
+async def test_delete_account_returns_202_with_purge_job(async_client: AsyncClient):
+    from backend.app import app
+    from backend.core.security import get_current_active_user
+    from backend.models.user_purge_job import UserPurgeJob
+
+    mock_user = MagicMock()
+    mock_user.id = ObjectId()
+    mock_user.delete = AsyncMock()
+    purge_job = UserPurgeJob.model_construct(
+        id=ObjectId(), user_id=mock_user.id, status="pending", resumes_total=None, resumes_deleted=0, blobs_deleted=0,
+        error=None, created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc), completed_at=None
+    )
+    mock_worker = MagicMock()
+    mock_worker.submit = AsyncMock()
+
+    app.dependency_overrides = {get_current_active_user: lambda: mock_user}
+    with patch("backend.api.auth.create_purge_job", AsyncMock(return_value=purge_job)), \
+         patch("backend.api.auth.user_purge_worker", mock_worker):
+        response = await async_client.delete(f"{settings.API_V1_STR}/auth/users/me/delete")
+    app.dependency_overrides = {}
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    body = response.json()
+    assert body["job_id"] == str(purge_job.id)
+    assert body["status_url"].endswith(f"/auth/purge-jobs/{purge_job.status_token}")
+    assert str(purge_job.id) not in body["status_url"]
+    mock_user.delete.assert_awaited_once()
+    mock_worker.submit.assert_awaited_once_with(purge_job.id)
+
+
+async def test_purge_progress_is_looked_up_by_status_token(async_client: AsyncClient):
+    """清理进度按随机令牌查询，不接受任务 ID"""
+    from backend.models.user_purge_job import UserPurgeJob
+
+    purge_job = UserPurgeJob.model_construct(
+        id=ObjectId(), user_id=ObjectId(), status="running", resumes_total=3, resumes_deleted=1, blobs_deleted=2,
+        error=None, created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc), completed_at=None
+    )
+    mock_job_model = MagicMock()
+    mock_job_model.find_one = AsyncMock(side_effect=[purge_job, None])
+
+    with patch("backend.api.auth.UserPurgeJob", mock_job_model):
+        found = await async_client.get(f"{settings.API_V1_STR}/auth/purge-jobs/{purge_job.status_token}")
+        by_id = await async_client.get(f"{settings.API_V1_STR}/auth/purge-jobs/{purge_job.id}")
+
+    assert found.status_code == status.HTTP_200_OK
+    assert found.json()["resumes_deleted"] == 1
+    assert by_id.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,80 @@
+# backend/utils/benchmark_spacy_profiles.py
+"""
+测量各个关键词提取档位 (fast / standard / full) 的速度和内存占用。
+每个档位在独立的子进程中加载，保证 RSS 互不影响。
+
+用法 (在项目根目录):
+    python -m backend.utils.benchmark_spacy_profiles [--runs 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROFILES = ["fast", "standard", "full"]
+
+SAMPLE_JD = """
+About The Job
+As a Software Engineering Intern you will design and build scalable backend services, APIs, and data pipelines.
+Contribute to full-stack development, including intuitive, performant UIs using modern frameworks like React.
+Support development of machine learning infrastructure and data platforms.
+About you
+Currently pursuing a Bachelor's or Master's degree in Computer Science, Engineering, Data Science, or a related field.
+Comfortable coding in languages such as Python, Go, JavaScript/TypeScript, or Java.
+Exposure to front-end development (HTML, CSS, JavaScript) and frameworks like React or Vue.js is a plus.
+Familiarity with cloud infrastructure (e.g., AWS, GCP), databases (e.g., PostgreSQL), or data tools (e.g., Apache Beam, Airflow) is beneficial.
+"""
+
+_CHILD_SCRIPT = """
+import json, resource, sys, time
+import contextlib, io
+runs = int(sys.argv[1])
+with contextlib.redirect_stdout(io.StringIO()):
+    started = time.perf_counter()
+    from backend.services.keyword_extractor import extract_keywords_from_jd, nlp
+    load_seconds = time.perf_counter() - started
+    jd_text = sys.stdin.read()
+    extract_keywords_from_jd(jd_text) # 预热
+    started = time.perf_counter()
+    for _ in range(runs):
+        keywords = extract_keywords_from_jd(jd_text)
+    per_call_ms = (time.perf_counter() - started) / runs * 1000
+max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    max_rss_kb //= 1024
+print(json.dumps({
+    "pipeline": nlp.pipe_names,
+    "load_seconds": round(load_seconds, 2),
+    "per_call_ms": round(per_call_ms, 1),
+    "max_rss_mb": round(max_rss_kb / 1024, 1),
+    "keyword_count": len(keywords),
+}))
+"""
+
+
+def run_profile(profile: str, runs: int) -> dict:
+    env = dict(os.environ, KEYWORD_EXTRACTION_PROFILE=profile)
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD_SCRIPT, str(runs)],
+        input=SAMPLE_JD, capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="每个档位重复提取的次数")
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'load (s)':>9} {'per JD (ms)':>12} {'max RSS (MB)':>13} {'keywords':>9}  pipeline")
+    for profile in PROFILES:
+        result = run_profile(profile, args.runs)
+        print(
+            f"{profile:<10} {result['load_seconds']:>9} {result['per_call_ms']:>12} "
+            f"{result['max_rss_mb']:>13} {result['keyword_count']:>9}  {','.join(result['pipeline'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
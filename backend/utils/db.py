@@ -6,6 +6,8 @@ from backend.config import settings
 from backend.models.user import User # 导入 User Document 模型
 from backend.models.resume import Resume # 导入 Resume Document 模型
 from backend.models.processed_jd import ProcessedJD # 导入 ProcessedJD Document 模型
+from backend.models.user_purge_job import UserPurgeJob
+from backend.utils.index_audit import audit_hot_path_queries
 
 class MongoDB:
     client: AsyncIOMotorClient = None
@@ -60,11 +62,16 @@ async def initialize_database():
             User,
             Resume,
             ProcessedJD,  # 添加 ProcessedJD 模型
+            UserPurgeJob,
             # 如果有更多Document模型，在这里添加
         ]
     )
     print("Beanie initialized successfully. Collections and indexes should be created/updated if defined in models.")
 
+    if settings.MONGO_INDEX_AUDIT_ON_STARTUP:
+        # 检查热点查询是否都能走索引，缺少索引时打印警告 (不影响启动)
+        await audit_hot_path_queries(database_instance)
+
 def get_database() -> AsyncIOMotorDatabase:
     """获取原始的Motor数据库实例（如果需要直接操作，不通过Beanie）"""
     if db_manager.client is None:
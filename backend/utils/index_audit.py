@@ -0,0 +1,75 @@
+# backend/utils/index_audit.py
+"""
+启动时的查询计划检查
+对热点路径上的查询 (上传时的简历数量统计、简历列表、重复文件查找、登录等) 执行 explain()，
+如果获胜计划中出现 COLLSCAN (全集合扫描)，说明缺少对应的索引，打印警告。
+只检查查询计划，不执行查询本身；由 MONGO_INDEX_AUDIT_ON_STARTUP 控制是否执行。
+"""
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+
+class HotPathQuery(NamedTuple):
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[tuple]] = None
+
+
+def hot_path_queries() -> List[HotPathQuery]:
+    """需要走索引的查询；过滤条件中的值只用于生成查询计划"""
+    sample_id = ObjectId()
+    sample_hash = "0" * 64
+    return [
+        HotPathQuery("resume quota count (upload_resume)", "resumes", {"user_id": sample_id}),
+        HotPathQuery("resume listing (list_user_resumes)", "resumes", {"user_id": sample_id, "_id": {"$gt": sample_id}}, [("_id", 1)]),
+        HotPathQuery("duplicate upload lookup (find_reusable_resume)", "resumes", {"user_id": sample_id, "content_hash": sample_hash, "processing_status": "completed"}),
+        HotPathQuery("unfinished ingestion (ResumeIngestionPool)", "resumes", {"processing_status": {"$in": ["pending", "processing"]}}),
+        HotPathQuery("JD lookup by hash (jd_service)", "processed_jds", {"content_hash": {"$in": [sample_hash]}}),
+        HotPathQuery("login by email", "users", {"email": "audit@example.com"}),
+        HotPathQuery("purge progress by status token", "user_purge_jobs", {"status_token": "audit-token"}),
+        HotPathQuery("unfinished purge jobs (UserPurgeWorker)", "user_purge_jobs", {"$or": [{"status": {"$in": ["pending", "running"]}}, {"status": "failed", "attempts": {"$lt": 5}}]}),
+    ]
+
+
+def iter_plan_stages(plan: Any) -> Iterator[str]:
+    """遍历 explain() 结果中计划树的所有 stage 名称 (兼容 inputStage / inputStages / queryPlan 等嵌套形式)"""
+    if isinstance(plan, dict):
+        stage = plan.get("stage")
+        if isinstance(stage, str):
+            yield stage
+        for value in plan.values():
+            if isinstance(value, (dict, list)):
+                yield from iter_plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from iter_plan_stages(item)
+
+
+def winning_plan_uses_collection_scan(explain_result: Dict[str, Any]) -> bool:
+    winning_plan = explain_result.get("queryPlanner", {}).get("winningPlan", {})
+    return "COLLSCAN" in iter_plan_stages(winning_plan)
+
+
+async def audit_hot_path_queries(database: AsyncIOMotorDatabase) -> List[str]:
+    """对热点查询执行 explain()，返回 (并打印) 使用全集合扫描的查询名称"""
+    queries = hot_path_queries()
+    collection_scans = []
+    for query in queries:
+        cursor = database[query.collection].find(query.filter)
+        if query.sort:
+            cursor = cursor.sort(query.sort)
+        try:
+            explain_result = await cursor.explain()
+        except PyMongoError as e:
+            print(f"[Index Audit] Could not explain '{query.name}' on {query.collection}: {e}")
+            continue
+        if winning_plan_uses_collection_scan(explain_result):
+            collection_scans.append(query.name)
+            print(f"[Index Audit] WARNING: '{query.name}' on {query.collection} uses a COLLSCAN. Filter: {list(query.filter)}")
+    if not collection_scans:
+        print(f"[Index Audit] All {len(queries)} hot-path queries use an index.")
+    return collection_scans
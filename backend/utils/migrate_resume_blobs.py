@@ -0,0 +1,93 @@
+# backend/utils/migrate_resume_blobs.py
+"""
+一次性迁移旧简历文档的二进制内容：
+- 内嵌的 file_content 移到 blob store (GridFS)，文档中改为保存 file_blob_id；
+- 旧的单一 PNG 缩略图 (内嵌的 thumbnail_content 或 thumbnail_blob_id) 由原文件重新生成为
+  各尺寸的 JPEG 缩略图，保存到 thumbnails 字段，旧缩略图随后删除。
+可以重复运行，已迁移的文档不会被再次处理。
+
+用法 (在项目根目录):
+    python -m backend.utils.migrate_resume_blobs [--dry-run]
+"""
+import argparse
+import asyncio
+
+from backend.models.resume import Resume
+from backend.services.blob_store import blob_store
+from backend.services.resume_ingestion import store_thumbnails
+from backend.services.resume_parser import process_document
+from backend.utils.db import connect_to_mongo, initialize_database, close_mongo_connection
+
+LEGACY_BINARY_QUERY = {
+    "$or": [
+        {"file_content": {"$type": "binData"}},
+        {"thumbnail_content": {"$type": "binData"}},
+        {"thumbnail_blob_id": {"$exists": True}},
+    ]
+}
+
+
+async def migrate_document(raw_doc: dict) -> dict:
+    """迁移一个旧文档的二进制内容，返回需要写回文档的更新"""
+    file_name = raw_doc.get("original_file_name") or str(raw_doc["_id"])
+    media_type = raw_doc.get("file_media_type")
+    updates = {"$set": {}, "$unset": {
+        "file_content": "", "thumbnail_content": "", "thumbnail_blob_id": "", "thumbnail_media_type": "",
+    }}
+
+    file_content = raw_doc.get("file_content")
+    if file_content:
+        file_content = bytes(file_content)
+        updates["$set"]["file_blob_id"] = await blob_store.put(file_content, file_name, media_type)
+        updates["$set"]["file_size"] = len(file_content)
+    elif raw_doc.get("file_blob_id"):
+        file_content = await blob_store.read(raw_doc["file_blob_id"])
+
+    if file_content and media_type == "application/pdf":
+        try:
+            processed = await asyncio.to_thread(process_document, file_content, media_type, file_name)
+        except ValueError as e:
+            print(f"[Blob Migration] Could not re-render thumbnails for resume {raw_doc['_id']}: {e}")
+        else:
+            thumbnails = await store_thumbnails(processed, file_name)
+            updates["$set"]["thumbnails"] = {size_name: ref.model_dump() for size_name, ref in thumbnails.items()}
+
+    if not updates["$set"]:
+        del updates["$set"]
+    return updates
+
+
+async def migrate(dry_run: bool) -> None:
+    collection = Resume.get_motor_collection()
+    pending = await collection.count_documents(LEGACY_BINARY_QUERY)
+    print(f"[Blob Migration] {pending} resume(s) still use inline binaries or legacy thumbnails.")
+    if dry_run or pending == 0:
+        return
+
+    migrated = 0
+    # 逐个文档读取，避免一次性把所有文件内容载入内存
+    async for raw_doc in collection.find(LEGACY_BINARY_QUERY, batch_size=1):
+        updates = await migrate_document(raw_doc)
+        await collection.update_one({"_id": raw_doc["_id"]}, updates)
+        if raw_doc.get("thumbnail_blob_id"):
+            await blob_store.delete(raw_doc["thumbnail_blob_id"])
+        migrated += 1
+        print(f"[Blob Migration] Migrated resume {raw_doc['_id']} ({migrated}/{pending}).")
+    print(f"[Blob Migration] Done. {migrated} resume(s) migrated.")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="只统计需要迁移的文档数量，不做修改")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    try:
+        await initialize_database()
+        await migrate(args.dry_run)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())